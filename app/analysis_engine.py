@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional, Tuple
+from tracing import tracer
+
+# on_token(name, text_so_far) and on_done(name, result, error) run on the calling thread
+TokenCallback = Callable[[str, str], None]
+DoneCallback = Callable[[str, Optional[str], Optional[str]], None]
+
+
+class AnalysisEngine:
+    """Runs several LLM analysis prompts concurrently, streaming tokens as they arrive.
+
+    Wall-clock time is roughly that of the slowest prompt instead of the sum of all of them.
+    """
+
+    def __init__(self, groq_handler, max_concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                 system_prompt: Optional[str] = None):
+        self.groq = groq_handler
+        self.system_prompt = system_prompt  # Defaults to the handler's analysis prompt
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "3"))
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT", "60"))
+        self._loop = None
+        self._tasks = []
+        self.elapsed: Dict[str, float] = {}  # Seconds each prompt of the last run took once it was sent
+
+    def run(self, prompts: Dict[str, str], on_token: Optional[TokenCallback] = None,
+            on_done: Optional[DoneCallback] = None) -> Dict[str, Optional[str]]:
+        """Run every prompt and return {name: cleaned result or None}."""
+        return asyncio.run(self.run_async(prompts, on_token, on_done))
+
+    async def run_async(self, prompts: Dict[str, str], on_token: Optional[TokenCallback] = None,
+                        on_done: Optional[DoneCallback] = None) -> Dict[str, Optional[str]]:
+        self._loop = asyncio.get_running_loop()
+        self.elapsed = {}
+        client = self.groq.new_async_client()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tasks = [
+            asyncio.create_task(self._run_one(client, name, prompt, semaphore, on_token))
+            for name, prompt in prompts.items()
+        ]
+        results = {}
+        try:
+            for finished in asyncio.as_completed(self._tasks):
+                name, result, error = await finished
+                results[name] = result
+                if on_done:
+                    on_done(name, result, error)
+        finally:
+            # An interrupted caller (e.g. a Streamlit rerun) must not leave requests running
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+            self._loop = None
+            await self.groq.close_async_client(client)
+        return results
+
+    def cancel(self):
+        """Cancel outstanding requests; safe to call from another thread."""
+        loop = self._loop
+        if loop is not None:
+            for task in list(self._tasks):
+                loop.call_soon_threadsafe(task.cancel)
+
+    async def _run_one(self, client, name: str, prompt: str, semaphore: asyncio.Semaphore,
+                       on_token: Optional[TokenCallback]) -> Tuple[str, Optional[str], Optional[str]]:
+        try:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    text = await asyncio.wait_for(self._stream(client, name, prompt, on_token), self.timeout)
+                finally:
+                    self.elapsed[name] = time.perf_counter() - started
+        except asyncio.TimeoutError:
+            return name, None, f"timed out after {self.timeout:g}s"
+        except asyncio.CancelledError:
+            return name, None, "cancelled"
+        except Exception as e:
+            logging.error(f"Exception in analysis '{name}': {str(e)}")
+            return name, None, str(e)
+        if not text.strip():
+            return name, None, "empty response"
+        return name, self.groq._clean_output(text.strip()), None
+
+    async def _stream(self, client, name: str, prompt: str, on_token: Optional[TokenCallback]) -> str:
+        parts = []
+        with tracer.span("analyze_data", analysis=name, prompt_chars=len(prompt), streamed=True) as span:
+            async for token in self.groq.stream_analysis(prompt, client, self.system_prompt):
+                parts.append(token)
+                if on_token:
+                    on_token(name, "".join(parts))
+            span.set(completion_tokens=len(parts))  # One streamed chunk per token
+        return "".join(parts)
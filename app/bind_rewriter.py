@@ -0,0 +1,59 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sql_parser import normalize_sql, parameterize
+
+
+class BindRewriter:
+    """Turns literal values in queries into binds before execution and counts statement shapes.
+
+    A shape is the normalized statement Oracle sees. With rewriting on, the same question asked
+    with different values is one shape, so it is hard-parsed once and found in the client
+    statement cache afterwards. Off by default: a bound string compares like a VARCHAR2, so
+    equality against blank-padded CHAR columns can match differently than the literal did.
+    """
+
+    def __init__(self, enabled: bool = False, max_shapes: int = 10000):
+        self.enabled = enabled
+        self.max_shapes = max_shapes  # Least recently used shapes beyond this are forgotten
+        self._shapes: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.rewritten = 0
+        self.binds = 0
+
+    def rewrite(self, sql: str) -> Tuple[str, Optional[Dict]]:
+        """The statement to execute and its binds (None when nothing was bound)."""
+        statement, binds = parameterize(sql) if self.enabled else (sql, {})
+        shape = normalize_sql(statement)
+        with self._lock:
+            self.executions += 1
+            if binds:
+                self.rewritten += 1
+                self.binds += len(binds)
+            self._shapes[shape] = self._shapes.pop(shape, 0) + 1
+            if len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        return statement, binds or None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            shapes = len(self._shapes)
+            return {
+                "enabled": self.enabled,
+                "executions": self.executions,
+                "shapes": shapes,
+                "reuse_rate": 1 - shapes / self.executions if self.executions else 0.0,
+                "rewritten": self.rewritten,
+                "binds": self.binds,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._shapes.clear()
+            self.executions = self.rewritten = self.binds = 0
+
+
+# Process-wide, like the result cache: shapes repeat across sessions, which is what the shared pool sees
+bind_rewriter = BindRewriter(enabled=os.getenv("QUERY_BIND_LITERALS", "false").lower() == "true")
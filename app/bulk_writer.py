@@ -0,0 +1,93 @@
+import os
+import re
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import numpy as np
+import pandas as pd
+from sql_parser import quote_identifier
+
+BATCH_ROWS = int(os.getenv("BULK_BATCH_ROWS", "1000"))  # Rows bound per executemany round trip
+MAX_ERRORS = 1000  # Per-row failures kept for the report; the count is always exact
+
+_SIMPLE_NAME = re.compile(r"[A-Za-z][\w$#]*")
+_QUOTED_NAME = re.compile(r'"[^"]+"')
+_NUMERIC = ("boolean", "integer", "floating", "mixed-integer-float", "decimal")
+
+Rows = Union[pd.DataFrame, Iterable[pd.DataFrame], Iterable[Sequence]]
+
+
+def column_sql(name: str) -> str:
+    """A CSV header as an Oracle column: plain names match the usual upper-case columns,
+    anything else is quoted verbatim."""
+    name = str(name).strip()
+    return name.upper() if _SIMPLE_NAME.fullmatch(name) else quote_identifier(name)
+
+
+def insert_sql(table: str, columns: Sequence[str]) -> str:
+    """INSERT with positional binds for `columns`; the table must be a (schema-qualified) name."""
+    parts = [part.strip() for part in table.strip().split(".")]
+    if not 1 <= len(parts) <= 2 or not all(_SIMPLE_NAME.fullmatch(p) or _QUOTED_NAME.fullmatch(p) for p in parts):
+        raise ValueError(f"Invalid table name: {table!r}")
+    binds = ", ".join(f":{i + 1}" for i in range(len(columns)))
+    return f"INSERT INTO {'.'.join(parts)} ({', '.join(column_sql(c) for c in columns)}) VALUES ({binds})"
+
+
+def _inferred(series: pd.Series) -> Optional[str]:
+    """What an object column actually holds (e.g. "boolean", "integer", "string")."""
+    return pd.api.types.infer_dtype(series, skipna=True) if series.dtype == object else None
+
+
+def bind_column(series: pd.Series) -> list:
+    """Column values as plain Python objects the driver can bind, converted a column at a time."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)  # Bound as TIMESTAMP, which has no time zone
+    elif pd.api.types.is_bool_dtype(series.dtype) or _inferred(series) == "boolean":
+        series = series.astype("Int8")  # Oracle SQL has no boolean; bind 1/0
+    values = series.astype(object).tolist()
+    missing = series.isna().to_numpy()
+    if missing.any():
+        for i in np.flatnonzero(missing):
+            values[i] = None
+    return values
+
+
+def input_sizes(driver, df: pd.DataFrame) -> List:
+    """setinputsizes() arguments from column dtypes, so the driver allocates each bind array once
+    instead of guessing a type from the first row (a leading None) and rebinding when it changes.
+    Strings are sized to the longest value in the frame."""
+    sizes = []
+    for _, series in df.items():
+        dtype = series.dtype
+        inferred = _inferred(series)
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype) or inferred in _NUMERIC:
+            sizes.append(driver.DB_TYPE_NUMBER)
+        elif pd.api.types.is_datetime64_any_dtype(dtype) or inferred in ("datetime", "date"):
+            sizes.append(driver.DB_TYPE_TIMESTAMP)
+        else:
+            lengths = series.dropna().astype(str).str.len()
+            sizes.append(max(int(lengths.max()) if len(lengths) else 1, 1))
+    return sizes
+
+
+def batches(data: Rows, batch_rows: int, driver=None) -> Iterator[Tuple[List[tuple], Optional[List]]]:
+    """(rows, input sizes) per batch from a DataFrame, DataFrame chunks (e.g. read_csv with
+    chunksize) or plain row sequences. Sizes are None for plain rows: the driver infers them."""
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    pending = []
+    for item in data:
+        if isinstance(item, pd.DataFrame):
+            if pending:
+                yield pending, None
+                pending = []
+            sizes = input_sizes(driver, item) if driver is not None else None
+            columns = [bind_column(item.iloc[:, i]) for i in range(item.shape[1])]
+            rows = list(zip(*columns))
+            for start in range(0, len(rows), batch_rows):
+                yield rows[start:start + batch_rows], sizes
+        else:
+            pending.append(tuple(item))
+            if len(pending) == batch_rows:
+                yield pending, None
+                pending = []
+    if pending:
+        yield pending, None
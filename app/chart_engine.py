@@ -0,0 +1,286 @@
+import logging
+import os
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pivot_grid import OTHER, cached_pivot_grid
+from sql_parser import duplicate_columns, quote_identifier
+
+POINT_BUDGET = int(os.getenv("CHART_POINT_BUDGET", "5000"))  # Most marks, bars or cells one chart may send
+PUSHDOWN_ROWS = int(os.getenv("CHART_PUSHDOWN_ROWS", "50000"))  # Aggregate in Oracle from this many rows
+HISTOGRAM_MAX_BINS = 200
+px = go = None  # plotly.express and plotly.graph_objects, imported when the first chart is built
+
+SQL_AGGREGATES = {"mean": "AVG", "sum": "SUM", "count": "COUNT", "min": "MIN", "max": "MAX"}
+
+
+def lttb(x: np.ndarray, y: np.ndarray, n: int) -> np.ndarray:
+    """Positions of the points Largest-Triangle-Three-Buckets keeps when reducing (x, y) to n points.
+
+    The first and last points are always kept; from each bucket in between it keeps the point
+    forming the largest triangle with the previously kept point and the next bucket's average.
+    """
+    size = len(y)
+    if n >= size or n < 3:
+        return np.arange(size)
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)  # n - 2 buckets over the interior
+    kept = np.empty(n, dtype=np.int64)
+    kept[0], kept[-1] = 0, size - 1
+    previous = 0
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        following = slice(end, edges[i + 2] if i + 3 < n else size)
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        px_, py_ = x[previous], y[previous]
+        area = np.abs((px_ - avg_x) * (y[start:end] - py_) - (px_ - x[start:end]) * (avg_y - py_))
+        previous = start + int(np.argmax(area))
+        kept[i + 1] = previous
+    return kept
+
+
+def _load_plotly():
+    global px, go
+    if px is None:
+        import plotly.express
+        import plotly.graph_objects
+        px, go = plotly.express, plotly.graph_objects
+
+
+def _numeric(series: pd.Series) -> Optional[np.ndarray]:
+    """Float values of a numeric or datetime column (datetimes as nanoseconds), else None."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        values = series.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(float)
+        values[series.isna().to_numpy()] = np.nan
+        return values
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    return None
+
+
+def _summable(series: pd.Series) -> bool:
+    """Whether SUM/AVG of the column means anything; text and dates are counted instead."""
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _from_numeric(values: np.ndarray, like: pd.Series):
+    if pd.api.types.is_datetime64_any_dtype(like):
+        return pd.to_datetime(values.astype(np.int64))
+    return values
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """Everything that determines a chart; hashable, so it can key the figure cache.
+
+    `y` holds the Y-axis columns (the row column for heatmaps), `value` the pie values or
+    heatmap colour column, and `agg` how heatmap cells combine their values.
+    """
+    chart_type: str
+    x: str
+    y: Tuple[str, ...] = ()
+    value: Optional[str] = None
+    agg: str = "mean"
+    color: str = "#1f77b4"
+    height: int = 500
+    title: str = ""
+
+
+class ChartEngine:
+    """Builds Plotly figures that stay under a fixed point budget however large the result is.
+
+    Results with more rows than the budget are reduced before plotting: bar, pie and heatmap
+    charts are aggregated (by Oracle once a result reaches CHART_PUSHDOWN_ROWS or was truncated,
+    so they cover the whole result), line charts are downsampled with LTTB, scatter plots become
+    2D density grids, and histogram and box statistics are computed in NumPy/pandas.
+    """
+
+    def __init__(self, oracle_manager=None, budget: int = POINT_BUDGET, pushdown_rows: int = PUSHDOWN_ROWS):
+        self.oracle = oracle_manager
+        self.budget = budget
+        self.pushdown_rows = pushdown_rows
+
+    def build(self, spec: ChartSpec, df: pd.DataFrame, sql: Optional[str]):
+        """The figure for `spec` and a note on how the data was reduced (None when it was plotted as is)."""
+        _load_plotly()
+        fig, note = self._build(spec, df, sql)
+        if fig is not None:
+            fig.update_layout(title=spec.title, height=spec.height)
+        return fig, note
+
+    def _build(self, spec, df, sql):
+        x, y, value, color = spec.x, [col for col in spec.y if col], spec.value, spec.color
+        if spec.chart_type == "Bar Chart":
+            return self._bar(df, sql, x, y, color)
+        if spec.chart_type == "Line Chart":
+            return self._line(df, x, y, color)
+        if spec.chart_type == "Scatter Plot":
+            return self._scatter(df, x, y[0] if y else None, color)
+        if spec.chart_type == "Pie Chart":
+            return self._pie(df, sql, x, value, color)
+        if spec.chart_type == "Histogram":
+            return self._histogram(df, x, color)
+        if spec.chart_type == "Box Plot":
+            return self._box(df, x, y[0] if y else None, color)
+        if spec.chart_type == "Heatmap" and y and value:
+            return self._heatmap(df, sql, x, y[0], value, spec.agg)
+        return None, None
+
+    def _pushdown(self, df: pd.DataFrame, sql: Optional[str]) -> bool:
+        # Aggregation wraps the query, which fails (ORA-00918) when it returns duplicate column names
+        return bool(self.oracle is not None and sql and not duplicate_columns(df.columns)
+                    and (df.attrs.get("truncated") or len(df) >= self.pushdown_rows))
+
+    def _aggregate(self, df: pd.DataFrame, sql: Optional[str], keys: List[str],
+                   aggregates: List[Tuple[str, str]], order: str) -> Tuple[pd.DataFrame, str]:
+        """GROUP BY `keys` with (function, column) aggregates, keeping the `budget` largest groups by `order`.
+
+        Aggregates are named after their column ("COUNT" for COUNT(*)); the query is pushed
+        down to Oracle when worthwhile and computed with pandas otherwise.
+        """
+        if self._pushdown(df, sql):
+            try:
+                return self._aggregate_sql(sql, keys, aggregates, order), "in the database"
+            except Exception as e:
+                logging.warning(f"Chart aggregation in the database failed, using fetched rows: {str(e)}")
+        grouped = df.groupby(keys if len(keys) > 1 else keys[0], observed=True, dropna=False, sort=False)
+        parts = {}
+        for func, column in aggregates:
+            if column is None:
+                parts["COUNT"] = grouped.size()
+            else:
+                parts[column] = grouped[column].agg({"SUM": "sum", "AVG": "mean"}[func])
+        # sort_values rather than nlargest, which refuses columns that aren't numeric
+        result = pd.DataFrame(parts).sort_values(order, ascending=False, na_position="last", kind="stable")
+        result = result.head(self.budget).sort_index()
+        return result.reset_index(), "from the fetched rows"
+
+    def _aggregate_sql(self, sql, keys, aggregates, order) -> pd.DataFrame:
+        key_list = ", ".join(f"q.{quote_identifier(key)}" for key in keys)
+        selects, order_by = [], None
+        for func, column in aggregates:
+            expr = "COUNT(*)" if column is None else f"{func}(q.{quote_identifier(column)})"
+            selects.append(f"{expr} {quote_identifier(column or 'COUNT')}")
+            if (column or "COUNT") == order:
+                order_by = expr
+        query = (f"SELECT * FROM (SELECT {key_list}, {', '.join(selects)} FROM (\n{sql.strip().rstrip(';')}\n) q"
+                 f" GROUP BY {key_list} ORDER BY {order_by} DESC NULLS LAST FETCH FIRST :chart_limit ROWS ONLY)"
+                 f" ORDER BY {', '.join(str(i + 1) for i in range(len(keys)))}")
+        return self.oracle.execute_query(query, params={"chart_limit": self.budget})
+
+    def _bar(self, df, sql, x, y, color):
+        if len(df) <= self.budget:
+            fig = px.bar(df, x=x, y=y or None, color_discrete_sequence=[color])
+            return fig, None
+        aggregates = [("SUM", col) for col in y if col != x and _summable(df[col])] or [("COUNT", None)]
+        data, where = self._aggregate(df, sql, [x], aggregates, aggregates[0][1] or "COUNT")
+        fig = px.bar(data, x=x, y=[col or "COUNT" for _, col in aggregates], color_discrete_sequence=[color])
+        return fig, f"{len(data):,} largest groups, aggregated {where}"
+
+    def _pie(self, df, sql, x, value, color):
+        if len(df) <= self.budget:
+            return px.pie(df, names=x, values=value, color_discrete_sequence=[color]), None
+        aggregate = ("SUM", value) if value and value != x and _summable(df[value]) else ("COUNT", None)
+        data, where = self._aggregate(df, sql, [x], [aggregate], aggregate[1] or "COUNT")
+        fig = px.pie(data, names=x, values=aggregate[1] or "COUNT", color_discrete_sequence=[color])
+        return fig, f"{len(data):,} largest slices, aggregated {where}"
+
+    def _heatmap(self, df, sql, x, y, value, agg):
+        if df.attrs.get("truncated") and self._pushdown(df, sql):
+            # The fetched rows are only part of the result, so let Oracle aggregate all of it
+            try:
+                data = self._aggregate_sql(sql, [y, x], [(SQL_AGGREGATES[agg], value), ("COUNT", None)], "COUNT")
+                grid = data.pivot(index=y, columns=x, values=value)
+                fig = px.imshow(grid, color_continuous_scale="Blues")
+                return fig, f"{len(data):,} most populated cells, aggregated in the database"
+            except Exception as e:
+                logging.warning(f"Heatmap aggregation in the database failed, using fetched rows: {str(e)}")
+        top_k = max(1, int(np.sqrt(self.budget)) - 1)  # Room for the Other bucket on both axes
+        grid = cached_pivot_grid(df, sql, x, y, value, agg, top_k)
+        fig = px.imshow(grid, color_continuous_scale="Blues")
+        if OTHER in grid.index[-1:] or OTHER in grid.columns[-1:]:
+            return fig, f"top {top_k} categories per axis, the rest grouped as {OTHER}"
+        return fig, None
+
+    def _line(self, df, x, y, color):
+        if len(df) <= self.budget:
+            return px.line(df, x=x, y=y or None, color_discrete_sequence=[color]), None
+        xs = _numeric(df[x]) if y else None  # Without Y columns, X is plotted against the row number
+        if xs is None or np.isnan(xs).any():
+            xs = np.arange(len(df), dtype=float)  # Categories: the row order is the axis
+        keep = [np.array([0, len(df) - 1])]
+        per_series = max(3, self.budget // max(1, len(y)))
+        for col in y or [x]:
+            ys = _numeric(df[col])
+            if ys is None:
+                continue
+            valid = np.flatnonzero(~np.isnan(ys))
+            keep.append(valid[lttb(xs[valid], ys[valid], per_series)])
+        data = df.iloc[np.unique(np.concatenate(keep))]
+        fig = px.line(data, x=x, y=y or None, color_discrete_sequence=[color])
+        return fig, f"{len(data):,} of {len(df):,} points kept by LTTB downsampling"
+
+    def _scatter(self, df, x, y, color):
+        if len(df) <= self.budget:
+            return px.scatter(df, x=x, y=y, color_discrete_sequence=[color]), None
+        xs = _numeric(df[x])
+        ys = _numeric(df[y]) if y else np.arange(len(df), dtype=float)
+        if xs is None or ys is None:
+            # Categorical axes have no density to bin, so plot a reproducible sample instead
+            sample = np.sort(np.random.default_rng(0).choice(len(df), self.budget, replace=False))
+            fig = px.scatter(df.iloc[sample], x=x, y=y, color_discrete_sequence=[color])
+            return fig, f"random sample of {self.budget:,} of {len(df):,} points"
+        valid = ~(np.isnan(xs) | np.isnan(ys))
+        bins = max(2, int(np.sqrt(self.budget)))
+        counts, x_edges, y_edges = np.histogram2d(xs[valid], ys[valid], bins=bins)
+        counts[counts == 0] = np.nan  # Empty cells stay transparent
+        fig = go.Figure(go.Heatmap(
+            x=_from_numeric((x_edges[:-1] + x_edges[1:]) / 2, df[x]),
+            y=_from_numeric((y_edges[:-1] + y_edges[1:]) / 2, df[y]) if y else (y_edges[:-1] + y_edges[1:]) / 2,
+            z=counts.T, colorscale=[[0, "#f0f0f0"], [1, color]], colorbar={"title": "points"},
+        ))
+        fig.update_layout(xaxis_title=x, yaxis_title=y or "row")
+        return fig, f"{int(valid.sum()):,} points binned into a {bins}×{bins} density grid"
+
+    def _histogram(self, df, x, color):
+        if len(df) <= self.budget:
+            return px.histogram(df, x=x, color_discrete_sequence=[color]), None
+        values = _numeric(df[x])
+        if values is None:
+            counts = df[x].value_counts(dropna=False).head(self.budget)
+            fig = px.bar(x=counts.index.astype(str), y=counts.to_numpy(), color_discrete_sequence=[color],
+                         labels={"x": x, "y": "count"})
+            return fig, f"counts of the {len(counts):,} most frequent values"
+        values = values[~np.isnan(values)]
+        edges = np.histogram_bin_edges(values, bins="auto")
+        if len(edges) - 1 > HISTOGRAM_MAX_BINS:
+            edges = np.histogram_bin_edges(values, bins=HISTOGRAM_MAX_BINS)
+        counts, edges = np.histogram(values, bins=edges)
+        centers = _from_numeric((edges[:-1] + edges[1:]) / 2, df[x])
+        widths = np.diff(edges) / 1e6 if pd.api.types.is_datetime64_any_dtype(df[x]) else np.diff(edges)  # ms axis
+        fig = go.Figure(go.Bar(x=centers, y=counts, width=widths, marker_color=color))
+        fig.update_layout(xaxis_title=x, yaxis_title="count", bargap=0)
+        return fig, f"{len(values):,} values counted into {len(counts)} bins"
+
+    def _box(self, df, x, y, color):
+        if len(df) <= self.budget:
+            return px.box(df, x=x, y=y, color_discrete_sequence=[color]), None
+        # Five-number summaries instead of raw points; whiskers stop at 1.5 IQR or the data range
+        if y:
+            grouped = df.groupby(x, observed=True, sort=True)[y]
+            top = df[x].value_counts().head(self.budget).index
+            stats = grouped.quantile([0, 0.25, 0.5, 0.75, 1]).unstack().loc[lambda s: s.index.isin(top)]
+            names = stats.index.astype(str)
+        else:
+            stats = df[x].quantile([0, 0.25, 0.5, 0.75, 1]).to_frame().T
+            names = [x]
+        low, q1, median, q3, high = (stats[q].to_numpy() for q in (0, 0.25, 0.5, 0.75, 1))
+        iqr = q3 - q1
+        fig = go.Figure(go.Box(
+            x=names if y else None, y=None if y else names, orientation="v" if y else "h",
+            name=y or x, q1=q1, median=median, q3=q3,
+            lowerfence=np.maximum(low, q1 - 1.5 * iqr), upperfence=np.minimum(high, q3 + 1.5 * iqr),
+            marker_color=color,
+        ))
+        fig.update_layout(xaxis_title=x, yaxis_title=y or x)
+        return fig, f"box statistics of {len(df):,} rows computed before plotting"
@@ -1,9 +1,9 @@
 import streamlit as st
+from prompt_context import build_data_context, token_budget
 
 class ChatAnalyzer:
     def __init__(self, state_manager):
         self.state = state_manager
-        self.row_limit = 200  # Define row limit for LLM context
 
     def show_chat_section(self):
         """Displays the chat section for interacting with the AI."""
@@ -53,10 +53,7 @@ class ChatAnalyzer:
 
     def create_chat_prompt(self, sql, df, user_question):
         """Creates the prompt for the AI chat based on the executed SQL and its results."""
-        limited_df = df.head(self.row_limit) if len(df) > self.row_limit else df
-        if len(df) > self.row_limit:
-            st.warning(f"Data context size is high ({len(df)} rows). Chat response is based on the first {self.row_limit} rows only.")
-        
+        data_context = build_data_context(df, token_budget(self.state.get_state("groq").model))
         return f"""
         **Task**: Answer the user's question using the SQL query results below. Follow these steps:
         1. Directly answer the question in natural language.
@@ -66,8 +63,8 @@ class ChatAnalyzer:
         **Executed SQL**:
         {sql}
 
-        **Query Results (limited to {self.row_limit} rows if larger)**:
-        {limited_df.to_string()}
+        **Query Results (profile of all rows, with sample rows)**:
+        {data_context}
 
         **Question**:
         {user_question}
@@ -0,0 +1,193 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# ORA- codes that mean the session is dead and must be dropped, not released
+DEAD_CONNECTION_CODES = {28, 1012, 3113, 3114, 3135, 12537, 12570, 12571}
+
+# Client-side cursor cache per session: re-executing a cached statement skips the parse call
+STMT_CACHE_SIZE = int(os.getenv("ORACLE_STMT_CACHE_SIZE", "100"))
+
+# Passwords are never kept in memory; pools remember a salted digest instead
+_DIGEST_SALT = os.urandom(16)
+
+
+def _password_digest(password: str) -> bytes:
+    return hmac.new(_DIGEST_SALT, password.encode("utf-8"), hashlib.sha256).digest()
+
+
+def is_dead_connection(error: Exception) -> bool:
+    """Check whether a driver DatabaseError means the session was lost."""
+    code = getattr(error.args[0], "code", None) if error.args else None
+    return code in DEAD_CONNECTION_CODES
+
+
+def pool_options_from_env() -> Dict:
+    """Read pool sizing from the environment, falling back to small defaults."""
+    return {
+        "min_size": int(os.getenv("ORACLE_POOL_MIN", "1")),
+        "max_size": int(os.getenv("ORACLE_POOL_MAX", "10")),
+        "increment": int(os.getenv("ORACLE_POOL_INCREMENT", "1")),
+        "ping_interval": int(os.getenv("ORACLE_POOL_PING_INTERVAL", "60")),
+        "wait_timeout": int(os.getenv("ORACLE_POOL_WAIT_TIMEOUT_MS", "5000")),
+    }
+
+
+class ConnectionPool:
+    """Session pool shared by every Streamlit session for one host/port/service/user."""
+
+    def __init__(self, driver, key: Tuple, password: str, min_size: int = 1, max_size: int = 10,
+                 increment: int = 1, ping_interval: int = 60, wait_timeout: int = 5000):
+        host, port, service_name, username = key
+        self.driver = driver
+        self.key = key
+        self._password_digest = _password_digest(password)
+        self.pool = driver.SessionPool(
+            user=username,
+            password=password,
+            dsn=driver.makedsn(host, port, service_name=service_name),
+            min=min_size,
+            max=max_size,
+            increment=increment,
+            threaded=True,
+            getmode=driver.SPOOL_ATTRVAL_TIMEDWAIT,
+            wait_timeout=wait_timeout
+        )
+        # Idle sessions older than this are pinged by the driver before being handed out
+        self.pool.ping_interval = ping_interval
+        self.pool.stmtcachesize = STMT_CACHE_SIZE
+        self._lock = threading.Lock()
+        self.acquires = 0
+        self.dropped = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def matches_password(self, password: str) -> bool:
+        return hmac.compare_digest(self._password_digest, _password_digest(password))
+
+    def acquire(self):
+        start = time.perf_counter()
+        conn = self.pool.acquire()
+        waited = time.perf_counter() - start
+        with self._lock:
+            self.acquires += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return conn
+
+    def release(self, conn, dead: bool = False):
+        if dead:
+            self.pool.drop(conn)
+            with self._lock:
+                self.dropped += 1
+        else:
+            self.pool.release(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a session for the duration of the block."""
+        conn = self.acquire()
+        dead = False
+        try:
+            yield conn
+        except self.driver.DatabaseError as e:
+            dead = is_dead_connection(e)
+            raise
+        finally:
+            self.release(conn, dead)
+
+    def ping(self) -> bool:
+        """Round-trip a borrowed session; dead sessions are dropped from the pool."""
+        try:
+            with self.connection() as conn:
+                conn.ping()
+            return True
+        except self.driver.DatabaseError:
+            return False
+
+    def stats(self) -> Dict:
+        host, port, service_name, username = self.key
+        with self._lock:
+            acquires = self.acquires
+            avg_wait = self.total_wait / acquires if acquires else 0.0
+            max_wait = self.max_wait
+            dropped = self.dropped
+        return {
+            "pool": f"{username}@{host}:{port}/{service_name}",
+            "open": self.pool.opened,
+            "busy": self.pool.busy,
+            "min": self.pool.min,
+            "max": self.pool.max,
+            "increment": self.pool.increment,
+            "acquires": acquires,
+            "dropped": dropped,
+            "avg_wait_ms": round(avg_wait * 1000, 3),
+            "max_wait_ms": round(max_wait * 1000, 3),
+        }
+
+    def close(self):
+        self.pool.close(force=True)
+
+
+class PoolRegistry:
+    """Process-wide registry of session pools keyed by host/port/service/user."""
+
+    def __init__(self):
+        self._pools: Dict[Tuple, ConnectionPool] = {}
+        self._building: Dict[Tuple, threading.Event] = {}  # Keys whose pool is being created
+        self._lock = threading.Lock()
+
+    def get_pool(self, driver, host: str, port: int, service_name: str, username: str,
+                 password: str, **options) -> ConnectionPool:
+        key = (host, int(port), service_name, username.upper())
+        while True:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is not None and pool.matches_password(password):
+                    return pool
+                building = self._building.get(key)
+                if building is None:
+                    building = self._building[key] = threading.Event()
+                    break
+            # Another session is creating this key's pool; look again once it is done
+            building.wait()
+        try:
+            # New key or a different password: build a pool and prove the credentials with a
+            # real round trip before anyone else can borrow from it. This happens outside the
+            # registry lock, so a slow handshake only holds up sessions for the same key.
+            pool = ConnectionPool(driver, key, password, **options)
+            try:
+                with pool.connection() as conn:
+                    conn.ping()
+            except driver.DatabaseError:
+                pool.close()
+                raise
+            with self._lock:
+                replaced = self._pools.get(key)
+                self._pools[key] = pool
+        finally:
+            with self._lock:
+                del self._building[key]
+            building.set()
+        if replaced is not None:
+            replaced.close()  # Its sessions were opened with the old password
+        return pool
+
+    def stats(self) -> List[Dict]:
+        with self._lock:
+            pools = list(self._pools.values())
+        return [pool.stats() for pool in pools]
+
+    def close_all(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        for pool in pools:
+            pool.close()
+
+
+pool_registry = PoolRegistry()
@@ -1,10 +1,19 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+import resources
+from chart_engine import ChartEngine, ChartSpec
+from figure_cache import FigureCache
+from pivot_grid import AGGREGATES
+from result_pager import render_result_grid
+from result_stream import fetch_limits_from_env
+from tracing import tracer
 
 class DataVisualizer:
     def __init__(self, oracle_manager):
         self.oracle_manager = oracle_manager
+        self.fetch_limits = fetch_limits_from_env()
+        self.chart_engine = ChartEngine(oracle_manager)
+        self.figure_cache = FigureCache()
 
     def display_visualization_interface(self):
         """Displays the data visualization interface in the Streamlit app."""
@@ -24,16 +33,19 @@ class DataVisualizer:
         
         if execute_button and viz_sql:
             try:
-                from security import SecurityManager
-                security = SecurityManager()
-                
-                if security.sanitize_input(viz_sql):
+                if resources.security_manager().sanitize_input(viz_sql):
                     with st.spinner("Executing query..."):
-                        df = self.oracle_manager.execute_query(viz_sql)
+                        df = self.oracle_manager.execute_query(viz_sql, **self.fetch_limits)
                         if not df.empty:
+                            # Figures drawn from the previous result are of no further use
+                            self.figure_cache.invalidate(st.session_state.get("query_df_viz"))
+                            st.session_state.viz_chart_spec = None
                             st.session_state.query_df_viz = df
                             st.session_state.viz_sql = viz_sql
                             st.success("Query executed successfully")
+                            if df.attrs.get("truncated"):
+                                st.warning(f"Result was truncated to {len(df):,} rows; bar, pie and heatmap charts are "
+                                           "aggregated over the full result, other charts use the fetched rows.")
                         else:
                             st.warning("Query returned no data to visualize")
                 else:
@@ -44,7 +56,7 @@ class DataVisualizer:
         # Display the query results in the visualization tab
         if "query_df_viz" in st.session_state and st.session_state.query_df_viz is not None:
             st.subheader("Query Results")
-            st.dataframe(st.session_state.query_df_viz)
+            render_result_grid(self.oracle_manager, st.session_state.viz_sql, st.session_state.query_df_viz, "viz_results")
             
             st.subheader("Create Visualization")
             
@@ -70,6 +82,7 @@ class DataVisualizer:
                 elif chart_type == "Heatmap":
                     y_axis = st.selectbox("Y-Axis", columns, index=min(1, len(columns) - 1))
                     color_col = st.selectbox("Value (Color)", columns, index=min(2, len(columns) - 1))
+                    heatmap_agg = st.selectbox("Aggregation", AGGREGATES)
                 # For other charts, we can have multiple y-values
                 else:
                     y_axis_options = st.multiselect("Y-Axis", columns, default=[columns[min(1, len(columns) - 1)]])
@@ -81,65 +94,47 @@ class DataVisualizer:
                 height = st.slider("Chart Height", 300, 1000, 500)
             
             # Create and display the chart
+            if chart_type == "Heatmap":
+                y_columns, value = (y_axis,), color_col
+            elif chart_type == "Pie Chart":
+                y_columns, value = (), value_col
+            else:
+                y_columns, value = tuple(y_axis_options), None
+            spec = ChartSpec(chart_type, x_axis, y_columns, value,
+                             heatmap_agg if chart_type == "Heatmap" else "mean", color_discrete, height, title)
             if st.button("Generate Chart"):
-                with st.spinner("Creating visualization..."):
-                    try:
-                        fig = self.create_chart(chart_type, df, x_axis, locals())
-                        if fig:
-                            fig.update_layout(title=title, height=height)
-                            st.plotly_chart(fig, use_container_width=True)
-                            
-                            # Option to download the chart
-                            st.download_button(
-                                "Download Chart",
-                                fig.to_json(),
-                                file_name=f"{title.replace(' ', '_')}.json",
-                                mime="application/json"
-                            )
-                    except Exception as e:
-                        st.error(f"Error creating chart: {str(e)}")
+                st.session_state.viz_chart_spec = spec
 
-    def create_chart(self, chart_type, df, x_axis, options):
-        """Creates a Plotly chart based on the selected chart type and options."""
-        if chart_type == "Bar Chart":
-            y_axis_options = options.get('y_axis_options', [])
-            if len(y_axis_options) > 0:
-                return px.bar(df, x=x_axis, y=y_axis_options, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-            return px.bar(df, x=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Line Chart":
-            y_axis_options = options.get('y_axis_options', [])
-            if len(y_axis_options) > 0:
-                return px.line(df, x=x_axis, y=y_axis_options, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-            return px.line(df, x=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Scatter Plot":
-            y_axis_options = options.get('y_axis_options', [])
-            if len(y_axis_options) > 0:
-                return px.scatter(df, x=x_axis, y=y_axis_options[0], color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-            return px.scatter(df, x=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Pie Chart":
-            value_col = options.get('value_col')
-            if value_col:
-                return px.pie(df, names=x_axis, values=value_col, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-            return px.pie(df, names=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Histogram":
-            return px.histogram(df, x=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Box Plot":
-            y_axis_options = options.get('y_axis_options', [])
-            if len(y_axis_options) > 0:
-                return px.box(df, x=x_axis, y=y_axis_options[0], color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-            return px.box(df, x=x_axis, color_discrete_sequence=[options.get('color_discrete', '#1f77b4')])
-        
-        elif chart_type == "Heatmap":
-            y_axis = options.get('y_axis')
-            color_col = options.get('color_col')
-            if y_axis and color_col:
-                pivot_table = df.pivot_table(values=color_col, index=y_axis, columns=x_axis, aggfunc='mean')
-                return px.imshow(pivot_table, color_continuous_scale='Blues')
-        
-        # Default return if no chart type matches
-        return None
\ No newline at end of file
+            # The last generated chart stays up across reruns; unchanged ones come from the figure cache
+            spec = st.session_state.get("viz_chart_spec")
+            if spec is not None:
+                try:
+                    with st.spinner("Creating visualization..."):
+                        chart = self.create_chart(spec, df, st.session_state.viz_sql)
+                    if chart["figure"]:
+                        st.plotly_chart(chart["figure"], use_container_width=True)
+                        if chart["note"]:
+                            st.caption(f"Large result: {chart['note']}")
+
+                        # Option to download the chart
+                        st.download_button(
+                            "Download Chart",
+                            chart["json"],
+                            file_name=f"{spec.title.replace(' ', '_')}.json",
+                            mime="application/json"
+                        )
+                except Exception as e:
+                    st.error(f"Error creating chart: {str(e)}")
+
+    def create_chart(self, spec, df, sql=None):
+        """Returns the cached chart for this result and spec, building it on a miss.
+
+        The entry holds the figure, its JSON and a note on how a large result was reduced.
+        """
+        with tracer.span("create_chart", chart_type=spec.chart_type, rows=len(df)) as span:
+            chart = self.figure_cache.get(df, spec)
+            span.set(cached=chart is not None)
+            if chart is None:
+                figure, note = self.chart_engine.build(spec, df, sql)
+                chart = self.figure_cache.put(df, spec, figure, note)
+        return chart
@@ -0,0 +1,183 @@
+import io
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from result_stream import DEFAULT_CHUNK_ROWS
+from tracing import tracer
+
+EXCEL_MAX_ROWS = 1048575  # Sheet row limit minus the header row
+SPOOL_BYTES = int(os.getenv("EXPORT_SPOOL_BYTES", str(32 * 1024 * 1024)))  # Larger exports spill to disk
+
+# Format -> (file extension, MIME type)
+FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+_parquet_ok: Optional[bool] = None
+
+
+def parquet_available() -> bool:
+    global _parquet_ok
+    if _parquet_ok is None:
+        try:
+            import pyarrow.parquet  # noqa: F401
+            _parquet_ok = True
+        except Exception as e:  # Missing, or built against an incompatible NumPy
+            logging.info(f"Parquet export unavailable: {str(e)}")
+            _parquet_ok = False
+    return _parquet_ok
+
+
+def available_formats() -> List[str]:
+    return [name for name in FORMATS if name != "Parquet" or parquet_available()]
+
+
+def frame_chunks(df: pd.DataFrame, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterable[pd.DataFrame]:
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def write_export(chunks: Iterable[pd.DataFrame], columns: List[str], fmt: str, out,
+                 kinds: Optional[List[str]] = None) -> int:
+    """Write DataFrame chunks to the binary file `out` one at a time; returns rows written.
+
+    `kinds` is the materializer's plan for the columns (ResultStream.kinds); Parquet uses it to
+    fix column types that a single chunk can't tell.
+    """
+    if fmt == "CSV":
+        return _write_csv(chunks, columns, out)
+    if fmt == "Excel":
+        return _write_xlsx(chunks, columns, out)
+    if fmt == "Parquet":
+        return _write_parquet(chunks, out, kinds)
+    raise ValueError(f"Unsupported export format: {fmt}")
+
+
+def _write_csv(chunks, columns, out) -> int:
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    text.write(pd.DataFrame(columns=columns).to_csv(index=False))
+    rows = 0
+    for chunk in chunks:
+        chunk.to_csv(text, header=False, index=False)
+        rows += len(chunk)
+    text.flush()
+    text.detach()  # Leave `out` open for the caller
+    return rows
+
+
+def _write_xlsx(chunks, columns, out) -> int:
+    from openpyxl import Workbook
+    # Write-only mode streams rows to a temporary sheet file instead of building a cell tree
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(list(columns))
+    rows = 0
+    for chunk in chunks:
+        for row in zip(*(_excel_column(chunk.iloc[:, i]) for i in range(chunk.shape[1]))):
+            sheet.append(row)
+        rows += len(chunk)
+    workbook.save(out)
+    return rows
+
+
+def _excel_column(series: pd.Series) -> list:
+    """Column values as plain Python objects openpyxl understands, converted a column at a time."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype):
+        series = series.dt.tz_localize(None)  # Excel has no time zones
+    values = series.astype(object).tolist()
+    missing = series.isna().to_numpy()
+    if missing.any():
+        for i in np.flatnonzero(missing):
+            values[i] = None
+    return values
+
+
+def _arrow_schema(chunk: pd.DataFrame, kinds: Optional[List[str]]):
+    """The file's schema, fixed before the first row group is written.
+
+    Chunks are materialized independently, so one chunk alone can't be trusted: an unconstrained
+    NUMBER is int64 in a chunk of whole numbers and float64 in the next, and a text column that is
+    all NULL in the first chunk infers Arrow's null type. Columns with a known kind get that kind's
+    type; the rest keep the type inferred from the chunk, with null widened to string.
+    """
+    import pyarrow as pa
+    types = {
+        "int32": pa.int32(),
+        "int64": pa.int64(),
+        "float": pa.float64(),
+        "number": pa.float64(),  # May hold whole and fractional values in different chunks
+        "datetime": pa.timestamp("us"),  # Oracle dates carry at most microseconds
+        "string": pa.string(),
+        "lob": pa.string(),
+    }
+    fields = []
+    for position, field in enumerate(pa.Schema.from_pandas(chunk, preserve_index=False)):
+        arrow_type = types.get(kinds[position]) if kinds else None
+        if arrow_type is None:
+            arrow_type = pa.string() if pa.types.is_null(field.type) else field.type
+        fields.append(pa.field(field.name, arrow_type))
+    return pa.schema(fields)
+
+
+def _write_parquet(chunks, out, kinds: Optional[List[str]] = None) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            # Each chunk becomes one row group, converted to the schema fixed from the first
+            if writer is None:
+                writer = pq.ParquetWriter(out, _arrow_schema(chunk, kinds))
+            table = pa.Table.from_pandas(chunk, schema=writer.schema, preserve_index=False)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+class ExportEngine:
+    """Builds downloadable exports on request, keeping each file only until it is handed to the page.
+
+    Complete in-memory results are written from the DataFrame; truncated ones are streamed from
+    the cursor chunk by chunk, so the full result never has to fit in memory. Files are spooled
+    in memory up to EXPORT_SPOOL_BYTES and on disk beyond that.
+    """
+
+    def __init__(self):
+        self._exports: Dict[tuple, tuple] = {}
+
+    def build(self, oracle_manager, sql: str, df: pd.DataFrame, fmt: str):
+        key = (sql, id(df), fmt)
+        # Exports of an older result are stale once a new one is shown
+        for stale in [k for k in self._exports if k[:2] != key[:2]]:
+            self._exports.pop(stale)[0].close()
+        out = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        max_rows = EXCEL_MAX_ROWS if fmt == "Excel" else None
+        try:
+            with tracer.span("export", format=fmt, streamed=bool(df.attrs.get("truncated"))) as span:
+                if df.attrs.get("truncated"):
+                    with oracle_manager.stream_query(sql, max_rows=max_rows) as stream:
+                        rows = write_export(stream, stream.columns, fmt, out, stream.kinds)
+                else:
+                    rows = write_export(frame_chunks(df.iloc[:max_rows]), list(df.columns), fmt, out)
+                span.set(rows=rows, bytes=out.tell())
+        except Exception:
+            out.close()
+            raise
+        out.seek(0)
+        self._exports[key] = (out, rows)
+        return out, rows
+
+    def clear(self):
+        for out, _ in self._exports.values():
+            out.close()
+        self._exports = {}
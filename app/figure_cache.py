@@ -0,0 +1,64 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import pandas as pd
+
+CACHE_BYTES = int(os.getenv("CHART_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+class FigureCache:
+    """LRU of built figures keyed by (result, ChartSpec), bounded by their serialized size.
+
+    Entries belong to the DataFrame they were drawn from: they are found only while that exact
+    object is alive, and `invalidate(df)` drops them when a new result replaces it. Each entry
+    keeps the figure together with its JSON, so an unchanged rerun neither rebuilds nor
+    re-serializes anything.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, df: pd.DataFrame, spec) -> Optional[Dict]:
+        """The cached {"figure", "json", "note"} for this result and spec, or None."""
+        with self._lock:
+            entry = self._entries.get((id(df), spec))
+            if entry is None or entry["result"]() is not df:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((id(df), spec))
+            self.hits += 1
+            return entry
+
+    def put(self, df: pd.DataFrame, spec, figure, note: Optional[str] = None) -> Dict:
+        payload = figure.to_json() if figure is not None else ""
+        entry = {"figure": figure, "json": payload, "note": note, "result": weakref.ref(df), "bytes": len(payload)}
+        if entry["bytes"] > self.max_bytes:
+            return entry  # Too large to keep, but still usable this once
+        key = (id(df), spec)
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= self._entries.pop(key)["bytes"]
+            self._entries[key] = entry
+            self.total_bytes += entry["bytes"]
+            while self.total_bytes > self.max_bytes:
+                _, oldest = self._entries.popitem(last=False)
+                self.total_bytes -= oldest["bytes"]
+        return entry
+
+    def invalidate(self, df: Optional[pd.DataFrame] = None):
+        """Drop the figures of one result (and of any result already garbage-collected), or all of them."""
+        with self._lock:
+            for key in list(self._entries):
+                result = self._entries[key]["result"]()
+                if df is None or result is None or result is df:
+                    self.total_bytes -= self._entries.pop(key)["bytes"]
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._entries), "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses}
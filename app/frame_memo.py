@@ -0,0 +1,53 @@
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Hashable, Optional
+import pandas as pd
+
+
+class FrameMemo:
+    """Values derived from a DataFrame, kept only while that exact object is alive.
+
+    Entries are keyed by id(df) with a weak reference to tell the frame apart from a later one
+    that reuses its id. Streamlit runs every session on its own thread, so access is locked; and
+    since a frame can be asked for many variants (one per filter, grid or budget), both the
+    number of frames and the values per frame are bounded, least recently used going first.
+    """
+
+    def __init__(self, max_frames: int = 16, max_values: int = 16):
+        self.max_frames = max_frames
+        self.max_values = max_values
+        self._frames: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, df: pd.DataFrame, key: Hashable) -> Optional[object]:
+        with self._lock:
+            entry = self._frames.get(id(df))
+            if entry is None or entry[0]() is not df or key not in entry[1]:
+                return None
+            self._frames.move_to_end(id(df))
+            entry[1].move_to_end(key)
+            return entry[1][key]
+
+    def put(self, df: pd.DataFrame, key: Hashable, value) -> None:
+        with self._lock:
+            entry = self._frames.get(id(df))
+            if entry is None or entry[0]() is not df:
+                try:
+                    entry = (weakref.ref(df), OrderedDict())
+                except TypeError:
+                    return  # Not weak-referenceable, so there'd be no telling when it is gone
+                for stale in [k for k, (ref, _) in self._frames.items() if ref() is None]:
+                    del self._frames[stale]
+                self._frames[id(df)] = entry
+                while len(self._frames) > self.max_frames:
+                    self._frames.popitem(last=False)
+            self._frames.move_to_end(id(df))
+            entry[1][key] = value
+            entry[1].move_to_end(key)
+            while len(entry[1]) > self.max_values:
+                entry[1].popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
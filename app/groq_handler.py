@@ -1,20 +1,32 @@
 import os
 import re
 import streamlit as st
-from groq import Groq
 from dotenv import load_dotenv
-from typing import Optional
+from typing import AsyncIterator, Optional
 import logging
+import time
+from llm_cache import llm_cache, make_key
+from tracing import log_prompt, tracer
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+# Configure logging; prompts and responses are only logged (sampled) at DEBUG
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(levelname)s - %(message)s")
 
 load_dotenv()
 
 class GroqHandler:
-    def __init__(self, model: str):
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+    def __init__(self, model: str, client=None, async_client=None):
+        self._client = client  # The process-wide client when None, created on the first LLM call
+        self._async_client = async_client  # Injected client for streaming; otherwise one per run
         self.model = model  # Store the selected model
+        self.analysis_prompt = (
+            "You are a Oracle database 21 assistant. You have been given a dataset with the following columns: "
+            "and new SQL queries to explore further. Avoid any query or syntax that is not compliant with Oracle 21c."
+        )
+        self.optimizer_prompt = (
+            "You are an Oracle Database 21c performance tuning expert. Given a slow SQL statement, its runtime "
+            "statistics and its execution plan, explain the main cost drivers and suggest concrete fixes: "
+            "rewritten SQL, indexes, statistics or hints. Be concise and only suggest Oracle 21c compliant syntax."
+        )
         self.system_prompt =  """
 **System Instructions for SQL Query Generation**
 
@@ -70,21 +82,51 @@ class GroqHandler:
 
 """
 
-    def generate_sql(self, natural_language: str) -> Optional[str]:
+    @property
+    def client(self):
+        if self._client is None:
+            from resources import groq_client  # Imports groq only once an LLM call is made
+            self._client = groq_client()
+        return self._client
+
+    def generate_sql(self, natural_language: str, schema_context: str = "") -> Optional[str]:
+        """Translate a request to SQL; `schema_context` lists the tables the model should use."""
         try:
-            logging.info(f"Received natural language input: {natural_language}")
-            response = self.client.chat.completions.create(
-                model=self.model,  # Use the dynamically selected model
-                messages=[
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": f"Convert to Oracle SQL: {natural_language}"}
-                ],
-                temperature=0.2
-            )
-            raw_output = response.choices[0].message.content.strip()
-            logging.info(f"Received SQL output: {raw_output}")
-            clean_sql = self._clean_output(raw_output)
-            return clean_sql
+            with tracer.span("generate_sql", model=self.model) as span:
+                log_prompt("NL2SQL request", natural_language)
+                cache_key = make_key(self.model, self.system_prompt, natural_language, schema_context)
+                cached = llm_cache.get(cache_key)
+                span.set(cached=cached is not None)
+                if cached is not None:
+                    stats = llm_cache.stats()
+                    logging.info(
+                        f"NL2SQL cache hit: saved {cached[1] * 1000:.0f} ms "
+                        f"(hit rate {stats['hit_rate']:.0%}, {stats['saved_seconds']:.1f} s saved in total)"
+                    )
+                    return cached[0]
+                user_prompt = f"Convert to Oracle SQL: {natural_language}"
+                if schema_context:
+                    user_prompt = (
+                        "Relevant tables (use only these, with the exact names shown):\n"
+                        f"{schema_context}\n\n{user_prompt}"
+                    )
+                start = time.perf_counter()
+                response = self.client.chat.completions.create(
+                    model=self.model,  # Use the dynamically selected model
+                    messages=[
+                        {"role": "system", "content": self.system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    temperature=0.2
+                )
+                latency = time.perf_counter() - start
+                self._record_usage(span, response)
+                raw_output = response.choices[0].message.content.strip()
+                log_prompt("NL2SQL response", raw_output)
+                clean_sql = self._clean_output(raw_output)
+                if clean_sql:
+                    llm_cache.put(cache_key, "generate_sql", clean_sql, latency)
+                return clean_sql
         except Exception as e:
             logging.error(f"Error in generate_sql: {str(e)}")
             st.error(f"API Error: {str(e)}")
@@ -93,35 +135,75 @@ class GroqHandler:
     
     def analyze_data(self, data_prompt: str) -> Optional[str]:
         try:
-            logging.info("Sending request to Groq API with prompt:")
-            logging.info(data_prompt)
-            response = self.client.chat.completions.create(
-                model=self.model,  # Use the dynamically selected model
-                messages=[
-                    {"role": "system", "content": (
-                        "You are a Oracle database 21 assistant. You have been given a dataset with the following columns: "
-                        "and new SQL queries to explore further. Avoid any query or syntax that is not compliant with Oracle 21c."
-                    )},
-                    {"role": "user", "content": data_prompt}
-                ],
-                temperature=0.2
-            )
+            log_prompt("Analysis prompt", data_prompt)
+            with tracer.span("analyze_data", model=self.model, prompt_chars=len(data_prompt)) as span:
+                response = self.client.chat.completions.create(
+                    model=self.model,  # Use the dynamically selected model
+                    messages=[
+                        {"role": "system", "content": self.analysis_prompt},
+                        {"role": "user", "content": data_prompt}
+                    ],
+                    temperature=0.2
+                )
+                self._record_usage(span, response)
             raw_output = response.choices[0].message.content.strip()
-            logging.info("Received raw output from Groq API:")
-            logging.info(raw_output)
+            log_prompt("Analysis response", raw_output)
             if not raw_output:
                 st.error("Empty response from Groq API.")
                 return None
             # Clean and return the output
-            clean_output = self._clean_output(raw_output)
-            logging.info("Cleaned output:")
-            logging.info(clean_output)
-            return clean_output
+            return self._clean_output(raw_output)
         except Exception as e:
             st.error(f"API Error: {str(e)}")
             logging.error("Exception in analyze_data:", exc_info=True)
             return None
 
+    def optimization_key(self, sql_text: str, plan_hash_value=None) -> str:
+        """Suggestions are cached per statement and plan, so a statement is re-analyzed only when its plan changes."""
+        return make_key(self.model, self.optimizer_prompt, sql_text, str(plan_hash_value))
+
+    def optimization_prompt(self, sql_text: str, plan: str = "", stats: str = "") -> str:
+        parts = [f"SQL statement:\n{sql_text}"]
+        if stats:
+            parts.append(f"Runtime statistics:\n{stats}")
+        if plan:
+            parts.append(f"Execution plan:\n{plan}")
+        return "\n\n".join(parts)
+
+    def new_async_client(self):
+        """AsyncGroq's connection pool is bound to the event loop using it, so each run gets its own."""
+        if self._async_client is not None:
+            return self._async_client
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+
+    async def close_async_client(self, client):
+        if client is not self._async_client:
+            await client.close()
+
+    async def stream_analysis(self, data_prompt: str, client,
+                              system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """Same request as analyze_data, but yields response tokens as they arrive."""
+        log_prompt("Streamed analysis prompt", data_prompt)
+        stream = await client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt or self.analysis_prompt},
+                {"role": "user", "content": data_prompt}
+            ],
+            temperature=0.2,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    @staticmethod
+    def _record_usage(span, response):
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            span.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
     def _clean_output(self, raw_output: str) -> str:
         # Remove unwanted backslashes from the raw output
         return raw_output.replace("\\", "")
\ No newline at end of file
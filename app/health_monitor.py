@@ -1,16 +1,62 @@
-from sklearn.ensemble import IsolationForest
 import numpy as np
+import os
+from typing import Optional
 
 class HealthMonitor:
-    def __init__(self):
-        self.model = IsolationForest(contamination=0.1)
+    """IsolationForest over a sliding window of metric samples.
+
+    `update` adds one sample and scores it; the model is refit on the window every
+    `refit_every` samples, so the cost per sample stays constant however long it runs.
+    """
+
+    def __init__(self, window: Optional[int] = None, refit_every: Optional[int] = None,
+                 min_samples: int = 32, contamination: Optional[float] = None):
+        # Expected share of anomalous samples; it sets the score threshold below which points are flagged
+        self.contamination = contamination or float(os.getenv("HEALTH_CONTAMINATION", "0.02"))
+        self.model = None  # Built on the first fit, so scikit-learn is only imported once it is needed
         self.is_trained = False
-    
+        self.window = window or int(os.getenv("HEALTH_WINDOW", "240"))
+        self.refit_every = refit_every or int(os.getenv("HEALTH_REFIT_EVERY", "20"))
+        self.min_samples = min(min_samples, self.window)
+        self._buffer = None
+        self._count = 0
+        self._since_fit = 0
+        self.fits = 0
+
     def train_model(self, data: np.ndarray):
+        if self.model is None:
+            from sklearn.ensemble import IsolationForest
+            self.model = IsolationForest(contamination=self.contamination)
         self.model.fit(data)
         self.is_trained = True
-    
+        self.fits += 1
+
     def detect_anomalies(self, new_data: np.ndarray) -> np.ndarray:
         if not self.is_trained:
             raise ValueError("Model not trained")
-        return self.model.predict(new_data)
\ No newline at end of file
+        return self.model.predict(new_data)
+
+    def update(self, point: np.ndarray) -> Optional[float]:
+        """Add one sample and return its anomaly score (negative = anomalous), or None while warming up."""
+        point = np.nan_to_num(np.asarray(point, dtype=np.float64))
+        if self._buffer is None or self._buffer.shape[1] != point.shape[0]:
+            self._buffer = np.zeros((self.window, point.shape[0]))
+            self._count = 0
+            self.is_trained = False
+        self._buffer[self._count % self.window] = point
+        self._count += 1
+        self._since_fit += 1
+        due = self._since_fit >= self.refit_every if self.is_trained else self._count >= self.min_samples
+        if due:
+            self.train_model(self.recent())
+            self._since_fit = 0
+        if not self.is_trained:
+            return None
+        return float(self.model.decision_function(point.reshape(1, -1))[0])
+
+    def recent(self) -> np.ndarray:
+        """The samples in the current window, oldest first."""
+        if self._count <= self.window:
+            return self._buffer[:self._count]
+        start = self._count % self.window
+        return np.concatenate([self._buffer[start:], self._buffer[:start]])
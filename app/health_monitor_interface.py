@@ -1,13 +1,100 @@
 import streamlit as st
-import numpy as np
+from metrics_sampler import get_sampler, TABLESPACE_METRIC
+from query_cache import query_cache
+from bind_rewriter import bind_rewriter
+from connection_pool import STMT_CACHE_SIZE
+
+CHART_SAMPLES = 240
+DEFAULT_CHART_METRICS = ["Host CPU Utilization (%)", "Average Active Sessions", "Executions Per Sec"]
 
 class HealthMonitorInterface:
     def __init__(self, state_manager):
         self.state = state_manager
 
     def render(self):
-        if st.button("Run Health Check"):
-            data = np.random.rand(100, 1)  # Replace with real metrics if available
-            self.state.get_state("monitor").train_model(data)
-            anomalies = self.state.get_state("monitor").detect_anomalies(data)
-            st.write("Anomaly Detection Results:", anomalies)
\ No newline at end of file
+        self.render_metrics()
+        self.render_pool_stats()
+        self.render_cache_stats()
+        self.render_statement_stats()
+
+    def render_metrics(self):
+        """Draws the sampler's ring buffer; nothing here queries the database or refits the model."""
+        st.subheader("Database Health")
+        sampler = get_sampler(self.state.get_state("oracle").sampler_key)
+        if sampler is None:
+            st.info("The metrics sampler is not running. It needs HEALTH_SAMPLER_ENABLED=true and either "
+                    "ORACLE_POOLED=true or a monitoring login in HEALTH_MONITOR_USER/HEALTH_MONITOR_PASSWORD.")
+            return
+        st.button("Refresh")
+        if sampler.error:
+            st.warning(f"Last {sampler.failures} samples failed, retrying with backoff: {sampler.error}")
+        unavailable = getattr(sampler.source, "unavailable", [])
+        if unavailable:
+            st.caption(f"Not visible to this login, so not sampled: {', '.join(unavailable)}")
+        df = sampler.ring.frame(CHART_SAMPLES)
+        if df.empty:
+            st.info(f"Waiting for the first sample (every {sampler.interval:g}s)...")
+            return
+
+        latest = df.iloc[-1]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Host CPU %", f"{latest['Host CPU Utilization (%)']:.1f}")
+        col2.metric("Active sessions", f"{latest['Average Active Sessions']:.2f}")
+        col3.metric("Executions/s", f"{latest['Executions Per Sec']:,.0f}")
+        col4.metric("Max tablespace %", f"{latest[TABLESPACE_METRIC]:.1f}")
+
+        metrics = st.multiselect("Metrics", sampler.ring.names, default=DEFAULT_CHART_METRICS)
+        if metrics:
+            st.line_chart(df[metrics])
+
+        scores = df["anomaly_score"]
+        anomalies = df[scores < 0]
+        st.line_chart(scores.rename("Anomaly score (below 0 is anomalous)"))
+        st.caption(
+            f"{len(sampler.ring):,} samples buffered · model refit {sampler.monitor.fits} times on the "
+            f"last {sampler.monitor.window} samples · {len(anomalies)} anomalies in view"
+        )
+        if not anomalies.empty:
+            st.dataframe(anomalies.tail(20))
+
+    def render_pool_stats(self):
+        """Shows busy/open sessions and acquire wait times for the shared pool."""
+        st.subheader("Connection Pool")
+        stats = self.state.get_state("oracle").pool_stats()
+        if stats is None:
+            st.info("This session uses a dedicated connection (pooling is disabled).")
+            return
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Busy", stats["busy"])
+        col2.metric("Open", f"{stats['open']} / {stats['max']}")
+        col3.metric("Avg wait (ms)", stats["avg_wait_ms"])
+        col4.metric("Max wait (ms)", stats["max_wait_ms"])
+        st.caption(f"{stats['pool']} · {stats['acquires']} acquires · {stats['dropped']} dead sessions dropped")
+
+    def render_cache_stats(self):
+        """Shows how often repeated SELECTs were answered without a database round trip."""
+        st.subheader("Query Result Cache")
+        stats = query_cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+        col2.metric("Entries", stats["entries"])
+        col3.metric("Memory (MiB)", f"{stats['bytes'] / 1024 ** 2:,.1f} / {stats['max_bytes'] / 1024 ** 2:,.0f}")
+        col4.metric("Evictions", stats["evictions"])
+        st.caption(
+            f"{stats['hits']} hits · {stats['misses']} misses · "
+            f"{stats['expirations']} expired · {stats['invalidations']} invalidated by DDL/DML"
+        )
+
+    def render_statement_stats(self):
+        """Shows how many distinct statement shapes the executed queries produced."""
+        st.subheader("Statement Shapes")
+        stats = bind_rewriter.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Executions", stats["executions"])
+        col2.metric("Distinct shapes", stats["shapes"])
+        col3.metric("Shape reuse", f"{stats['reuse_rate']:.0%}")
+        col4.metric("Literals bound", stats["binds"])
+        st.caption(
+            f"Literal binding is {'on' if stats['enabled'] else 'off (set QUERY_BIND_LITERALS=true)'} · "
+            f"{stats['rewritten']} queries rewritten · client statement cache: {STMT_CACHE_SIZE} per session"
+        )
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+CACHE_DIR = os.getenv("DATAQUEST_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".dataquest"))
+
+_QUOTED = re.compile(r"'[^']*'|\"[^\"]*\"")
+# Sentence punctuation carries no meaning for SQL generation; operators like < > = are kept
+_PUNCTUATION = re.compile(r"[?!,;:`]|\.(?!\d)|(?<!\d)\.")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_request(text: str) -> str:
+    """Fold case, punctuation and whitespace outside quoted values so trivial rewordings share a key."""
+    parts = []
+    last = 0
+    for match in _QUOTED.finditer(text):
+        parts.append(_PUNCTUATION.sub(" ", text[last:match.start()]).casefold())
+        parts.append(match.group(0))
+        last = match.end()
+    parts.append(_PUNCTUATION.sub(" ", text[last:]).casefold())
+    return _WHITESPACE.sub(" ", "".join(parts)).strip()
+
+
+def make_key(model: str, system_prompt: str, request: str, *context: str) -> str:
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    payload = json.dumps([model, prompt_hash, normalize_request(request)] + list(context))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """SQLite-backed cache of LLM completions, safe to share between worker processes.
+
+    WAL mode lets readers in other processes proceed while one process writes; each
+    thread keeps its own sqlite3 connection.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600, max_entries: int = 5000, enabled: bool = True):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._puts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=5.0)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS completions (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    latency REAL NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS completions_last_used ON completions (last_used)")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (response, original latency in seconds) for a fresh entry, else None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            db = self._db()
+            row = db.execute(
+                "SELECT response, latency FROM completions WHERE key = ? AND created > ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                with db:
+                    db.execute("UPDATE completions SET last_used = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache read failed: {str(e)}")
+            return None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.saved_seconds += row[1]
+        return row
+
+    def put(self, key: str, namespace: str, response: str, latency: float):
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO completions VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, namespace, response, latency, now, now)
+                )
+            with self._lock:
+                self._puts += 1
+                prune = self._puts % 100 == 1
+            if prune:
+                self.prune()
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache write failed: {str(e)}")
+
+    def prune(self):
+        """Drop expired entries, then the least recently used ones beyond max_entries."""
+        db = self._db()
+        with db:
+            db.execute("DELETE FROM completions WHERE created <= ?", (time.time() - self.ttl,))
+            db.execute(
+                "DELETE FROM completions WHERE key NOT IN "
+                "(SELECT key FROM completions ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+llm_cache = LLMCache(
+    path=os.path.join(CACHE_DIR, "llm_cache.sqlite"),
+    ttl=float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600))),
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000")),
+    enabled=os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true",
+)
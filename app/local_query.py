@@ -0,0 +1,535 @@
+import logging
+import os
+import re
+from decimal import Decimal
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sql_parser import tokenize
+
+ENABLED = os.getenv("LOCAL_REUSE_ENABLED", "true").lower() == "true"
+
+_AGGREGATES = frozenset(("COUNT", "SUM", "AVG", "MIN", "MAX"))
+_COMPARISONS = frozenset(("=", "<>", "!=", "^=", "<", "<=", ">", ">="))
+# Keywords that end a column reference, alias or expression
+_KEYWORDS = frozenset((
+    "SELECT", "DISTINCT", "UNIQUE", "ALL", "FROM", "WHERE", "GROUP", "BY", "HAVING", "ORDER", "ASC", "DESC",
+    "NULLS", "FIRST", "LAST", "FETCH", "NEXT", "ROWS", "ROW", "ONLY", "OFFSET", "AND", "OR", "NOT", "IN",
+    "BETWEEN", "LIKE", "IS", "NULL", "AS", "ON", "JOIN", "UNION", "INTERSECT", "MINUS", "CONNECT", "START",
+    "WITH", "FOR", "PIVOT", "UNPIVOT", "MODEL", "ESCAPE", "CASE", "ROWNUM", "LEVEL", "PRIOR",
+))
+
+
+class Unsupported(Exception):
+    """The query needs something the local evaluator doesn't do; run it in Oracle instead."""
+
+
+class _Query:
+    def __init__(self):
+        self.distinct = False
+        self.items = []        # (expression, output name); ("star",) items have no name
+        self.table = None      # Base table name, or None when the source is a subquery
+        self.alias = None
+        self.subquery = None   # Tokens of a FROM (subquery)
+        self.where = None
+        self.group_by = []
+        self.order_by = []     # (expression, ascending, nulls_first)
+        self.offset = 0
+        self.limit = None
+
+
+class _Parser:
+    """Recursive descent over sql_parser tokens for single-table SELECTs without joins."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+
+    def peek(self, offset=0):
+        i = self.i + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self, *texts):
+        kind, text = self.peek()
+        if texts and text not in texts:
+            raise Unsupported(f"expected {' or '.join(texts)} at {text!r}")
+        if kind is None:
+            raise Unsupported("unexpected end of statement")
+        self.i += 1
+        return kind, text
+
+    def accept(self, *texts):
+        if self.peek()[1] in texts:
+            return self.take()[1]
+        return None
+
+    def name(self):
+        kind, text = self.take()
+        if kind == "quoted":
+            return text[1:-1]
+        if kind != "word" or text in _KEYWORDS:
+            raise Unsupported(f"expected a name at {text!r}")
+        return text
+
+    def query(self) -> _Query:
+        q = _Query()
+        self.take("SELECT")
+        q.distinct = bool(self.accept("DISTINCT", "UNIQUE"))
+        self.accept("ALL")
+        while True:
+            q.items.append(self.select_item())
+            if not self.accept(","):
+                break
+        self.take("FROM")
+        if self.accept("("):
+            start, depth = self.i, 1
+            while depth:
+                text = self.take()[1]
+                depth += {"(": 1, ")": -1}.get(text, 0)
+            q.subquery = self.tokens[start:self.i - 1]
+        else:
+            q.table = self.name()
+            while self.accept("."):
+                q.table += "." + self.name()
+        q.alias = self.optional_alias()
+        if self.accept("WHERE"):
+            q.where = self.condition()
+        if self.accept("GROUP"):
+            self.take("BY")
+            q.group_by.append(self.operand())
+            while self.accept(","):
+                q.group_by.append(self.operand())
+        if self.accept("ORDER"):
+            self.take("BY")
+            while True:
+                expression = self.operand()
+                ascending = self.accept("ASC", "DESC") != "DESC"
+                nulls_first = not ascending  # Oracle sorts NULLs as the largest value
+                if self.accept("NULLS"):
+                    nulls_first = self.take("FIRST", "LAST")[1] == "FIRST"
+                q.order_by.append((expression, ascending, nulls_first))
+                if not self.accept(","):
+                    break
+        if self.accept("OFFSET"):
+            q.offset = self.integer()
+            self.take("ROWS", "ROW")
+        if self.accept("FETCH"):
+            self.take("FIRST", "NEXT")
+            q.limit = self.integer()
+            self.take("ROWS", "ROW")
+            self.take("ONLY")
+        self.accept(";")
+        if self.peek()[0] is not None:
+            raise Unsupported(f"unsupported clause at {self.peek()[1]!r}")
+        return q
+
+    def integer(self) -> int:
+        kind, text = self.take()
+        if kind != "number" or not text.isdigit():
+            raise Unsupported(f"expected a row count at {text!r}")
+        return int(text)
+
+    def optional_alias(self):
+        if self.accept("AS"):
+            return self.name()
+        kind, text = self.peek()
+        if kind == "quoted" or (kind == "word" and text not in _KEYWORDS):
+            return self.name()
+        return None
+
+    def select_item(self):
+        if self.accept("*"):
+            return ("star",), None
+        if self.peek(1)[1] == "." and self.peek(2)[1] == "*":
+            self.i += 3  # alias.*
+            return ("star",), None
+        start = self.i
+        expression = self.operand()
+        alias = self.optional_alias()
+        if alias is None:
+            if expression[0] == "col":
+                alias = expression[1]
+            else:
+                # Oracle names an unaliased expression after its text, e.g. COUNT(*) or SUM(SALARY)
+                alias = "".join(t for _, t in self.tokens[start:self.i])
+        return expression, alias
+
+    def operand(self):
+        kind, text = self.peek()
+        if kind == "number":
+            self.take()
+            return ("lit", int(text) if text.isdigit() else float(Decimal(text)))
+        if kind == "literal":
+            self.take()
+            if text[0] in "nNqQ":
+                raise Unsupported("national and q-quoted literals")
+            return ("lit", text[1:-1].replace("''", "'"))
+        if text == "-" and self.peek(1)[0] == "number":
+            self.take()
+            value = self.operand()[1]
+            return ("lit", -value)
+        if text in ("DATE", "TIMESTAMP") and self.peek(1)[0] == "literal":
+            self.take()
+            try:
+                return ("lit", pd.Timestamp(self.take()[1][1:-1]))
+            except ValueError:
+                raise Unsupported("datetime literal")
+        if kind == "typed":  # DATE'2024-01-01', written without a space
+            self.take()
+            prefix, _, value = text.partition("'")
+            if prefix.upper() == "INTERVAL":
+                raise Unsupported("interval literal")
+            try:
+                return ("lit", pd.Timestamp(value[:-1]))
+            except ValueError:
+                raise Unsupported("datetime literal")
+        if text == "NULL":
+            self.take()
+            return ("lit", None)
+        if kind == "word" and text in _AGGREGATES and self.peek(1)[1] == "(":
+            self.take()
+            self.take("(")
+            if text == "COUNT" and self.accept("*"):
+                self.take(")")
+                return ("agg", "COUNT", False, None)
+            distinct = bool(self.accept("DISTINCT"))
+            self.accept("ALL")
+            argument = self.column()
+            self.take(")")
+            return ("agg", text, distinct, argument)
+        return self.column()
+
+    def column(self):
+        name = self.name()
+        if self.accept("."):
+            name = self.name()  # Qualified by the table or its alias; there is only one source
+        if self.peek()[1] in ("(", "."):
+            raise Unsupported(f"function or expression at {name!r}")
+        return ("col", name)
+
+    def condition(self):
+        left = self.conjunction()
+        while self.accept("OR"):
+            left = ("or", left, self.conjunction())
+        return left
+
+    def conjunction(self):
+        left = self.negation()
+        while self.accept("AND"):
+            left = ("and", left, self.negation())
+        return left
+
+    def negation(self):
+        if self.accept("NOT"):
+            return ("not", self.negation())
+        return self.predicate()
+
+    def predicate(self):
+        if self.peek()[1] == "(":
+            # A parenthesised condition; a parenthesised operand isn't supported
+            self.take("(")
+            inner = self.condition()
+            self.take(")")
+            return inner
+        left = self.operand()
+        negated = bool(self.accept("NOT"))
+        op = self.peek()[1]
+        if op in ("<", ">", "!", "^") and (op + (self.peek(1)[1] or "")) in _COMPARISONS:
+            self.take()
+            op += self.peek()[1]  # The tokenizer yields "<>", "<=", ">=" and "!=" as two symbols
+        if op in _COMPARISONS and not negated:
+            self.take()
+            return ("cmp", "<>" if op in ("!=", "^=") else op, left, self.operand())
+        if op == "IS" and not negated:
+            self.take()
+            is_not = bool(self.accept("NOT"))
+            self.take("NULL")
+            return ("isnull", left, is_not)
+        if op == "IN":
+            self.take()
+            self.take("(")
+            values = [self.operand()]
+            while self.accept(","):
+                values.append(self.operand())
+            self.take(")")
+            if any(v[0] != "lit" for v in values):
+                raise Unsupported("IN with non-literal values")
+            return ("in", left, tuple(v[1] for v in values), negated)
+        if op == "BETWEEN":
+            self.take()
+            low = self.operand()
+            self.take("AND")
+            return ("between", left, low, self.operand(), negated)
+        if op == "LIKE":
+            self.take()
+            pattern = self.operand()
+            if pattern[0] != "lit" or not isinstance(pattern[1], str) or self.peek()[1] == "ESCAPE":
+                raise Unsupported("LIKE pattern")
+            return ("like", left, pattern[1], negated)
+        raise Unsupported(f"unsupported condition at {op!r}")
+
+
+def parse(sql: str) -> _Query:
+    return _Parser(tokenize(sql)).query()
+
+
+def _conjuncts(condition) -> List:
+    if condition is None:
+        return []
+    if condition[0] == "and":
+        return _conjuncts(condition[1]) + _conjuncts(condition[2])
+    return [condition]
+
+
+def _columns_of(expression) -> List[str]:
+    if expression is None or not isinstance(expression, tuple):
+        return []
+    if expression[0] == "col":
+        return [expression[1]]
+    return [name for part in expression[1:] for name in _columns_of(part)]
+
+
+def _plain(query: _Query) -> bool:
+    """A base query whose rows are table rows: no aggregation, DISTINCT, limit or renamed columns."""
+    return (query.table is not None and not query.distinct and not query.group_by and query.limit is None
+            and not query.offset and all(e[0] == "star" or (e[0] == "col" and name == e[1]) for e, name in query.items))
+
+
+def _kleene(mask: pd.Series, missing) -> pd.Series:
+    """A comparison result as SQL sees it: unknown (NA) wherever an operand was NULL."""
+    mask = mask.astype("boolean")
+    mask[np.asarray(missing)] = pd.NA
+    return mask
+
+
+def _operand(df: pd.DataFrame, expression):
+    if expression[0] == "col":
+        if expression[1] not in df.columns:
+            raise Unsupported(f"column {expression[1]} is not in the result")
+        return df[expression[1]]
+    if expression[0] == "lit":
+        return expression[1]
+    raise Unsupported("aggregate in a condition")
+
+
+def _check_types(series: pd.Series, value):
+    """Refuse comparisons where Oracle would apply an implicit conversion pandas doesn't."""
+    if value is None:
+        return value
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+    if numeric != isinstance(value, (int, float)) or (pd.api.types.is_datetime64_any_dtype(dtype) != isinstance(value, pd.Timestamp)):
+        raise Unsupported(f"implicit conversion between {dtype} and {type(value).__name__}")
+    if isinstance(value, pd.Timestamp) and getattr(dtype, "tz", None) is not None:
+        raise Unsupported("time zone aware column")
+    return value
+
+
+def _evaluate(df: pd.DataFrame, condition) -> pd.Series:
+    kind = condition[0]
+    if kind in ("and", "or"):
+        left, right = _evaluate(df, condition[1]), _evaluate(df, condition[2])
+        return left & right if kind == "and" else left | right
+    if kind == "not":
+        return ~_evaluate(df, condition[1])
+    series = _operand(df, condition[1]) if kind != "cmp" else None
+    if kind == "cmp":
+        _, op, left, right = condition
+        if left[0] != "col":
+            left, right = right, left
+            op = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}.get(op, op)
+        series, value = _operand(df, left), _operand(df, right)
+        if isinstance(value, pd.Series):
+            raise Unsupported("column to column comparison")
+        if value is None:
+            return pd.Series(pd.NA, index=df.index, dtype="boolean")  # Anything compared with NULL
+        value = _check_types(series, value)
+        if isinstance(series.dtype, pd.CategoricalDtype) and op not in ("=", "<>"):
+            series = series.astype(object)
+        result = {"=": series.eq, "<>": series.ne, "<": series.lt, "<=": series.le,
+                  ">": series.gt, ">=": series.ge}[op](value)
+        return _kleene(result, series.isna())
+    if kind == "isnull":
+        result = series.notna() if condition[2] else series.isna()
+        return result.astype("boolean")
+    if kind == "in":
+        values = [_check_types(series, v) for v in condition[2] if v is not None]
+        result = _kleene(series.isin(values), series.isna())
+        if condition[3]:
+            result = ~result
+            if len(values) < len(condition[2]):
+                result[result.fillna(False)] = pd.NA  # NOT IN (..., NULL) is never true
+        return result
+    if kind == "between":
+        low, high = _operand(df, condition[2]), _operand(df, condition[3])
+        if isinstance(low, pd.Series) or isinstance(high, pd.Series) or low is None or high is None:
+            raise Unsupported("BETWEEN bounds")
+        low, high = _check_types(series, low), _check_types(series, high)
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        result = _kleene(series.ge(low) & series.le(high), series.isna())
+        return ~result if condition[4] else result
+    if kind == "like":
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype(object)
+        if not (pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype)):
+            raise Unsupported("LIKE on a non-text column")
+        regex = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in condition[2])
+        matched = series.str.fullmatch(regex, flags=re.DOTALL)
+        result = _kleene(matched.astype("boolean").fillna(False), series.isna())
+        return ~result if condition[3] else result
+    raise Unsupported(kind)
+
+
+def _aggregate(frame, function: str, distinct: bool, column: Optional[str]):
+    """One aggregate over a DataFrame or per group of a DataFrameGroupBy."""
+    if column is None:
+        return frame.size()
+    values = frame[column]
+    if function == "COUNT":
+        return values.nunique() if distinct else values.count()
+    if distinct:
+        raise Unsupported(f"{function}(DISTINCT ...)")
+    if function == "SUM":
+        return values.sum(min_count=1)  # SUM over only NULLs is NULL, not 0
+    return {"AVG": values.mean, "MIN": values.min, "MAX": values.max}[function]()
+
+
+def _grouped(rows: pd.DataFrame, query: _Query) -> pd.DataFrame:
+    keys = [e[1] for e in query.group_by]
+    if keys:
+        groups = rows.groupby(keys, dropna=False, sort=False, observed=True)
+        index = groups.size().index
+    out = {}
+    for expression, name in query.items:
+        if expression[0] == "agg":
+            _, function, distinct, argument = expression
+            column = argument[1] if argument else None
+            if keys:
+                out[name] = _aggregate(groups, function, distinct, column).reindex(index).array
+            else:
+                out[name] = [len(rows) if column is None else _aggregate(rows, function, distinct, column)]
+        elif keys and expression[0] == "col" and expression[1] in keys:
+            out[name] = index.get_level_values(keys.index(expression[1])).array
+        else:
+            raise Unsupported("selected column is neither grouped nor aggregated")
+    return pd.DataFrame(out)
+
+
+def _sort(frame: pd.DataFrame, keys: List[Tuple[str, bool, bool]]) -> pd.DataFrame:
+    """Sort with per-key NULL placement, which sort_values alone can't express."""
+    by, ascending, order = [], [], {}
+    for i, (column, asc, nulls_first) in enumerate(keys):
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)  # Categories sort in category order, not by value
+        order[f"nulls{i}"] = values.isna().to_numpy()
+        order[f"key{i}"] = values.to_numpy()
+        by += [f"nulls{i}", f"key{i}"]
+        ascending += [not nulls_first, asc]
+    positions = pd.DataFrame(order).sort_values(by, ascending=ascending, kind="stable").index
+    return frame.iloc[positions]
+
+
+def _resolve_order(query: _Query, columns, available=()) -> List[Tuple[str, bool, bool]]:
+    """ORDER BY keys as column names: positions and names refer to `columns`, the output;
+    `available` lists further columns that may be sorted on."""
+    names = [name for _, name in query.items]
+    keys = []
+    for expression, ascending, nulls_first in query.order_by:
+        if expression[0] == "lit" and isinstance(expression[1], int):
+            position = expression[1]
+            if not 1 <= position <= len(columns):
+                raise Unsupported("ORDER BY position")
+            keys.append((columns[position - 1], ascending, nulls_first))
+        elif expression[0] == "col" and (expression[1] in names or expression[1] in columns or expression[1] in available):
+            keys.append((expression[1], ascending, nulls_first))
+        else:
+            raise Unsupported("ORDER BY expression")
+    return keys
+
+
+def run(query: _Query, rows: pd.DataFrame) -> pd.DataFrame:
+    """Evaluate a parsed query over `rows`, the source it reads from."""
+    if query.where is not None:
+        rows = rows[_evaluate(rows, query.where).fillna(False).to_numpy(dtype=bool)]
+    sorted_rows = False
+    if query.group_by or any(e[0] == "agg" for e, _ in query.items):
+        if any(e[0] != "col" for e in query.group_by) or any(e[0] not in ("col", "agg") for e, _ in query.items):
+            raise Unsupported("grouping expression")
+        for column in [e[1] for e in query.group_by] + [c for e, _ in query.items for c in _columns_of(e)]:
+            if column not in rows.columns:
+                raise Unsupported(f"column {column} is not in the result")
+        result = _grouped(rows, query)
+    else:
+        columns, names = [], []
+        for expression, name in query.items:
+            if expression[0] == "star":
+                columns += list(rows.columns)
+                names += list(rows.columns)
+            elif expression[0] == "col":
+                if expression[1] not in rows.columns:
+                    raise Unsupported(f"column {expression[1]} is not in the result")
+                columns.append(expression[1])
+                names.append(name)
+            else:
+                raise Unsupported("expression in the select list")
+        if query.order_by and not query.distinct:
+            # Sorting before projecting also allows ORDER BY on columns that aren't selected
+            sources = dict(zip(names, columns))
+            keys = [(sources.get(c, c), a, n) for c, a, n in _resolve_order(query, names, rows.columns)]
+            if any(c not in rows.columns for c, _, _ in keys):
+                raise Unsupported("ORDER BY column")
+            rows = _sort(rows, keys)
+            sorted_rows = True
+        result = rows.iloc[:, [rows.columns.get_loc(c) for c in columns]].copy()
+        result.columns = names
+        if query.distinct:
+            result = result.drop_duplicates()
+    if query.order_by and not sorted_rows:
+        result = _sort(result, _resolve_order(query, list(result.columns)))
+    if query.offset:
+        result = result.iloc[query.offset:]
+    if query.limit is not None:
+        result = result.iloc[:query.limit]
+    return result.reset_index(drop=True)
+
+
+def answer_locally(sql: str, base_sql: Optional[str], base_df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Answer `sql` from the rows of a previous result when it only filters, projects, sorts
+    or aggregates them; None when it needs Oracle.
+
+    Two shapes qualify: SELECT ... FROM (<base_sql>) ..., and a query on the same table as a
+    plain base query whose WHERE keeps every condition of the base and adds its own.
+    """
+    if not ENABLED or not sql or not base_sql or base_df is None or base_df.attrs.get("truncated"):
+        return None
+    try:
+        query = parse(sql)
+        base_tokens = tokenize(base_sql)
+        if base_tokens and base_tokens[-1][1] == ";":
+            base_tokens = base_tokens[:-1]
+        if query.subquery is not None:
+            if query.subquery != base_tokens:
+                return None
+            return run(query, base_df)
+        base = _Parser(base_tokens).query()
+        if not _plain(base) or base.table != query.table:
+            return None
+        if any(e[0] == "star" for e, _ in query.items) and any(e[0] != "star" for e, _ in base.items):
+            return None  # * means every table column, and the base kept only some
+        conditions = _conjuncts(query.where)
+        remaining = list(conditions)
+        for condition in _conjuncts(base.where):
+            if condition not in remaining:
+                return None  # Not a restriction of the base rows
+            remaining.remove(condition)
+        query.where = None
+        for condition in remaining:
+            query.where = condition if query.where is None else ("and", query.where, condition)
+        return run(query, base_df)
+    except Unsupported as e:
+        logging.debug(f"Running in Oracle instead of locally: {str(e)}")
+        return None
@@ -1,9 +1,7 @@
 import streamlit as st
+import resources
 from state_manager import StateManager
-from nl2sql_interface import NL2SQLInterface
-from visualization_interface import VisualizationInterface
-from optimizer_interface import OptimizerInterface
-from health_monitor_interface import HealthMonitorInterface
+from tracing import start_exporter, tracer
 from dotenv import load_dotenv
 import os
 
@@ -22,17 +20,29 @@ def connection_form(state):
         service_name = st.text_input("Service Name/SID", "xepdb1")
 
         if st.form_submit_button("Connect"):
+            from oracle_manager import OracleManager
+            from data_visualizer import DataVisualizer
             # Initialize OracleManager with the provided details
-            oracle_manager = state.get_state("oracle_class")(hostname, int(port), service_name)
+            oracle_manager = OracleManager(hostname, int(port), service_name, **state.get_state("oracle_options"))
             if oracle_manager.connect(username, password):
                 st.success("Connected successfully")
                 state.update_state("oracle", oracle_manager)
-                state.update_state("visualizer", state.get_state("visualizer_class")(oracle_manager))
+                state.clear_result_base()
+                state.update_state("visualizer", DataVisualizer(oracle_manager))
                 st.experimental_rerun()  # Refresh the page
             else:
                 st.error("Connection failed")
 
 def main():
+    start_exporter()
+    with tracer.span("streamlit_rerun"):
+        state = render()
+    if state.is_connected():
+        # A running query is polled by rerunning the page, outside the span: the pause isn't render time
+        from query_handler import QueryHandler
+        QueryHandler(state).poll_job()
+
+def render():
     state = StateManager()
     state.init_state()
 
@@ -42,10 +52,17 @@ def main():
         st.title("DataQuest : AI-Powered Database Assistant") 
         st.write("Welcome to the AI Oracle Assistant! This application allows you to interact with your Oracle database using natural language queries and data visualization tools.")
 
-    if not state.get_state("oracle").conn:
+    if not state.is_connected():
         connection_form(state)
     else:
-        tabs = st.tabs(["NL2SQL", "Data Visualization", "Optimizer", "Health Monitor"])
+        # Tab modules pull in pandas, plotly and the database driver; load them once connected
+        from nl2sql_interface import NL2SQLInterface
+        from visualization_interface import VisualizationInterface
+        from optimizer_interface import OptimizerInterface
+        from health_monitor_interface import HealthMonitorInterface
+        from performance_interface import PerformanceInterface
+
+        tabs = st.tabs(["NL2SQL", "Data Visualization", "Optimizer", "Health Monitor", "Performance"])
         
         with tabs[0]:
             NL2SQLInterface(state).render()
@@ -59,6 +76,9 @@ def main():
         with tabs[3]:
             HealthMonitorInterface(state).render()
 
+        with tabs[4]:
+            PerformanceInterface(state).render()
+
         with col2:
             llm_options = [
                 "qwen-2.5-coder-32b",
@@ -75,14 +95,17 @@ def main():
             )
             if selected_llm != state.get_state("selected_llm"):
                 state.update_state("selected_llm", selected_llm)
-                state.update_state("groq", state.get_state("groq_class")(selected_llm))
+                state.update_state("groq", resources.groq_handler(selected_llm))
             
             ddl_dml_enabled = st.checkbox("Enable DDL/DML", value=False, key="ddl_dml_checkbox")
             state.update_state("ddl_dml_enabled", ddl_dml_enabled)
 
         if st.button("Disconnect"):
             state.get_state("oracle").close()
+            state.clear_result_base()
             st.experimental_rerun()
 
+    return state
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,136 @@
+import os
+from operator import itemgetter
+from typing import List, Sequence
+import numpy as np
+import pandas as pd
+
+# Strings with at most this share of distinct values become pandas categoricals
+CATEGORY_RATIO = 0.5
+CATEGORY_MIN_ROWS = 64
+
+# Driver type attributes grouped by how their values are materialized
+_KIND_ATTRS = {
+    "number": ("DB_TYPE_NUMBER",),
+    "float": ("DB_TYPE_BINARY_DOUBLE", "DB_TYPE_BINARY_FLOAT"),
+    "datetime": ("DB_TYPE_DATE", "DB_TYPE_TIMESTAMP", "DB_TYPE_TIMESTAMP_TZ", "DB_TYPE_TIMESTAMP_LTZ"),
+    "string": ("DB_TYPE_VARCHAR", "DB_TYPE_CHAR", "DB_TYPE_NVARCHAR", "DB_TYPE_NCHAR", "DB_TYPE_LONG"),
+    "lob": ("DB_TYPE_CLOB", "DB_TYPE_NCLOB"),
+}
+
+
+def arrow_strings_enabled() -> bool:
+    """Arrow-backed strings are opt-in and need pyarrow installed."""
+    if os.getenv("QUERY_ARROW_STRINGS", "false").lower() != "true":
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def column_kinds(description: Sequence, driver) -> List[str]:
+    """Map cursor.description entries to a materialization kind per column."""
+    kinds = []
+    for _, type_code, _, _, precision, scale, _ in description:
+        kind = "object"
+        for candidate, attrs in _KIND_ATTRS.items():
+            if any(type_code == getattr(driver, attr, None) for attr in attrs):
+                kind = candidate
+                break
+        if kind == "number":
+            if scale == 0 and precision and precision <= 9:
+                kind = "int32"
+            elif scale == 0 and precision and precision <= 18:
+                kind = "int64"
+            elif scale == -127 or not precision:
+                kind = "number"  # Unconstrained NUMBER: decided from the values
+            else:
+                kind = "float"
+        kinds.append(kind)
+    return kinds
+
+
+def build_frame(columns: List[str], kinds: List[str], rows: list, categorize: bool = True,
+                arrow_strings: bool = False) -> pd.DataFrame:
+    """Build a DataFrame column by column into compact, typed arrays instead of object columns."""
+    n = len(rows)
+    data = {}
+    for position, kind in enumerate(kinds):
+        # One preallocated object column per pass, then a vectorized cast to the target dtype
+        values = np.fromiter(map(itemgetter(position), rows), dtype=object, count=n)
+        data[position] = _materialize_column(values, kind, arrow_strings)
+    df = pd.DataFrame(data)
+    df.columns = columns  # Assigned by position since joins can repeat a column name
+    return categorize_strings(df) if categorize else df
+
+
+def _materialize_column(values: np.ndarray, kind: str, arrow_strings: bool):
+    if kind == "number":
+        kind = _number_kind(values)
+    if kind in ("int32", "int64"):
+        mask = pd.isna(values)
+        try:
+            if not mask.any():
+                return values.astype(kind)
+            filled = values.copy()
+            filled[mask] = 0
+            return pd.arrays.IntegerArray(filled.astype(kind), mask)
+        except OverflowError:
+            return values  # Integers wider than int64 stay as Python ints
+    if kind == "float":
+        return values.astype(np.float64)
+    if kind == "datetime":
+        try:
+            return pd.to_datetime(values).array
+        except (TypeError, ValueError, OverflowError):
+            return values  # e.g. years beyond the datetime64[ns] range stay as Python objects
+    if kind == "lob":
+        values = np.fromiter((v.read() if hasattr(v, "read") else v for v in values),
+                             dtype=object, count=len(values))
+        kind = "string"
+    if kind == "string" and arrow_strings:
+        return pd.array(values, dtype="string[pyarrow]")
+    return values
+
+
+def _number_kind(values: np.ndarray) -> str:
+    # The driver hands back ints for integral NUMBER values and floats otherwise
+    inferred = pd.api.types.infer_dtype(values, skipna=True)
+    if inferred == "integer":
+        return "int64"
+    if inferred in ("floating", "mixed-integer-float", "decimal", "empty"):
+        return "float"
+    return "object"
+
+
+def categorize_strings(df: pd.DataFrame, ratio: float = CATEGORY_RATIO,
+                       min_rows: int = CATEGORY_MIN_ROWS) -> pd.DataFrame:
+    """Convert low-cardinality string columns to categoricals, in place."""
+    if len(df) < min_rows:
+        return df
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if column.dtype != object and not isinstance(column.dtype, pd.StringDtype):
+            continue
+        try:
+            # A cheap look at the head rules out most high-cardinality columns
+            if column.iloc[:min_rows].nunique(dropna=True) > min_rows * ratio:
+                continue
+            distinct = column.nunique(dropna=True)
+        except TypeError:
+            continue  # Unhashable values (e.g. LOB handles) stay as objects
+        if distinct <= len(df) * ratio:
+            df.isetitem(position, column.astype("category"))
+    return df
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-column dtype and in-memory size, largest first."""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "column": usage.index,
+        "dtype": [str(dtype) for dtype in df.dtypes],
+        "bytes": usage.values,
+    })
+    return report.sort_values("bytes", ascending=False, ignore_index=True)
@@ -0,0 +1,305 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from health_monitor import HealthMonitor
+
+SYSMETRICS = [
+    "Host CPU Utilization (%)",
+    "Average Active Sessions",
+    "Database CPU Time Ratio",
+    "Executions Per Sec",
+    "User Transaction Per Sec",
+    "Physical Reads Per Sec",
+    "Logons Per Sec",
+    "SQL Service Response Time",
+    "Buffer Cache Hit Ratio",
+]
+# Cumulative counters; the sampler turns them into per-second rates
+SYSSTATS = ["parse count (hard)", "user commits", "redo size", "session logical reads"]
+WAIT_CLASSES = ["CPU", "User I/O", "Concurrency", "Commit", "Application", "Configuration", "Network", "Other"]
+TABLESPACE_METRIC = "Max Tablespace Used %"
+
+METRIC_NAMES = (
+    SYSMETRICS
+    + [f"{name} /s" for name in SYSSTATS]
+    + [f"Active sessions: {name}" for name in WAIT_CLASSES]
+    + [TABLESPACE_METRIC]
+)
+
+# (source, name, value) rows per view; each login may see only some of them, so they are probed
+# separately once and the visible ones are combined into one UNION ALL, one round trip per tick
+SAMPLE_BRANCHES = {
+    "sysmetric": """
+    SELECT 'sysmetric', metric_name, value FROM v$sysmetric
+    WHERE group_id = 2 AND metric_name IN ({})""".format(", ".join(f"'{name}'" for name in SYSMETRICS)),
+    "sysstat": """
+    SELECT 'sysstat', name, value FROM v$sysstat
+    WHERE name IN ({})""".format(", ".join(f"'{name}'" for name in SYSSTATS)),
+    "wait_class": """
+    SELECT 'wait_class', CASE WHEN state <> 'WAITING' THEN 'CPU' ELSE wait_class END, COUNT(*)
+    FROM v$session
+    WHERE type = 'USER' AND status = 'ACTIVE' AND wait_class <> 'Idle'
+    GROUP BY CASE WHEN state <> 'WAITING' THEN 'CPU' ELSE wait_class END""",
+    "tablespace": f"""
+    SELECT 'tablespace', '{TABLESPACE_METRIC}', MAX(used_percent) FROM dba_tablespace_usage_metrics""",
+}
+# Missing table or view, insufficient privileges: the login can't see that branch
+NOT_VISIBLE_CODES = {942, 1031}
+MAX_BACKOFF = 600.0  # Longest wait between attempts after repeated failures, in seconds
+
+Sample = Tuple[float, List[Tuple[str, str, float]]]
+
+
+class MetricRing:
+    """Fixed-size ring buffer of metric vectors, timestamps and anomaly scores."""
+
+    def __init__(self, capacity: int, names: List[str]):
+        self.capacity = capacity
+        self.names = list(names)
+        self.values = np.full((capacity, len(names)), np.nan)
+        self.timestamps = np.zeros(capacity)
+        self.scores = np.full(capacity, np.nan)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def append(self, timestamp: float, values: np.ndarray, score: Optional[float]):
+        with self._lock:
+            slot = self.count % self.capacity
+            self.values[slot] = values
+            self.timestamps[slot] = timestamp
+            self.scores[slot] = np.nan if score is None else score
+            self.count += 1
+
+    def frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """The newest `last` samples (all by default), oldest first, indexed by sample time."""
+        with self._lock:
+            size = len(self)
+            take = size if last is None else min(last, size)
+            order = (np.arange(self.count - take, self.count)) % self.capacity
+            values = self.values[order]
+            timestamps = self.timestamps[order]
+            scores = self.scores[order]
+        df = pd.DataFrame(values, columns=self.names, index=pd.to_datetime(timestamps, unit="s"))
+        df["anomaly_score"] = scores
+        return df
+
+
+class OracleMetricsSource:
+    """One batched V$ query per tick on a session borrowed from a pool for the tick only.
+
+    The first tick probes each view once and keeps those the login can read, so a user without
+    access to e.g. DBA views still gets the rest instead of a failing query on every tick.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool  # A connection_pool.ConnectionPool; it holds no password, only sessions
+        self.sql: Optional[str] = None
+        self.unavailable: List[str] = []
+
+    def sample(self) -> Optional[Sample]:
+        with self.pool.connection() as conn, conn.cursor() as cursor:
+            if self.sql is None:
+                self.sql = self._probe(cursor)
+            cursor.execute(self.sql)
+            return time.time(), cursor.fetchall()
+
+    def _probe(self, cursor) -> str:
+        visible = []
+        for name, sql in SAMPLE_BRANCHES.items():
+            try:
+                cursor.execute(sql)
+                cursor.fetchall()
+                visible.append(sql)
+            except self.pool.driver.DatabaseError as e:
+                if getattr(e.args[0], "code", None) not in NOT_VISIBLE_CODES:
+                    raise
+                self.unavailable.append(name)
+        if self.unavailable:
+            logging.info(f"Metrics sampler skips views this login can't read: {', '.join(self.unavailable)}")
+        if not visible:
+            raise Exception("This login can read none of the V$ views the health monitor samples.")
+        return "\n    UNION ALL".join(visible)
+
+    def close(self):
+        pass  # Sessions go back to the pool after every tick
+
+
+class ReplaySource:
+    """Replays samples recorded with `HEALTH_RECORD_FILE` (JSON lines of {"ts", "rows"})."""
+
+    def __init__(self, path: str, loop: bool = False):
+        self.path = path
+        self.loop = loop
+        self._samples = self._read()
+
+    def _read(self) -> Iterable[Sample]:
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record["ts"], [tuple(row) for row in record["rows"]]
+
+    def sample(self) -> Optional[Sample]:
+        try:
+            return next(self._samples)
+        except StopIteration:
+            if not self.loop:
+                return None
+            self._samples = self._read()
+            return next(self._samples, None)
+
+    def close(self):
+        pass
+
+
+class MetricsSampler:
+    """Polls a metrics source on a background thread into a ring buffer, scoring each sample."""
+
+    def __init__(self, source, interval: float = 15.0, capacity: int = 5760,
+                 monitor: Optional[HealthMonitor] = None, record_path: Optional[str] = None):
+        self.source = source
+        self.interval = interval
+        self.ring = MetricRing(capacity, METRIC_NAMES)
+        self.monitor = monitor or HealthMonitor()
+        self.record_path = record_path
+        self.error: Optional[str] = None
+        self.failures = 0  # Consecutive failed ticks; the wait doubles with each, up to MAX_BACKOFF
+        self._index = {name: position for position, name in enumerate(METRIC_NAMES)}
+        self._previous: Dict[str, Tuple[float, float]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True, name="metrics-sampler")
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.source.close()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.tick():
+                    break  # Replay finished
+                self.error = None
+                self.failures = 0
+            except Exception as e:
+                self.error = str(e)
+                self.failures += 1
+                logging.warning(f"Metrics sample failed ({self.failures} in a row): {str(e)}")
+            self._stop.wait(min(self.interval * 2 ** min(self.failures, 16), max(MAX_BACKOFF, self.interval)))
+
+    def tick(self) -> bool:
+        """Take one sample; returns False when the source has nothing more to give."""
+        sample = self.source.sample()
+        if sample is None:
+            return False
+        timestamp, rows = sample
+        if self.record_path:
+            with open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"ts": timestamp, "rows": [list(row) for row in rows]}) + "\n")
+        values = self.vector(timestamp, rows)
+        self.ring.append(timestamp, values, self.monitor.update(values))
+        return True
+
+    def vector(self, timestamp: float, rows: List[Tuple[str, str, float]]) -> np.ndarray:
+        values = np.full(len(METRIC_NAMES), np.nan)
+        # Wait classes with no active sessions are absent from the result, which means zero
+        for name in WAIT_CLASSES:
+            values[self._index[f"Active sessions: {name}"]] = 0.0
+        for source, name, value in rows:
+            if value is None:
+                continue
+            if source == "sysstat":
+                previous = self._previous.get(name)
+                self._previous[name] = (timestamp, value)
+                if previous is None or timestamp <= previous[0] or value < previous[1]:
+                    continue  # First sample or an instance restart: no rate yet
+                values[self._index[f"{name} /s"]] = (value - previous[1]) / (timestamp - previous[0])
+            elif source == "wait_class":
+                key = f"Active sessions: {name}"
+                values[self._index.get(key, self._index["Active sessions: Other"])] += value
+            elif name in self._index:
+                values[self._index[name]] = value
+        return values
+
+
+# Sampler key -> (sampler, sessions using it). The key is the database plus the login whose view
+# of V$ the samples show: the monitoring login when one is configured, which every session on the
+# database shares, else each user's own login, so nobody sees numbers their login couldn't read.
+_samplers: Dict[Tuple, Tuple[MetricsSampler, int]] = {}
+_samplers_lock = threading.Lock()
+
+
+def sampler_enabled() -> bool:
+    return os.getenv("HEALTH_SAMPLER_ENABLED", "true").lower() == "true"
+
+
+def monitor_credentials() -> Optional[Tuple[str, str]]:
+    """A dedicated monitoring login (e.g. one granted SELECT_CATALOG_ROLE), if configured."""
+    user = os.getenv("HEALTH_MONITOR_USER")
+    return (user, os.getenv("HEALTH_MONITOR_PASSWORD", "")) if user else None
+
+
+def acquire_sampler(key: Tuple, pool) -> Optional[MetricsSampler]:
+    """Start the sampler for `key` (host, port, service, user) on first use, or join the running
+    one; pair with release_sampler.
+
+    Ticks borrow sessions from `pool`, which must belong to the key's user. With
+    `HEALTH_REPLAY_FILE` set, recorded samples are replayed instead of querying the database,
+    and `pool` may be None.
+    """
+    replay_path = os.getenv("HEALTH_REPLAY_FILE")
+    with _samplers_lock:
+        sampler, sessions = _samplers.get(key, (None, 0))
+        if sampler is None:
+            if replay_path:
+                source = ReplaySource(replay_path, loop=True)
+            elif pool is not None:
+                source = OracleMetricsSource(pool)
+            else:
+                return None
+            sampler = MetricsSampler(
+                source,
+                interval=float(os.getenv("HEALTH_SAMPLE_INTERVAL", "15")),
+                capacity=int(os.getenv("HEALTH_BUFFER_SIZE", "5760")),
+                record_path=os.getenv("HEALTH_RECORD_FILE") or None,
+            )
+            sampler.start()
+        _samplers[key] = (sampler, sessions + 1)
+        return sampler
+
+
+def release_sampler(key: Tuple):
+    """Stop the key's sampler when the last session using it leaves."""
+    with _samplers_lock:
+        sampler, sessions = _samplers.get(key, (None, 0))
+        if sampler is None:
+            return
+        if sessions > 1:
+            _samplers[key] = (sampler, sessions - 1)
+            return
+        del _samplers[key]
+    sampler.stop()
+
+
+def get_sampler(key: Optional[Tuple]) -> Optional[MetricsSampler]:
+    sampler, _ = _samplers.get(key, (None, 0))
+    return sampler
@@ -1,8 +1,13 @@
+import time
 import streamlit as st
+import pandas as pd
+import bulk_writer
 from query_handler import QueryHandler
 from chat_analyzer import ChatAnalyzer
-import pandas as pd
-import io
+from export_engine import ExportEngine, FORMATS, available_formats
+from materializer import memory_report
+from result_pager import render_result_grid
+from schema_catalog import get_catalog
 
 class NL2SQLInterface:
     def __init__(self, state_manager):
@@ -18,7 +23,7 @@ class NL2SQLInterface:
             if st.button("Generate SQL"):
                 if query:
                     with st.spinner("Generating..."):
-                        generated = self.state.get_state("groq").generate_sql(query)
+                        generated = self.state.get_state("groq").generate_sql(query, self._schema_context(query))
                         self.state.update_state("generated_sql", generated)
                         self.state.update_state("edited_sql", generated)  # Initialize editable SQL
         with col2:
@@ -41,43 +46,52 @@ class NL2SQLInterface:
         if 'exe_gen_sql' in locals() and exe_gen_sql:
             self.query_handler.execute_query(self.state.get_state("generated_sql"))
 
+        # Progress of the running query (started above or in an earlier rerun), or its result once done
+        self.query_handler.follow_job()
+
         # Display DDL/DML output below the text box if available
         if self.state.get_state("ddl_dml_output"):
             st.subheader("DDL/DML Execution Output")
             st.write(self.state.get_state("ddl_dml_output"))
 
+        if self.state.get_state("ddl_dml_enabled"):
+            self.render_bulk_load()
+
         # Display query results and analysis/chat only in the NL2SQL tab
         if self.state.get_state("query_df") is not None and self.state.get_state("executed_sql") is not None:
             st.subheader("Query Results")
-            st.dataframe(self.state.get_state("query_df"))
+            query_df = self.state.get_state("query_df")
+            self.render_result_source()
+            if query_df.attrs.get("truncated"):
+                st.warning(f"Only the first {len(query_df):,} rows were fetched; pages beyond them are read from the database.")
+            render_result_grid(self.state.get_state("oracle"), self.state.get_state("executed_sql"), query_df, "results")
+            with st.expander("Result Memory"):
+                report = memory_report(query_df)
+                st.caption(f"{report['bytes'].sum() / 1024 ** 2:,.2f} MiB in memory")
+                st.dataframe(report, hide_index=True)
             
-            # Download button for Excel file
-            excel_buffer = io.BytesIO()
-            self.state.get_state("query_df").to_excel(excel_buffer, index=False, engine="openpyxl")
-            excel_buffer.seek(0)
-            sql = self.state.get_state("executed_sql") or "query"
-            safe_sql = "".join(c for c in sql[:20] if c.isalnum() or c in "_-")  # Short, safe name
-            file_name = f"{safe_sql}_results.xlsx"
-            st.download_button(
-                label="Download Results as Excel",
-                data=excel_buffer,
-                file_name=file_name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                key="download_excel"
-            )
+            self.render_export(query_df)
 
             # Three buttons for  analysis 
             st.subheader("Analyze Data")
-            col1, col2, col3 = st.columns(3)
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                if st.button("Insights"):
-                    self.query_handler.generate_insights()
+                run_insights = st.button("Insights")
             with col2:
-                if st.button("Additional SQL Queries"):
-                    self.query_handler.generate_sql_queries()
+                run_sql = st.button("Additional SQL Queries")
             with col3:
-                if st.button("Visualization Suggestions"):
-                    self.query_handler.generate_visualizations()
+                run_viz = st.button("Visualization Suggestions")
+            with col4:
+                run_all = st.button("Run All Analyses")
+            # Responses stream in below the buttons, full width
+            if run_insights:
+                self.query_handler.generate_insights()
+            elif run_sql:
+                self.query_handler.generate_sql_queries()
+            elif run_viz:
+                self.query_handler.generate_visualizations()
+            elif run_all:
+                self.query_handler.generate_all()
 
             # Display stacked results
             if self.state.get_state("analysis_results"):
@@ -90,4 +104,87 @@ class NL2SQLInterface:
                     self.state.update_state("analysis_results", None)
                     st.experimental_rerun()
             
-            self.chat_analyzer.show_chat_section()
\ No newline at end of file
+            self.chat_analyzer.show_chat_section()
+
+    def render_result_source(self):
+        """Say whether the rows came from Oracle or were computed from the previous result."""
+        source = self.state.get_state("result_source")
+        if not source:
+            return
+        if source["source"] == "local":
+            fetched = time.strftime("%H:%M:%S", time.localtime(source["fetched_at"]))
+            st.caption(f"⚡ Answered locally in {source['seconds'] * 1000:,.1f} ms from the "
+                       f"{source['base_rows']:,} rows fetched from Oracle at {fetched}")
+        else:
+            st.caption(f"🗄️ Answered by Oracle in {source['seconds']:,.2f}s")
+
+    def render_export(self, query_df):
+        """Builds an export only when asked and offers it in that rerun only: handing Streamlit the
+        file's bytes again on every later rerun would copy the whole export each time."""
+        sql = self.state.get_state("executed_sql")
+        if self.state.get_state("exports") is None:
+            self.state.update_state("exports", ExportEngine())
+        exports = self.state.get_state("exports")
+        col1, col2 = st.columns([1, 3])
+        fmt = col1.selectbox("Export format", available_formats(), key="export_format")
+        label = f"Prepare Full {fmt} Export" if query_df.attrs.get("truncated") else f"Prepare {fmt} Export"
+        if not col2.button(label):
+            return
+        with st.spinner("Exporting..."):
+            try:
+                out, rows = exports.build(self.state.get_state("oracle"), sql, query_df, fmt)
+            except Exception as e:
+                st.error(f"Export failed: {str(e)}")
+                return
+        extension, mime = FORMATS[fmt]
+        safe_sql = "".join(c for c in (sql or "query")[:20] if c.isalnum() or c in "_-")  # Short, safe name
+        try:
+            col2.download_button(
+                label=f"Download {rows:,} rows as {fmt}",
+                data=out.read(),
+                file_name=f"{safe_sql}_results{extension}",
+                mime=mime,
+                key="download_export"
+            )
+        finally:
+            exports.clear()  # Streamlit holds the bytes now; the spooled file is no longer needed
+
+    def render_bulk_load(self):
+        """Upload a CSV into a table with array-bound inserts, a batch per round trip."""
+        with st.expander("Load CSV into Table"):
+            upload = st.file_uploader("CSV file", type=["csv"], key="bulk_csv")
+            table = st.text_input("Target table", key="bulk_table")
+            col1, col2 = st.columns(2)
+            batch_rows = col1.number_input("Rows per batch", min_value=1, max_value=100000,
+                                           value=bulk_writer.BATCH_ROWS, key="bulk_batch_rows")
+            commit = col2.radio("Commit", ["After each batch", "Once at the end"], key="bulk_commit")
+            if upload is None or not table or not st.button("Load"):
+                return
+            progress = st.empty()
+            try:
+                header = pd.read_csv(upload, nrows=0).columns
+                upload.seek(0)
+                sql = bulk_writer.insert_sql(table, header)
+                chunks = pd.read_csv(upload, chunksize=int(batch_rows) * 10)
+                report = self.state.get_state("oracle").execute_many(
+                    sql, chunks, int(batch_rows), commit_each_batch=commit == "After each batch",
+                    on_batch=lambda r: progress.caption(f"Loaded {r['rows']:,} rows ({r['rows_per_sec']:,.0f} rows/s)...")
+                )
+            except Exception as e:
+                st.error(f"Load failed: {str(e)}")
+                return
+            progress.empty()
+            self.state.update_state("result_base", None)  # Local answers must not miss the new rows
+            st.success(f"Inserted {report['written']:,} of {report['rows']:,} rows into {table} in {report['seconds']:,.1f}s "
+                       f"({report['rows_per_sec']:,.0f} rows/s, {report['batches']:,} batches, {report['commits']:,} commits).")
+            if report["failed"]:
+                st.warning(f"{report['failed']:,} rows were rejected.")
+                st.dataframe(pd.DataFrame(report["errors"], columns=["Row", "Error"]), hide_index=True)
+
+    def _schema_context(self, request):
+        """Relevant tables from the schema catalog, or nothing while it is still loading."""
+        oracle = self.state.get_state("oracle")
+        if not oracle.is_connected:
+            return ""
+        catalog = get_catalog(oracle)
+        return catalog.relevant_schema(request) if catalog.ready.is_set() else ""
@@ -0,0 +1,77 @@
+from typing import Callable, Dict, List, Optional
+from analysis_engine import AnalysisEngine, TokenCallback
+from llm_cache import llm_cache
+
+# on_result(statement) runs on the calling thread as each suggestion completes
+ResultCallback = Callable[[Dict], None]
+
+
+def _statement_stats(statement: Dict) -> str:
+    return (
+        f"executions={statement['executions']}, "
+        f"elapsed per execution={statement['elapsed_per_exec'] / 1000:.1f} ms, "
+        f"buffer gets={statement['buffer_gets']}, disk reads={statement['disk_reads']}, "
+        f"rows processed={statement['rows_processed']}, child cursors={statement['child_cursors']}"
+    )
+
+
+class OptimizerEngine:
+    """Slow-statement tuning pipeline.
+
+    Harvests the top statements from V$SQL, fetches all of their plans in one round trip, answers
+    statements whose plan was already analyzed from the LLM cache, and sends the rest through the
+    concurrent AnalysisEngine.
+    """
+
+    def __init__(self, oracle_manager, groq_handler, max_concurrency: Optional[int] = None):
+        self.oracle = oracle_manager
+        self.groq = groq_handler
+        self.engine = AnalysisEngine(groq_handler, max_concurrency=max_concurrency,
+                                     system_prompt=groq_handler.optimizer_prompt)
+
+    def harvest(self, limit: int) -> List[Dict]:
+        """Top statements with their plans attached; nothing is sent to the LLM yet."""
+        statements = self.oracle.get_performance_data(limit)
+        plans = self.oracle.get_execution_plans(statements)
+        for statement in statements:
+            statement["plan"] = plans.get((statement["sql_id"], statement["plan_hash_value"]), "")
+            statement["suggestion"] = None
+            statement["cached"] = False
+            statement["error"] = None
+        return statements
+
+    def analyze(self, statements: List[Dict], on_token: Optional[TokenCallback] = None,
+                on_result: Optional[ResultCallback] = None) -> List[Dict]:
+        """Fill in `suggestion` (or `error`) for every statement, cached ones first."""
+        pending = {}
+        prompts = {}
+        for statement in statements:
+            cached = llm_cache.get(self.groq.optimization_key(statement["sql_text"], statement["plan_hash_value"]))
+            if cached is not None:
+                statement["suggestion"], statement["cached"] = cached[0], True
+                if on_result:
+                    on_result(statement)
+                continue
+            name = f"{statement['sql_id']}:{statement['plan_hash_value']}"
+            pending[name] = statement
+            prompts[name] = self.groq.optimization_prompt(
+                statement["sql_text"], statement["plan"], _statement_stats(statement)
+            )
+        if not prompts:
+            return statements
+
+        def finish(name, result, error):
+            statement = pending[name]
+            statement["suggestion"], statement["error"] = result, error
+            if result:
+                key = self.groq.optimization_key(statement["sql_text"], statement["plan_hash_value"])
+                # The statement's own request time, not the batch's: it is what a later hit saves
+                llm_cache.put(key, "optimize_sql", result, self.engine.elapsed.get(name, 0.0))
+            if on_result:
+                on_result(statement)
+
+        self.engine.run(prompts, on_token, finish)
+        return statements
+
+    def cancel(self):
+        self.engine.cancel()
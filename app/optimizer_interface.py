@@ -1,14 +1,48 @@
+import time
 import streamlit as st
+from optimizer_engine import OptimizerEngine
 
 class OptimizerInterface:
     def __init__(self, state_manager):
         self.state = state_manager
 
     def render(self):
+        limit = st.number_input("Statements to analyze", min_value=1, max_value=200, value=20)
         if st.button("Analyze Slow Queries"):
-            queries = self.state.get_state("oracle").get_performance_data()
-            for q in queries:
-                with st.expander(f"Query {q['sql_id']}"):
-                    st.code(q["sql_text"])
-                    optimized = self.state.get_state("groq").optimize_sql(q["sql_text"])
-                    st.markdown(f"**Optimization Suggestions:**\n{optimized}")
\ No newline at end of file
+            engine = OptimizerEngine(self.state.get_state("oracle"), self.state.get_state("groq"))
+            with st.spinner("Collecting top statements and plans..."):
+                statements = engine.harvest(int(limit))
+            if not statements:
+                st.info("No statements above the elapsed-time threshold were found in V$SQL.")
+            placeholders = {
+                f"{s['sql_id']}:{s['plan_hash_value']}": st.empty() for s in statements
+            }
+            last_render = {}
+
+            def show_tokens(name, text):
+                # Same throttling as the analysis buttons: a few updates per second per statement
+                now = time.monotonic()
+                if now - last_render.get(name, 0.0) >= 0.1:
+                    last_render[name] = now
+                    placeholders[name].markdown(f"**{name}** _(streaming...)_\n\n{text}")
+
+            def show_result(statement):
+                placeholders[f"{statement['sql_id']}:{statement['plan_hash_value']}"].empty()
+
+            with st.spinner(f"Analyzing {len(statements)} statements..."):
+                engine.analyze(statements, show_tokens, show_result)
+            self.state.update_state("optimizer_results", statements)
+
+        for q in self.state.get_state("optimizer_results") or []:
+            source = " (cached)" if q["cached"] else ""
+            with st.expander(f"Query {q['sql_id']} · plan {q['plan_hash_value']} · "
+                             f"{q['elapsed_per_exec'] / 1000:,.1f} ms/exec{source}"):
+                st.code(q["sql_text"], language="sql")
+                st.caption(f"{q['executions']:,} executions · {q['buffer_gets']:,} buffer gets · "
+                           f"{q['disk_reads']:,} disk reads · {q['child_cursors']} child cursors")
+                if q["plan"]:
+                    st.code(q["plan"])
+                if q["error"]:
+                    st.error(f"Analysis failed: {q['error']}")
+                else:
+                    st.markdown(f"**Optimization Suggestions:**\n{q['suggestion']}")
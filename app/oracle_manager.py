@@ -1,30 +1,74 @@
-import cx_Oracle
+import time
+from contextlib import contextmanager
 from typing import Optional, List, Dict
 import pandas as pd
+import bulk_writer
+from connection_pool import STMT_CACHE_SIZE, pool_registry
+from metrics_sampler import acquire_sampler, monitor_credentials, release_sampler, sampler_enabled
+from result_stream import ResultStream, DEFAULT_ARRAYSIZE, DEFAULT_CHUNK_ROWS
+from query_cache import query_cache
+from schema_catalog import get_catalog
+from sql_parser import referenced_tables, write_targets
+from tracing import tracer
 
 class OracleManager:
-    def __init__(self, host: str, port: int, service_name: str):
+    def __init__(self, host: str, port: int, service_name: str, driver=None,
+                 pooled: bool = False, pool_options: Optional[Dict] = None,
+                 arraysize: int = DEFAULT_ARRAYSIZE, prefetchrows: Optional[int] = None,
+                 result_cache=None):
         self.host = host
         self.port = port
         self.service_name = service_name
+        self._driver = driver  # Any module exposing the cx_Oracle API; cx_Oracle itself when None
+        self.pooled = pooled
+        self.pool_options = pool_options or {}
+        self.arraysize = arraysize  # Rows per fetch round trip
+        self.prefetchrows = prefetchrows if prefetchrows is not None else arraysize + 1
+        self.result_cache = result_cache or query_cache  # Shared across sessions by default
         self.conn = None
+        self.pool = None
+        self.username = None
+        self.sampler_key = None  # Set while this session keeps a metrics sampler running
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            import cx_Oracle  # Deferred until the first database call to keep app start-up fast
+            self._driver = cx_Oracle
+        return self._driver
+
+    @property
+    def is_connected(self) -> bool:
+        return self.conn is not None or self.pool is not None
+
+    @property
+    def identity(self) -> tuple:
+        """Database plus login; cached results are never shared across different users."""
+        return (self.host, int(self.port), self.service_name, (self.username or "").upper())
 
     def connect(self, username: str, password: str) -> bool:
-        """Establish connection to Oracle database."""
+        """Establish connection to Oracle database (or join the shared session pool)."""
         try:
-            self.conn = cx_Oracle.connect(
-                user=username,
-                password=password,
-                dsn=cx_Oracle.makedsn(
+            if self.pooled:
+                self.pool = pool_registry.get_pool(
+                    self.driver,
                     self.host,
                     self.port,
-                    service_name=self.service_name
+                    self.service_name,
+                    username,
+                    password,
+                    **self.pool_options
                 )
-            )
+            else:
+                self.conn = self.open_connection(username, password)
+            self.username = username
+            get_catalog(self)  # Starts loading the schema catalog in the background
+            if sampler_enabled():
+                self.join_sampler()
             print("Connection successful.")
             return True
 
-        except cx_Oracle.DatabaseError as e:
+        except self.driver.DatabaseError as e:
             error = e.args[0]
             print(f"Oracle Connection Error: ORA-{error.code}: {error.message}")
             return False
@@ -35,78 +79,334 @@ class OracleManager:
             print(f"General Connection Error: {str(e)}")
             return False
 
-    # Rest of the methods remain unchanged
-    def execute_query(self, sql: str) -> pd.DataFrame:
+    def join_sampler(self):
+        """Join the metrics sampler for this session's view of the database. With a monitoring login
+        configured, every session shares one sampler whose ticks borrow from a small pool for that
+        login; otherwise each user gets their own, borrowing from their session pool. A dedicated
+        connection would mean keeping the password, so unpooled sessions without a monitoring
+        login don't sample."""
+        credentials = monitor_credentials()
+        pool = self.pool
+        key = self.identity
+        try:
+            if credentials is not None:
+                pool = pool_registry.get_pool(self.driver, self.host, self.port, self.service_name,
+                                              *credentials, min_size=1, max_size=1)
+                key = pool.key
+            if acquire_sampler(key, pool) is not None:
+                self.sampler_key = key
+        except Exception as e:
+            print(f"Metrics sampler not started: {str(e)}")  # The session itself is fine
+
+    def open_connection(self, username: str, password: str):
+        """A new dedicated connection, outside any pool."""
+        conn = self.driver.connect(
+            user=username,
+            password=password,
+            threaded=True,  # The schema catalog loads on a background thread
+            dsn=self.driver.makedsn(
+                self.host,
+                self.port,
+                service_name=self.service_name
+            )
+        )
+        conn.stmtcachesize = STMT_CACHE_SIZE
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Yield the dedicated connection, or borrow one from the pool for the block."""
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        elif self.conn is not None:
+            yield self.conn
+        else:
+            raise Exception("No active connection to the database.")
+
+    def pool_stats(self) -> Optional[Dict]:
+        """Busy/open/wait statistics for the pool this manager borrows from."""
+        return self.pool.stats() if self.pool is not None else None
+
+    @contextmanager
+    def stream_query(self, sql: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                     chunk_rows: int = DEFAULT_CHUNK_ROWS, arraysize: Optional[int] = None,
+                     prefetchrows: Optional[int] = None, call_timeout_ms: Optional[int] = None,
+                     on_connection=None, params: Optional[Dict] = None):
+        """Execute a query and yield a ResultStream of DataFrame chunks fetched with fetchmany.
+
+        The connection stays borrowed until the block exits, so consume the stream inside it.
+        `call_timeout_ms` bounds every round trip; `on_connection` receives the connection
+        before the query starts, e.g. so another thread can `cancel()` it.
+        """
+        sql = sql.rstrip(";")
+        with self._connection() as conn:
+            previous_timeout = conn.callTimeout
+            if call_timeout_ms:
+                conn.callTimeout = int(call_timeout_ms)
+            try:
+                if on_connection:
+                    on_connection(conn)
+                with conn.cursor() as cursor:
+                    cursor.arraysize = arraysize or self.arraysize
+                    cursor.prefetchrows = prefetchrows if prefetchrows is not None else self.prefetchrows
+                    with tracer.span("execute_query.execute"):
+                        cursor.execute(sql, params or {})
+                    yield ResultStream(cursor, self.driver, chunk_rows, max_rows, max_bytes)
+            finally:
+                conn.callTimeout = previous_timeout  # Pooled sessions must not keep a job's timeout
+
+    def execute_query(self, sql: str, max_rows: Optional[int] = None, max_bytes: Optional[int] = None,
+                      on_chunk=None, use_cache: bool = True, call_timeout_ms: Optional[int] = None,
+                      on_connection=None, params: Optional[Dict] = None) -> pd.DataFrame:
+        """Run a query into one DataFrame; `df.attrs["truncated"]` is set when a budget cut it short.
+
+        Results are served from the shared result cache when possible; `on_chunk` is called
+        with each DataFrame chunk as it is fetched from the database.
+        """
+        with tracer.span("execute_query") as span:
+            binds = tuple(sorted(params.items())) if params else None
+            key = self.result_cache.make_key(self.identity, sql, max_rows, max_bytes, binds)
+            if use_cache:
+                cached = self.result_cache.get(key)
+                if cached is not None:
+                    span.set(cached=True, rows=len(cached))
+                    return cached
+            try:
+                with self.stream_query(sql, max_rows, max_bytes, call_timeout_ms=call_timeout_ms,
+                                       on_connection=on_connection, params=params) as stream:
+                    df = stream.read_all(on_chunk)
+                    tracer.record("execute_query.fetch", stream.fetch_seconds, rows=stream.rows_fetched)
+                    tracer.record("execute_query.build", stream.build_seconds, bytes=stream.bytes_fetched)
+            except self.driver.DatabaseError as e:
+                error = e.args[0]
+                raise Exception(f"Oracle Execution Error: ORA-{error.code}: {error.message}")
+            except Exception as e:
+                raise Exception(f"General Execution Error: {str(e)}")
+            span.set(cached=False, rows=len(df), bytes=stream.bytes_fetched, truncated=stream.truncated)
+            if use_cache:
+                self.result_cache.put(key, df)
+            return df
+
+    def execute_ddl_dml(self, sql: str) -> str:
         try:
-            if not self.conn:
-                raise Exception("No active connection to the database.")
             sql = sql.rstrip(";")
-            with self.conn.cursor() as cursor:
+            with self._connection() as conn, conn.cursor() as cursor:
                 cursor.execute(sql)
-                if cursor.description:
-                    columns = [col[0] for col in cursor.description]
-                    return pd.DataFrame(cursor.fetchall(), columns=columns)
-                return pd.DataFrame()
-        except cx_Oracle.DatabaseError as e:
+                conn.commit()
+                row_count = cursor.rowcount
+            # Anything that might have read the modified table is now stale
+            self.result_cache.invalidate(self.identity[:3], write_targets(sql, self.username))
+            return f"DDL/DML executed successfully. Rows affected: {row_count}"
+        except self.driver.DatabaseError as e:
             error = e.args[0]
             raise Exception(f"Oracle Execution Error: ORA-{error.code}: {error.message}")
         except Exception as e:
             raise Exception(f"General Execution Error: {str(e)}")
 
-    def execute_ddl_dml(self, sql: str) -> str:
+    def execute_many(self, sql: str, data: bulk_writer.Rows, batch_rows: Optional[int] = None,
+                     commit_each_batch: bool = True, on_batch=None) -> Dict:
+        """Run one parameterized DML statement for many rows with array binding.
+
+        `data` is a DataFrame, an iterable of DataFrame chunks or an iterable of row sequences.
+        Each batch is one executemany round trip with batcherrors, so failing rows are collected
+        instead of aborting the load. Commits after every batch, or once at the end when
+        `commit_each_batch` is False (nothing is kept if a batch fails outright). `on_batch`
+        receives the running report after each batch.
+        """
+        batch_rows = batch_rows or bulk_writer.BATCH_ROWS
+        sql = sql.rstrip(";")
+        report = {"rows": 0, "written": 0, "failed": 0, "errors": [], "batches": 0, "commits": 0,
+                  "seconds": 0.0, "rows_per_sec": 0.0}
+        start = time.perf_counter()
         try:
-            if not self.conn:
-                raise Exception("No active connection to the database.")
-            sql = sql.rstrip(";")
-            with self.conn.cursor() as cursor:
-                cursor.execute(sql)
-                self.conn.commit()
-                row_count = cursor.rowcount
-                return f"DDL/DML executed successfully. Rows affected: {row_count}"
-        except cx_Oracle.DatabaseError as e:
+            with self._connection() as conn, conn.cursor() as cursor:
+                bound_sizes = None
+                try:
+                    for rows, sizes in bulk_writer.batches(data, batch_rows, self.driver):
+                        if sizes is not None:
+                            # Grow string binds to the longest value seen so later batches don't shrink them
+                            if bound_sizes is not None and len(bound_sizes) == len(sizes):
+                                sizes = [max(a, b) if isinstance(a, int) and isinstance(b, int) else b
+                                         for a, b in zip(bound_sizes, sizes)]
+                            if sizes != bound_sizes:
+                                cursor.setinputsizes(*sizes)
+                                bound_sizes = sizes
+                        cursor.executemany(sql, rows, batcherrors=True)
+                        errors = cursor.getbatcherrors()
+                        for error in errors[:max(bulk_writer.MAX_ERRORS - len(report["errors"]), 0)]:
+                            report["errors"].append((report["rows"] + error.offset, error.message))
+                        report["rows"] += len(rows)
+                        report["failed"] += len(errors)
+                        report["written"] += len(rows) - len(errors)
+                        report["batches"] += 1
+                        if commit_each_batch:
+                            conn.commit()
+                            report["commits"] += 1
+                        report["seconds"] = time.perf_counter() - start
+                        report["rows_per_sec"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+                        if on_batch:
+                            on_batch(report)
+                    if not commit_each_batch:
+                        conn.commit()
+                        report["commits"] += 1
+                except Exception:
+                    conn.rollback()  # Uncommitted batches must not linger on a pooled session
+                    raise
+        except self.driver.DatabaseError as e:
             error = e.args[0]
             raise Exception(f"Oracle Execution Error: ORA-{error.code}: {error.message}")
         except Exception as e:
             raise Exception(f"General Execution Error: {str(e)}")
+        finally:
+            if report["batches"]:
+                self.result_cache.invalidate(self.identity[:3], write_targets(sql, self.username))
+        report["seconds"] = time.perf_counter() - start
+        report["rows_per_sec"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+        return report
+
+    def get_performance_data(self, limit: int = 50, min_elapsed_us: int = 1000000) -> List[Dict]:
+        """Top statements by elapsed time per execution, one row per sql_id and plan.
 
-    def get_performance_data(self) -> List[Dict]:
+        Child cursors created by bind peeking or environment differences are summed into their
+        plan, and literal-only variants (same force_matching_signature) keep just the costliest.
+        """
         try:
-            with self.conn.cursor() as cursor:
-                cursor.execute("""
-                    SELECT sql_id, sql_text, elapsed_time, executions
-                    FROM V$SQL 
-                    WHERE elapsed_time > 1000000
-                    ORDER BY elapsed_time DESC
-                """)
-                return [
-                    dict(zip(["sql_id", "sql_text", "elapsed_time", "executions"], row))
-                    for row in cursor.fetchall()
-                ]
-        except cx_Oracle.DatabaseError as e:
+            rows = self.fetch_rows(
+                """
+                SELECT sql_id, plan_hash_value, MAX(DBMS_LOB.SUBSTR(sql_fulltext, 4000, 1)),
+                       SUM(elapsed_time), SUM(executions),
+                       SUM(elapsed_time) / SUM(executions), SUM(buffer_gets), SUM(disk_reads),
+                       SUM(rows_processed), COUNT(*), MAX(force_matching_signature)
+                FROM v$sql
+                WHERE executions > 0
+                GROUP BY sql_id, plan_hash_value
+                HAVING SUM(elapsed_time) > :min_elapsed
+                ORDER BY SUM(elapsed_time) / SUM(executions) DESC
+                FETCH FIRST :limit ROWS ONLY
+                """,
+                {"min_elapsed": min_elapsed_us, "limit": limit * 2}
+            )
+        except self.driver.DatabaseError as e:
             error = e.args[0]
             print(f"Performance Data Error: ORA-{error.code}: {error.message}")
             return []
+        columns = ["sql_id", "plan_hash_value", "sql_text", "elapsed_time", "executions", "elapsed_per_exec",
+                   "buffer_gets", "disk_reads", "rows_processed", "child_cursors"]
+        statements, signatures = [], set()
+        for row in rows:
+            signature = row[-1]
+            if signature and signature in signatures:
+                continue  # Same statement with different literals; the costlier one is already listed
+            signatures.add(signature)
+            statements.append(dict(zip(columns, row)))
+            if len(statements) == limit:
+                break
+        return statements
+
+    def get_execution_plans(self, statements: List[Dict]) -> Dict[tuple, str]:
+        """Plans for (sql_id, plan_hash_value) pairs from V$SQL_PLAN in one round trip, as indented text."""
+        if not statements:
+            return {}
+        binds = {f"s{i}": statement["sql_id"] for i, statement in enumerate(statements)}
+        placeholders = ", ".join(f":{name}" for name in binds)
+        try:
+            rows = self.fetch_rows(
+                f"""
+                SELECT sql_id, plan_hash_value, id, depth, operation, options, object_owner, object_name,
+                       cost, cardinality, access_predicates, filter_predicates
+                FROM v$sql_plan
+                WHERE (sql_id, plan_hash_value, child_number) IN (
+                    SELECT sql_id, plan_hash_value, MIN(child_number)
+                    FROM v$sql_plan
+                    WHERE sql_id IN ({placeholders})
+                    GROUP BY sql_id, plan_hash_value
+                )
+                ORDER BY sql_id, plan_hash_value, id
+                """,
+                binds
+            )
+        except self.driver.DatabaseError as e:
+            error = e.args[0]
+            print(f"Execution Plan Error: ORA-{error.code}: {error.message}")
+            return {}
+        plans: Dict[tuple, List[str]] = {}
+        for sql_id, plan_hash, step, depth, operation, options, owner, name, cost, rows_, access, filters in rows:
+            line = f"{step:>3} {'  ' * (depth or 0)}{operation}{' ' + options if options else ''}"
+            if name:
+                line += f" {owner}.{name}" if owner else f" {name}"
+            if cost is not None:
+                line += f"  cost={cost}"
+            if rows_ is not None:
+                line += f" rows={rows_}"
+            if access:
+                line += f"  access: {access}"
+            if filters:
+                line += f"  filter: {filters}"
+            plans.setdefault((sql_id, plan_hash), []).append(line)
+        return {key: "\n".join(lines) for key, lines in plans.items()}
+
+    def fetch_rows(self, sql: str, params: Optional[Dict] = None) -> List[tuple]:
+        """Run a small query with bind variables and return its rows as tuples."""
+        with self._connection() as conn, conn.cursor() as cursor:
+            cursor.arraysize = self.arraysize
+            cursor.execute(sql, params or {})
+            return cursor.fetchall()
 
     def get_table_metadata(self, sql: str) -> Optional[pd.DataFrame]:
+        """Columns of a table the query reads, from the schema catalog when it has the table.
+
+        The catalog holds the user's tables as of its last refresh, so anything else (synonyms,
+        views in other schemas, tables created since) is looked up in the data dictionary.
+        """
         try:
-            table_name = sql.split("FROM")[1].split()[0]
-            metadata_query = f"""
+            tables = referenced_tables(sql, self.username)
+            if not tables:
+                return None
+            table_name = sorted(tables)[0]
+            metadata = get_catalog(self).table_metadata(table_name, self.username)
+            if metadata is not None:
+                return metadata
+            owner, name = table_name.split(".", 1)
+            rows = self.fetch_rows(
+                """
                 SELECT column_name, data_type, data_length
                 FROM all_tab_columns
-                WHERE table_name = UPPER('{table_name}')
-            """
-            with self.conn.cursor() as cursor:
-                cursor.execute(metadata_query)
-                columns = [col[0] for col in cursor.description]
-                return pd.DataFrame(cursor.fetchall(), columns=columns)
+                WHERE owner = :owner AND table_name = :name
+                ORDER BY column_id
+                """,
+                {"owner": owner, "name": name}
+            )
+            if not rows:
+                # A private synonym wins over a public one, as in name resolution
+                rows = self.fetch_rows(
+                    """
+                    SELECT column_name, data_type, data_length FROM (
+                        SELECT c.column_name, c.data_type, c.data_length, c.column_id,
+                               DENSE_RANK() OVER (ORDER BY DECODE(s.owner, 'PUBLIC', 2, 1)) AS preference
+                        FROM all_synonyms s
+                        JOIN all_tab_columns c ON c.owner = s.table_owner AND c.table_name = s.table_name
+                        WHERE s.synonym_name = :name AND s.owner IN (:owner, 'PUBLIC')
+                    )
+                    WHERE preference = 1
+                    ORDER BY column_id
+                    """,
+                    {"owner": owner, "name": name}
+                )
+            return pd.DataFrame(rows, columns=["COLUMN_NAME", "DATA_TYPE", "DATA_LENGTH"])
         except Exception as e:
             print(f"Error fetching metadata: {str(e)}")
             return None
 
     def close(self):
+        if self.sampler_key is not None:
+            release_sampler(self.sampler_key)
+            self.sampler_key = None
         if self.conn:
             self.conn.close()
             self.conn = None
+        # The pool is shared process-wide; this session just stops borrowing from it
+        self.pool = None
 
     def __enter__(self):
         return self
@@ -0,0 +1,53 @@
+import datetime
+import streamlit as st
+import pandas as pd
+from tracing import tracer, EXPORT_FORMAT, EXPORT_PATH
+
+SLOWEST_SPANS = 25
+
+
+class PerformanceInterface:
+    def __init__(self, state_manager):
+        self.state = state_manager
+
+    def render(self):
+        st.subheader("Performance")
+        if not tracer.enabled:
+            st.info("Tracing is off (set TRACING_ENABLED=true and restart).")
+            return
+        st.button("Refresh", key="performance_refresh")
+        self.render_summary()
+        self.render_slowest()
+        self.render_export()
+
+    def render_summary(self):
+        """Latency percentiles per operation across all sessions, from the last 1024 of each."""
+        summary = tracer.summary()
+        if not summary:
+            st.info("Nothing has been traced yet.")
+            return
+        df = pd.DataFrame(summary).set_index("span")
+        st.dataframe(df.style.format(precision=1, thousands=","), use_container_width=True)
+
+    def render_slowest(self):
+        st.markdown("**Slowest recent operations**")
+        rows = [{
+            "started": datetime.datetime.fromtimestamp(span.start_ns / 1e9).strftime("%H:%M:%S"),
+            "span": span.name,
+            "ms": span.seconds * 1000,
+            "error": span.error or "",
+            "details": ", ".join(f"{key}={value}" for key, value in span.attributes.items()),
+        } for span in tracer.slowest(SLOWEST_SPANS)]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+    def render_export(self):
+        """Payloads are built only in the rerun where they were asked for, so ordinary reruns don't
+        serialize every recent span and resend it to the browser."""
+        if EXPORT_PATH:
+            st.caption(f"Also written to {EXPORT_PATH} ({EXPORT_FORMAT}) in the background.")
+        if not st.button("Prepare trace export", key="performance_export"):
+            return
+        col1, col2 = st.columns(2)
+        col1.download_button("Download Prometheus metrics", tracer.prometheus(), "dataquest.prom", "text/plain")
+        col2.download_button("Download recent spans (OTLP JSON)", tracer.otlp(tracer.spans()),
+                             "dataquest-spans.json", "application/json")
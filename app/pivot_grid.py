@@ -0,0 +1,103 @@
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from frame_memo import FrameMemo
+
+AGGREGATES = ["mean", "sum", "count", "min", "max"]
+OTHER = "Other"
+
+_grid_cache = FrameMemo()  # Grids and axis codes per result
+
+
+def axis_codes(series: pd.Series, top_k: Optional[int] = None) -> Tuple[np.ndarray, list]:
+    """Integer code per row (-1 for missing) and the sorted labels they index.
+
+    Only labels that occur get a code. With `top_k`, only the most frequent labels keep a code
+    of their own; the rest share a trailing "Other" bucket.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Results keep repetitive text as categoricals, whose codes come for free
+        categories = series.cat.categories
+        order = categories.argsort()
+        rank = np.empty(len(order) + 1, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        rank[-1] = -1
+        codes, labels = rank[series.cat.codes.to_numpy()], list(categories[order])
+    else:
+        codes, labels = pd.factorize(series, sort=True)
+        labels = list(labels)
+    counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+    keep = np.flatnonzero(counts)
+    other = top_k is not None and len(keep) > top_k
+    if other:
+        keep = np.sort(keep[np.argsort(counts[keep], kind="stable")[::-1][:top_k]])
+    elif len(keep) == len(labels):
+        return codes, labels
+    remap = np.full(len(labels) + 1, len(keep) if other else -1, dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+    remap[-1] = -1  # Missing stays missing (codes of -1 index the last slot)
+    if other:
+        return remap[codes], [str(labels[i]) for i in keep] + [OTHER]
+    return remap[codes], [labels[i] for i in keep]
+
+
+def _grid(x_axis: Tuple[np.ndarray, list], y_axis: Tuple[np.ndarray, list], values: pd.Series,
+          agg: str, names: Tuple[str, str]) -> pd.DataFrame:
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unsupported aggregate: {agg}")
+    if agg != "count" and not pd.api.types.is_numeric_dtype(values):
+        raise ValueError(f"Cannot compute {agg} of non-numeric column {values.name}")
+    (x_codes, x_labels), (y_codes, y_labels) = x_axis, y_axis
+    valid = (x_codes >= 0) & (y_codes >= 0) & values.notna().to_numpy()
+    cells = y_codes[valid] * len(x_labels) + x_codes[valid]
+    size = len(y_labels) * len(x_labels)
+    counts = np.bincount(cells, minlength=size)
+    if agg == "count":
+        grid = counts.astype(float)
+    else:
+        v = values.to_numpy(dtype=float, na_value=np.nan)[valid]
+        if agg in ("sum", "mean"):
+            grid = np.bincount(cells, weights=v, minlength=size)
+            if agg == "mean":
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    grid = grid / counts
+        else:
+            grid = np.full(size, np.inf if agg == "min" else -np.inf)
+            (np.minimum if agg == "min" else np.maximum).at(grid, cells, v)
+    grid = np.where(counts > 0, grid, np.nan)
+    x_name, y_name = names
+    return pd.DataFrame(grid.reshape(len(y_labels), len(x_labels)),
+                        index=pd.Index(y_labels, name=y_name), columns=pd.Index(x_labels, name=x_name))
+
+
+def pivot_grid(df: pd.DataFrame, x: str, y: str, value: str, agg: str = "mean",
+               top_k: Optional[int] = None) -> pd.DataFrame:
+    """Aggregate `value` over the (y, x) grid like `pivot_table`, using integer codes and bincount.
+
+    Rows with a missing x, y or value are ignored and empty cells are NaN. Each axis is capped at
+    `top_k` labels plus "Other" when given.
+    """
+    return _grid(axis_codes(df[x], top_k), axis_codes(df[y], top_k), df[value], agg, (x, y))
+
+
+def cached_pivot_grid(df: pd.DataFrame, sql: Optional[str], x: str, y: str, value: str, agg: str = "mean",
+                      top_k: Optional[int] = None) -> pd.DataFrame:
+    """`pivot_grid` memoized per result DataFrame, so pressing the button again reuses the grid.
+
+    The factorized axes are memoized too, so switching the value column or aggregate is cheap.
+    """
+    key = (sql, x, y, value, agg, top_k)
+    grid = _grid_cache.get(df, key)
+    if grid is not None:
+        return grid
+    # Axis codes are shared by every grid over the same columns, whatever the value or aggregate
+    axes = []
+    for column in (x, y):
+        codes = _grid_cache.get(df, ("codes", column, top_k))
+        if codes is None:
+            codes = axis_codes(df[column], top_k)
+            _grid_cache.put(df, ("codes", column, top_k), codes)
+        axes.append(codes)
+    grid = _grid(axes[0], axes[1], df[value], agg, (x, y))
+    _grid_cache.put(df, key, grid)
+    return grid
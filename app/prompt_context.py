@@ -0,0 +1,193 @@
+import logging
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from frame_memo import FrameMemo
+
+# Tokens of data context allowed per prompt, leaving room for instructions and the answer
+MODEL_TOKEN_BUDGETS = {
+    "qwen-2.5-coder-32b": 6000,
+    "mistral-saba-24b": 6000,
+    "llama-3.3-70b-specdec": 3000,
+    "mixtral-8x7b-32768": 8000,
+    "gemma2-9b-it": 3000,
+}
+DEFAULT_TOKEN_BUDGET = 3000
+
+TOP_K = 5
+MAX_SAMPLE_ROWS = 40
+MAX_CELL_CHARS = 40
+MAX_CORRELATION_COLUMNS = 30
+
+_encoder = None
+_encoder_failed = False
+_context_cache = FrameMemo()  # Built context per result and token budget
+
+
+def token_budget(model: str) -> int:
+    return MODEL_TOKEN_BUDGETS.get(model, DEFAULT_TOKEN_BUDGET)
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when its encoding is available, else a ~4 chars/token estimate."""
+    global _encoder, _encoder_failed
+    if _encoder is None and not _encoder_failed:
+        try:
+            import tiktoken
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:  # Missing package or no network to fetch the encoding
+            logging.info(f"tiktoken unavailable, estimating tokens from length: {str(e)}")
+            _encoder_failed = True
+    if _encoder is not None:
+        return len(_encoder.encode(text))
+    return len(text) // 4 + 1
+
+
+def build_data_context(df: pd.DataFrame, budget: int) -> str:
+    """Compact description of the whole DataFrame that fits in `budget` tokens.
+
+    Every statistic is computed over all rows; only the sample rows are a subset.
+    The result is memoized per DataFrame object and budget, so reruns don't rebuild it.
+    """
+    cached = _context_cache.get(df, budget)
+    if cached is not None:
+        return cached
+
+    header = f"Rows: {len(df):,}  Columns: {df.shape[1]}"
+    profile = _profile_table(df)
+    categories = _top_categories(df)
+    correlations = _top_correlations(df)
+    sections = [header, "Column profile:\n" + profile]
+    if categories:
+        sections.append("Most frequent values:\n" + categories)
+    if correlations:
+        sections.append("Strongest correlations:\n" + correlations)
+
+    # Drop optional sections until the fixed part fits, then fill what's left with sample rows
+    while count_tokens("\n\n".join(sections)) > budget and len(sections) > 2:
+        sections.pop()
+    text = "\n\n".join(sections)
+    remaining = budget - count_tokens(text)
+    rows = min(MAX_SAMPLE_ROWS, len(df))
+    while rows > 0:
+        sample = "Sample rows (CSV):\n" + _sample_csv(df, rows)
+        if count_tokens(sample) <= remaining:
+            text += "\n\n" + sample
+            break
+        rows //= 2
+
+    _context_cache.put(df, budget, text)
+    return text
+
+
+def _profile_table(df: pd.DataFrame) -> str:
+    nulls = df.isna().sum()
+    numeric = df.select_dtypes(include="number")
+    quantiles = numeric.quantile([0.0, 0.25, 0.5, 0.75, 1.0]) if not numeric.empty else None
+    means = numeric.mean() if not numeric.empty else None
+    lines = ["| column | dtype | nulls | distinct | min | p25 | median | p75 | max | mean |",
+             "|---|---|---|---|---|---|---|---|---|---|"]
+    for position, name in enumerate(df.columns):
+        column = df.iloc[:, position]
+        stats = ["", "", "", "", "", ""]
+        if quantiles is not None and name in quantiles.columns and not column.isna().all():
+            q = quantiles[name]
+            q = q.iloc[:, 0] if isinstance(q, pd.DataFrame) else q
+            mean = means[name]
+            mean = mean.iloc[0] if isinstance(mean, pd.Series) else mean
+            stats = [_fmt(v) for v in q.tolist()] + [_fmt(mean)]
+        elif pd.api.types.is_datetime64_any_dtype(column):
+            stats = [_fmt(column.min()), "", "", "", _fmt(column.max()), ""]
+        try:
+            distinct = str(column.nunique())
+        except TypeError:
+            distinct = ""
+        lines.append(f"| {name} | {column.dtype} | {int(nulls.iloc[position])} | {distinct} | " + " | ".join(stats) + " |")
+    return "\n".join(lines)
+
+
+def _top_categories(df: pd.DataFrame) -> str:
+    lines = []
+    for position, name in enumerate(df.columns):
+        column = df.iloc[:, position]
+        if _is_measure(column):
+            continue
+        try:
+            counts = column.value_counts(dropna=True).head(TOP_K)
+        except TypeError:
+            continue
+        counts = counts[counts > 0]
+        if counts.empty or counts.iloc[0] == 1:
+            continue  # Unique values say nothing the sample rows don't
+        values = ", ".join(f"{_clip(value)} ({count})" for value, count in counts.items())
+        lines.append(f"- {name}: {values}")
+    return "\n".join(lines)
+
+
+def _top_correlations(df: pd.DataFrame) -> str:
+    numeric = df.select_dtypes(include="number").iloc[:, :MAX_CORRELATION_COLUMNS]
+    numeric = numeric.loc[:, ~numeric.columns.duplicated()]
+    if numeric.shape[1] < 2 or len(numeric) < 3:
+        return ""
+    corr = numeric.astype(float).corr().to_numpy()
+    upper = np.triu_indices_from(corr, k=1)
+    values = corr[upper]
+    valid = ~np.isnan(values)
+    order = np.argsort(-np.abs(values[valid]))[:TOP_K]
+    names = numeric.columns
+    pairs = list(zip(upper[0][valid][order], upper[1][valid][order], values[valid][order]))
+    return "\n".join(f"- {names[i]} ~ {names[j]}: {r:+.2f}" for i, j, r in pairs)
+
+
+def _sample_csv(df: pd.DataFrame, rows: int) -> str:
+    """Rows spread across the lowest-cardinality text column (if any) and across the result."""
+    sample = df.iloc[_stratified_positions(df, rows)]
+    clipped = sample.apply(lambda column: column if _is_measure(column) else column.astype(object).map(_clip))
+    return clipped.to_csv(index=False).strip()
+
+
+def _stratified_positions(df: pd.DataFrame, rows: int) -> List[int]:
+    if rows >= len(df):
+        return list(range(len(df)))
+    strata: Optional[pd.Series] = None
+    best = None
+    for position in range(df.shape[1]):
+        column = df.iloc[:, position]
+        if _is_measure(column):
+            continue
+        try:
+            distinct = column.nunique()
+        except TypeError:
+            continue
+        if 1 < distinct <= rows and (best is None or distinct < best):
+            best, strata = distinct, column
+    if strata is None:
+        return np.linspace(0, len(df) - 1, rows).astype(int).tolist()
+    # Evenly spaced rows within each group, in proportion to group size (at least one each)
+    codes, _ = pd.factorize(strata, use_na_sentinel=False)
+    groups = [np.flatnonzero(codes == code) for code in range(codes.max() + 1)]
+    positions = []
+    for members in groups:
+        take = max(1, round(rows * len(members) / len(df)))
+        positions.extend(members[np.linspace(0, len(members) - 1, min(take, len(members))).astype(int)])
+    positions = np.sort(np.array(positions))
+    if len(positions) > rows:
+        positions = positions[np.linspace(0, len(positions) - 1, rows).astype(int)]
+    return positions.tolist()
+
+
+def _is_measure(column: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column)
+
+
+def _clip(value) -> str:
+    text = str(value)
+    return text if len(text) <= MAX_CELL_CHARS else text[:MAX_CELL_CHARS - 3] + "..."
+
+
+def _fmt(value) -> str:
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, (float, np.floating)):
+        return f"{value:.6g}"
+    return str(value)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import pandas as pd
+from sql_parser import identifiers, normalize_sql
+
+
+class QueryResultCache:
+    """Process-wide LRU of SELECT results, bounded by total bytes and a per-entry TTL.
+
+    Entries are keyed by normalized SQL plus the connection identity, so two users never
+    share results. Invalidation is deliberately conservative: a write to table T drops
+    every entry on that database whose SQL mentions T anywhere.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, ttl: float = 300.0, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(identity: Tuple, sql: str, *options) -> Tuple:
+        return (identity, normalize_sql(sql)) + options
+
+    def get(self, key: Tuple) -> Optional[pd.DataFrame]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires_at"] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["df"].copy(deep=False)
+
+    def put(self, key: Tuple, df: pd.DataFrame):
+        if not self.enabled:
+            return
+        nbytes = int(df.memory_usage(deep=True).sum())
+        if nbytes > self.max_bytes:
+            return  # Never let one result flush the whole cache
+        identity, sql = key[0], key[1]
+        entry = {
+            "df": df,
+            "bytes": nbytes,
+            "database": identity[:3],
+            "words": identifiers(sql),
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = entry
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, database: Tuple, tables: Optional[Iterable[str]]):
+        """Drop entries on `database` that may read any of `tables` (all of them when None)."""
+        names = None if tables is None else {table.split(".")[-1] for table in tables}
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if entry["database"] == database and (names is None or names & entry["words"])
+            ]
+            for key in stale:
+                self._drop(key)
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _drop(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry["bytes"]
+
+
+query_cache = QueryResultCache(
+    max_bytes=int(os.getenv("QUERY_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", "300")),
+    enabled=os.getenv("QUERY_CACHE_ENABLED", "true").lower() == "true",
+)
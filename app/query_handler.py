@@ -1,43 +1,137 @@
 import streamlit as st
 import pandas as pd
+import os
+import time
+from analysis_engine import AnalysisEngine
+from prompt_context import build_data_context, token_budget
+from result_stream import fetch_limits_from_env
+from sql_parser import classify
+from bind_rewriter import bind_rewriter
+from local_query import answer_locally
+from query_jobs import query_executor, DONE, CANCELLED, TIMED_OUT
+
+JOB_POLL_SECONDS = float(os.getenv("QUERY_POLL_INTERVAL", "0.5"))  # Pause between reruns while a query runs
+
+# Analysis type -> (prompt instructions, message shown when the model returns nothing)
+ANALYSES = {
+    "Insights": (
+        "Provide 5 insights about trends, patterns, or anomalies in this data in points.\n"
+        "        Don't give any SQL queries, just insights.",
+        "No insights received from AI."
+    ),
+    "Additional SQL Queries": (
+        "Provide additional Oracle 21c SQL queries to dig deeper into this data, along with a description of their purpose.",
+        "No SQL queries received from AI."
+    ),
+    "Visualization Suggestions": (
+        "Suggest visualizations (e.g., Bar Chart, Line Chart, Scatter Plot, Pie Chart, Histogram, Box Plot, Heatmap) "
+        "that might help understand this data better.",
+        "No visualization suggestions received from AI."
+    ),
+}
 
 class QueryHandler:
     def __init__(self, state_manager):
         self.state = state_manager
-        self.row_limit = 200  # Define row limit for LLM context
+        self.fetch_limits = fetch_limits_from_env()  # Row/byte budget for interactive results
 
     def execute_query(self, sql):
         """Execute SQL and persist results or output based on type."""
+        is_ddl_dml = False
         try:
+            is_ddl_dml = not classify(sql).is_query  # Same cached verdict the security check uses
             if self.state.get_state("security").sanitize_input(sql):
-                sql_upper = sql.upper().strip()
-                is_ddl_dml = not sql_upper.startswith("SELECT")
-                
                 if is_ddl_dml and self.state.get_state("ddl_dml_enabled"):
                     output = self.state.get_state("oracle").execute_ddl_dml(sql)
                     self.state.update_state("ddl_dml_output", output)
                     self.state.update_state("query_df", None)
                     self.state.update_state("executed_sql", None)
                     self.state.update_state("analysis_results", None)
+                    self.state.update_state("result_base", None)  # The data it held may have changed
                     st.experimental_rerun()
+                elif self.answer_locally(sql):
+                    return
                 else:
-                    df = self.state.get_state("oracle").execute_query(sql)
-                    if not df.empty:
-                        self.state.update_state("executed_sql", sql)
-                        self.state.update_state("query_df", df)
-                        self.state.update_state("analysis_result", None)
-                        self.state.update_state("show_analysis", False)
-                        self.state.update_state("analysis_results", None)
-                        self.state.update_state("ddl_dml_output", None)
-                        st.experimental_rerun()
-                    else:
-                        self.handle_empty_query(sql)
-                        self.state.update_state("ddl_dml_output", None)
+                    # Literals become binds (when enabled) so value variants share one cursor
+                    statement, params = bind_rewriter.rewrite(sql)
+                    # Runs on a worker; reruns (including identical submissions) re-attach to the same job.
+                    # The page's follow_job call shows its progress.
+                    job = query_executor.submit(self.state.get_state("oracle"), sql, statement=statement,
+                                                params=params, **self.fetch_limits)
+                    self.state.update_state("query_job", job.id)
         except Exception as e:
             st.error(f"Execution error: {str(e)}")
-            if self.state.get_state("ddl_dml_enabled") and not sql_upper.startswith("SELECT"):
+            if self.state.get_state("ddl_dml_enabled") and is_ddl_dml:
                 self.state.update_state("ddl_dml_output", f"Error: {str(e)}")
 
+    def follow_job(self):
+        """Show progress for this session's running query, or publish its result once it has finished.
+
+        While the job runs this draws its progress and returns, so the rest of the page renders and
+        stays usable; poll_job then reruns the script to look again.
+        """
+        job = query_executor.get(self.state.get_state("query_job"))
+        if job is None:
+            return
+        if not job.done:
+            st.caption(f"Query {job.status}: fetched {job.rows_fetched:,} rows in {job.elapsed:,.1f}s...")
+            if st.button("Cancel Query", key="cancel_query"):
+                job.cancel()
+            if job.preview is not None:
+                st.dataframe(job.preview)
+            return
+        self.state.update_state("query_job", None)
+        self.state.update_state("ddl_dml_output", None)
+        if job.status == CANCELLED:
+            st.warning(f"Query cancelled after {job.elapsed:,.1f}s ({job.rows_fetched:,} rows fetched).")
+        elif job.status == TIMED_OUT:
+            st.error(f"Query timed out after {job.timeout:g}s: {job.error}")
+        elif job.status != DONE:
+            st.error(f"Execution error: {job.error}")
+        elif not job.result.empty:
+            # Later drill-downs (filters, projections, sorts, aggregates) of this result can be answered from it
+            oracle = self.state.get_state("oracle")
+            self.state.update_state("result_base", (oracle.identity, job.sql, job.result, time.time()))
+            self.publish_result(job.sql, job.result, {"source": "oracle", "seconds": job.elapsed})
+        else:
+            self.handle_empty_query(job.sql)
+
+    def poll_job(self):
+        """Rerun the script after a short pause while this session has a query follow_job hasn't
+        published yet; call it once the whole page has been drawn."""
+        if query_executor.get(self.state.get_state("query_job")) is not None:
+            time.sleep(JOB_POLL_SECONDS)
+            st.experimental_rerun()
+
+    def answer_locally(self, sql) -> bool:
+        """Run a query over the last database result instead of Oracle when it only narrows or
+        summarizes those rows; False when it has to go to the database."""
+        base = self.state.get_state("result_base")
+        if base is None:
+            return False
+        identity, base_sql, base_df, fetched_at = base
+        if identity != self.state.get_state("oracle").identity:
+            return False  # Fetched by another login or from another database
+        start = time.perf_counter()
+        df = answer_locally(sql, base_sql, base_df)
+        if df is None:
+            return False
+        if df.empty:
+            self.handle_empty_query(sql)
+            return True
+        self.publish_result(sql, df, {"source": "local", "seconds": time.perf_counter() - start,
+                                      "base_rows": len(base_df), "fetched_at": fetched_at})
+        return True
+
+    def publish_result(self, sql, df, source):
+        self.state.update_state("executed_sql", sql)
+        self.state.update_state("query_df", df)
+        self.state.update_state("result_source", source)
+        self.state.update_state("analysis_result", None)
+        self.state.update_state("show_analysis", False)
+        self.state.update_state("analysis_results", None)
+        st.experimental_rerun()
+
     def handle_empty_query(self, sql):
         """Handles the case where the query returns no rows."""
         metadata = self.state.get_state("oracle").get_table_metadata(sql)
@@ -61,61 +155,59 @@ class QueryHandler:
             current_results.append((result_type, result_content))
             self.state.update_state("analysis_results", current_results)
 
-    def _limit_rows(self, df):
-        """Limit DataFrame rows for LLM processing and warn if truncated."""
-        if len(df) > self.row_limit:
-            st.warning(f"Data context size is high ({len(df)} rows). Analysis is based on the first {self.row_limit} rows only.")
-            return df.head(self.row_limit)
-        return df
-
     def generate_insights(self):
         """Generate insights about trends, patterns, or anomalies."""
-        if not self._check_context():
-            return
-        sql = self.state.get_state("executed_sql")
-        df = self._limit_rows(self.state.get_state("query_df"))
-        prompt = f"""
-        Here is the query {sql} executed in Oracle Database 21c, based on that:
-        Here is the output from the database (limited to {self.row_limit} rows if larger):
-        {df.to_string()}
-        Provide 5 insights about trends, patterns, or anomalies in this data in points.
-        Don't give any SQL queries, just insights.
-        """
-        with st.spinner("Generating insights..."):
-            result = self.state.get_state("groq").analyze_data(prompt)
-            self._append_result("Insights", result if result else "No insights received from AI.")
+        self.run_analyses(["Insights"])
 
     def generate_sql_queries(self):
         """Generate additional SQL queries to dig deeper into the data."""
-        if not self._check_context():
-            return
-        sql = self.state.get_state("executed_sql")
-        df = self._limit_rows(self.state.get_state("query_df"))
-        prompt = f"""
-        Here is the query {sql} executed in Oracle Database 21c, based on that:
-        Here is the output from the database (limited to {self.row_limit} rows if larger):
-        {df.to_string()}
-        Provide additional Oracle 21c SQL queries to dig deeper into this data, along with a description of their purpose.
-        """
-        with st.spinner("Generating SQL queries..."):
-            result = self.state.get_state("groq").analyze_data(prompt)
-            self._append_result("Additional SQL Queries", result if result else "No SQL queries received from AI.")
+        self.run_analyses(["Additional SQL Queries"])
 
     def generate_visualizations(self):
         """Generate visualization suggestions."""
+        self.run_analyses(["Visualization Suggestions"])
+
+    def generate_all(self):
+        """Run every analysis at once; total wait is roughly the slowest single call."""
+        self.run_analyses(list(ANALYSES))
+
+    def run_analyses(self, result_types):
+        """Send the selected analysis prompts concurrently, streaming each response into the page."""
         if not self._check_context():
             return
         sql = self.state.get_state("executed_sql")
-        df = self._limit_rows(self.state.get_state("query_df"))
-        prompt = f"""
+        groq = self.state.get_state("groq")
+        data_context = build_data_context(self.state.get_state("query_df"), token_budget(groq.model))
+        prompts = {
+            result_type: self._analysis_prompt(sql, data_context, ANALYSES[result_type][0])
+            for result_type in result_types
+        }
+        placeholders = {result_type: st.empty() for result_type in result_types}
+        last_render = {}
+
+        def show_tokens(result_type, text):
+            # Re-rendering on every token floods the websocket; a few updates per second is plenty
+            now = time.monotonic()
+            if now - last_render.get(result_type, 0.0) >= 0.1:
+                last_render[result_type] = now
+                placeholders[result_type].markdown(f"**{result_type}** _(streaming...)_\n\n{text}")
+
+        def show_result(result_type, result, error):
+            placeholders[result_type].empty()
+            if error:
+                st.error(f"{result_type} failed: {error}")
+            self._append_result(result_type, result if result else ANALYSES[result_type][1])
+
+        with st.spinner("Generating analysis..."):
+            AnalysisEngine(groq).run(prompts, show_tokens, show_result)
+
+    def _analysis_prompt(self, sql, data_context, instructions):
+        return f"""
         Here is the query {sql} executed in Oracle Database 21c, based on that:
-        Here is the output from the database (limited to {self.row_limit} rows if larger):
-        {df.to_string()}
-        Suggest visualizations (e.g., Bar Chart, Line Chart, Scatter Plot, Pie Chart, Histogram, Box Plot, Heatmap) that might help understand this data better.
+        Here is a profile of the full output from the database, with sample rows:
+        {data_context}
+        {instructions}
         """
-        with st.spinner("Generating visualization suggestions..."):
-            result = self.state.get_state("groq").analyze_data(prompt)
-            self._append_result("Visualization Suggestions", result if result else "No visualization suggestions received from AI.")
 
     def generate_analysis(self):
         pass
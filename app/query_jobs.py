@@ -0,0 +1,162 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import pandas as pd
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMED_OUT = "queued", "running", "done", "failed", "cancelled", "timed out"
+
+
+class QueryInterrupted(Exception):
+    pass
+
+
+class QueryJob:
+    """One SELECT running on a worker thread; the UI polls it and may cancel it."""
+
+    def __init__(self, key: str, sql: str, timeout: float, statement: Optional[str] = None,
+                 params: Optional[Dict] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.sql = sql
+        self.statement = statement or sql  # What is executed: `sql` with its literals bound as `params`
+        self.params = params
+        self.timeout = timeout
+        self.status = QUEUED
+        self.rows_fetched = 0
+        self.preview: Optional[pd.DataFrame] = None  # First chunk, shown while the rest is fetched
+        self.result: Optional[pd.DataFrame] = None
+        self.error: Optional[str] = None
+        self.submitted = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._conn = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def cancel(self):
+        """Ask the job to stop; a round trip in progress is interrupted with connection.cancel()."""
+        self._cancelled.set()
+        with self._lock:
+            conn = self._conn
+        if conn is not None:
+            try:
+                conn.cancel()
+            except Exception as e:
+                logging.warning(f"Cancelling query {self.id} failed: {str(e)}")
+
+    def _attach(self, conn):
+        with self._lock:
+            self._conn = conn
+        if self._cancelled.is_set():
+            raise QueryInterrupted("cancelled before it started")
+
+    def _on_chunk(self, chunk: pd.DataFrame):
+        if self.preview is None:
+            self.preview = chunk
+        self.rows_fetched += len(chunk)
+        if self._cancelled.is_set():
+            raise QueryInterrupted("cancelled")
+        if self.elapsed > self.timeout:
+            raise QueryInterrupted(f"timed out after {self.timeout:g}s")
+
+
+class JobExecutor:
+    """Runs SELECTs on a bounded pool of worker threads, each borrowing its own connection.
+
+    Identical queries (same login, SQL and fetch limits) submitted while one is still in flight
+    attach to the running job, so a Streamlit rerun never starts the same query twice.
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 600.0, keep_finished: int = 100):
+        self.timeout = timeout
+        self.keep_finished = keep_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="query-job")
+        self._jobs: "OrderedDict[str, QueryJob]" = OrderedDict()
+        self._inflight: Dict[str, QueryJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, oracle_manager, sql: str, max_rows: Optional[int] = None,
+               max_bytes: Optional[int] = None, use_cache: bool = True,
+               timeout: Optional[float] = None, statement: Optional[str] = None,
+               params: Optional[Dict] = None) -> QueryJob:
+        """Start `sql` on a worker, or attach to the identical job in flight. `statement` and
+        `params` are a parameterized form of `sql` to execute instead."""
+        binds = tuple(sorted(params.items())) if params else None
+        key = oracle_manager.result_cache.make_key(oracle_manager.identity, statement or sql, max_rows, max_bytes, binds)
+        with self._lock:
+            job = self._inflight.get(key)
+            if job is not None and not job.done:
+                return job
+            job = QueryJob(key, sql, timeout or self.timeout, statement, params)
+            self._inflight[key] = job
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, oracle_manager, max_rows, max_bytes, use_cache)
+        return job
+
+    def get(self, job_id: Optional[str]) -> Optional[QueryJob]:
+        return self._jobs.get(job_id) if job_id else None
+
+    def _run(self, job: QueryJob, oracle_manager, max_rows, max_bytes, use_cache):
+        job.started = time.time()
+        job.status = RUNNING
+        try:
+            if job._cancelled.is_set():
+                raise QueryInterrupted("cancelled before it started")
+            job.result = oracle_manager.execute_query(
+                job.statement, max_rows, max_bytes, on_chunk=job._on_chunk, use_cache=use_cache,
+                call_timeout_ms=job.timeout * 1000, on_connection=job._attach, params=job.params
+            )
+            job.rows_fetched = len(job.result)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            if job._cancelled.is_set():
+                job.status = CANCELLED
+            elif job.elapsed >= job.timeout or "DPI-1067" in job.error:
+                job.status = TIMED_OUT
+            else:
+                job.status = FAILED
+        finally:
+            job.finished = time.time()
+            with job._lock:
+                job._conn = None
+            with self._lock:
+                if self._inflight.get(job.key) is job:
+                    del self._inflight[job.key]
+
+    def _prune(self):
+        # Forget the oldest finished jobs; running ones are always kept
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(self._jobs) - self.keep_finished)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {
+            "running": sum(1 for job in jobs if job.status == RUNNING),
+            "queued": sum(1 for job in jobs if job.status == QUEUED),
+            "finished": sum(1 for job in jobs if job.done),
+        }
+
+
+query_executor = JobExecutor(
+    max_workers=int(os.getenv("QUERY_WORKERS", "4")),
+    timeout=float(os.getenv("QUERY_TIMEOUT", "600")),
+)
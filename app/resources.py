@@ -0,0 +1,43 @@
+import os
+import threading
+from typing import Dict, Optional
+from groq_handler import GroqHandler
+from security import SecurityManager
+
+# Process-wide objects shared by every browser session; st.session_state only keeps references
+_lock = threading.Lock()
+_groq_client = None
+_groq_handlers: Dict[str, GroqHandler] = {}
+_security: Optional[SecurityManager] = None
+
+
+def groq_client():
+    """One Groq client for the process: the model is chosen per request, so every session and
+    model shares the same keep-alive HTTP connection pool."""
+    global _groq_client
+    with _lock:
+        if _groq_client is None:
+            from groq import Groq  # Importing groq takes a while; only pay for it on the first LLM call
+            _groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return _groq_client
+
+
+def groq_handler(model: str) -> GroqHandler:
+    """The shared handler for `model`; handlers hold no per-session state."""
+    with _lock:
+        if model not in _groq_handlers:
+            _groq_handlers[model] = GroqHandler(model)  # Uses groq_client() once it makes a call
+        return _groq_handlers[model]
+
+
+def security_manager() -> SecurityManager:
+    global _security
+    with _lock:
+        if _security is None:
+            _security = SecurityManager()
+        return _security
+
+
+def stats() -> Dict:
+    return {"groq_models": sorted(_groq_handlers), "groq_client": _groq_client is not None,
+            "security": _security is not None}
@@ -0,0 +1,198 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import streamlit as st
+from frame_memo import FrameMemo
+from sql_parser import duplicate_columns, has_row_limit, quote_identifier
+
+PAGE_SIZES = [25, 50, 100, 500]
+
+# Filter label -> (SQL template for the quoted column and bind name, whether it takes a value)
+FILTER_OPS = {
+    "=": ("{col} = :{bind}", True),
+    "<>": ("({col} <> :{bind} OR {col} IS NULL)", True),
+    "<": ("{col} < :{bind}", True),
+    "<=": ("{col} <= :{bind}", True),
+    ">": ("{col} > :{bind}", True),
+    ">=": ("{col} >= :{bind}", True),
+    "contains": ("{col} LIKE :{bind} ESCAPE '\\'", True),
+    "starts with": ("{col} LIKE :{bind} ESCAPE '\\'", True),
+    "is empty": ("{col} IS NULL", False),
+    "is not empty": ("{col} IS NOT NULL", False),
+}
+
+Sort = Optional[Tuple[str, bool]]  # (column, ascending)
+Filter = Tuple[str, str, object]  # (column, operator, value)
+
+_order_cache = FrameMemo()  # Row positions per result and (sort, filters)
+
+
+def _like_pattern(value: str, op: str) -> str:
+    escaped = str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%" if op == "contains" else f"{escaped}%"
+
+
+def _where(columns: List[str], filters: List[Filter]) -> Tuple[str, Dict]:
+    """WHERE clause over the result's own column names, with every value passed as a bind."""
+    clauses, binds = [], {}
+    for i, (column, op, value) in enumerate(filters):
+        if column not in columns or op not in FILTER_OPS:
+            raise ValueError(f"Unsupported filter: {column} {op}")
+        template, takes_value = FILTER_OPS[op]
+        bind = f"f{i}"
+        clauses.append(template.format(col=f"q.{quote_identifier(column)}", bind=bind))
+        if takes_value:
+            binds[bind] = _like_pattern(value, op) if op in ("contains", "starts with") else value
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", binds
+
+
+def page_sql(sql: str, columns: List[str], offset: int, limit: int, sort: Sort = None,
+             filters: Optional[List[Filter]] = None) -> Tuple[str, Dict]:
+    """Rewrite a SELECT so the database returns one page, optionally sorted and filtered."""
+    sql = sql.strip().rstrip(";")
+    filters = filters or []
+    binds = {"page_offset": offset, "page_limit": limit}
+    if not sort and not filters and not has_row_limit(sql):
+        # Appending keeps the user's own ORDER BY in charge of the row order
+        return f"{sql}\nOFFSET :page_offset ROWS FETCH NEXT :page_limit ROWS ONLY", binds
+    where, filter_binds = _where(columns, filters)
+    binds.update(filter_binds)
+    order = ""
+    if sort:
+        if sort[0] not in columns:
+            raise ValueError(f"Unknown sort column: {sort[0]}")
+        order = f" ORDER BY q.{quote_identifier(sort[0])} {'ASC' if sort[1] else 'DESC'} NULLS LAST"
+    return (f"SELECT q.* FROM (\n{sql}\n) q{where}{order}"
+            " OFFSET :page_offset ROWS FETCH NEXT :page_limit ROWS ONLY"), binds
+
+
+def count_sql(sql: str, columns: List[str], filters: Optional[List[Filter]] = None) -> Tuple[str, Dict]:
+    where, binds = _where(columns, filters or [])
+    return f"SELECT COUNT(*) FROM (\n{sql.strip().rstrip(';')}\n) q{where}", binds
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    return df.iloc[:, list(df.columns).index(name)]
+
+
+def _local_positions(df: pd.DataFrame, sort: Sort, filters: List[Filter]) -> np.ndarray:
+    """Row positions after filtering and sorting, memoized per DataFrame so paging is a slice."""
+    key = (sort, tuple((c, o, str(v)) for c, o, v in filters))
+    positions = _order_cache.get(df, key)
+    if positions is not None:
+        return positions
+    mask = np.ones(len(df), dtype=bool)
+    for column, op, value in filters:
+        series = _column(df, column)
+        if op == "is empty":
+            mask &= series.isna().to_numpy()
+        elif op == "is not empty":
+            mask &= series.notna().to_numpy()
+        elif op in ("contains", "starts with"):
+            text = series.astype(str)
+            hits = text.str.contains(str(value), regex=False) if op == "contains" else text.str.startswith(str(value))
+            mask &= (hits & series.notna()).to_numpy()
+        else:
+            compare = {"=": "eq", "<>": "ne", "<": "lt", "<=": "le", ">": "gt", ">=": "ge"}[op]
+            mask &= getattr(series, compare)(value).fillna(op == "<>").to_numpy(dtype=bool)
+    positions = np.flatnonzero(mask)
+    if sort:
+        values = _column(df, sort[0]).iloc[positions]
+        order = values.reset_index(drop=True).sort_values(ascending=sort[1], na_position="last", kind="stable").index
+        positions = positions[order.to_numpy()]
+    _order_cache.put(df, key, positions)
+    return positions
+
+
+def _coerce(df: pd.DataFrame, filters: List[Filter]) -> List[Filter]:
+    """Convert typed-in filter text to the column's type so comparisons and binds behave."""
+    coerced = []
+    for column, op, value in filters:
+        if FILTER_OPS[op][1] and op not in ("contains", "starts with"):
+            series = _column(df, column)
+            if pd.api.types.is_numeric_dtype(series):
+                value = float(value)
+            elif pd.api.types.is_datetime64_any_dtype(series):
+                value = pd.Timestamp(value).to_pydatetime()
+        coerced.append((column, op, value))
+    return coerced
+
+
+class ResultPager:
+    """Pages a query result: over the in-memory DataFrame when it is complete, otherwise in SQL.
+
+    A truncated result only holds the first rows, so pages, sorts and filters beyond it are
+    pushed down as OFFSET/FETCH queries; row counts come from a COUNT(*) that is cached like
+    any other result.
+    """
+
+    def __init__(self, oracle_manager, sql: str, df: pd.DataFrame):
+        self.oracle = oracle_manager
+        self.sql = sql
+        self.df = df
+        self.columns = list(df.columns)
+        # Page, count, sort and filter queries wrap the statement, which duplicate names break
+        self.duplicates = duplicate_columns(self.columns)
+        self.server_side = bool(df.attrs.get("truncated")) and oracle_manager is not None and not self.duplicates
+
+    def page(self, number: int, size: int, sort: Sort = None,
+             filters: Optional[List[Filter]] = None) -> Tuple[pd.DataFrame, int]:
+        """Rows of 1-based page `number` and the total row count for the current filters."""
+        filters = _coerce(self.df, filters or [])
+        offset = (number - 1) * size
+        if self.server_side:
+            sql, binds = page_sql(self.sql, self.columns, offset, size, sort, filters)
+            page = self.oracle.execute_query(sql, params=binds)
+            sql, binds = count_sql(self.sql, self.columns, filters)
+            total = int(self.oracle.execute_query(sql, params=binds).iloc[0, 0])
+            return page, total
+        positions = _local_positions(self.df, sort, filters)
+        return self.df.iloc[positions[offset:offset + size]], len(positions)
+
+
+def render_result_grid(oracle_manager, sql: str, df: pd.DataFrame, key: str):
+    """Paged, sortable, filterable result table; only the visible page is sent to the browser."""
+    pager = ResultPager(oracle_manager, sql, df)
+    columns = pager.columns
+    col1, col2, col3, col4, col5 = st.columns([2, 1, 2, 1, 2])
+    sort_column = col1.selectbox("Sort by", ["(none)"] + columns, key=f"{key}_sort")
+    descending = col2.checkbox("Descending", key=f"{key}_desc")
+    filter_column = col3.selectbox("Filter", ["(none)"] + columns, key=f"{key}_filter_col")
+    filter_op = col4.selectbox("Op", list(FILTER_OPS), key=f"{key}_filter_op")
+    filter_value = col5.text_input("Value", key=f"{key}_filter_value")
+
+    sort = (sort_column, not descending) if sort_column != "(none)" else None
+    filters = []
+    if filter_column != "(none)" and (filter_value or not FILTER_OPS[filter_op][1]):
+        filters.append((filter_column, filter_op, filter_value))
+
+    size = st.session_state.setdefault(f"{key}_size", PAGE_SIZES[1])
+    # Any change to what is shown starts again from the first page
+    view = (sql, id(df), sort, tuple(filters), size)
+    if st.session_state.get(f"{key}_view") != view:
+        st.session_state[f"{key}_view"] = view
+        st.session_state[f"{key}_page"] = 1
+
+    try:
+        rows, total = pager.page(st.session_state[f"{key}_page"], size, sort, filters)
+    except ValueError as e:
+        st.error(f"Invalid filter: {str(e)}")
+        return
+    except Exception as e:
+        st.error(f"Could not load the page: {str(e)}")
+        return
+    pages = max(1, -(-total // size))
+    if st.session_state[f"{key}_page"] > pages:  # The result shrank under the current page
+        st.session_state[f"{key}_page"] = pages
+        st.experimental_rerun()
+    st.dataframe(rows, hide_index=True)
+
+    col1, col2, col3 = st.columns([1, 1, 3])
+    col1.number_input("Page", min_value=1, max_value=pages, key=f"{key}_page")
+    col2.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+    source = "database" if pager.server_side else "fetched result"
+    col3.caption(f"{total:,} rows · page {st.session_state[f'{key}_page']} of {pages:,} · paged from the {source}")
+    if df.attrs.get("truncated") and pager.duplicates:
+        st.info(f"Only the fetched rows can be paged, sorted and filtered: the result has more than one "
+                f"column named {', '.join(pager.duplicates)}. Give them distinct aliases (e.g. "
+                f"D.{pager.duplicates[0]} AS D_{pager.duplicates[0]}) to work with the full result.")
@@ -0,0 +1,92 @@
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+import pandas as pd
+from materializer import arrow_strings_enabled, build_frame, categorize_strings, column_kinds
+
+DEFAULT_ARRAYSIZE = 1000
+DEFAULT_CHUNK_ROWS = 10000
+
+
+def fetch_limits_from_env() -> Dict:
+    """Row/byte budget applied to interactive queries so one SELECT can't exhaust the worker."""
+    return {
+        "max_rows": int(os.getenv("QUERY_MAX_ROWS", "100000")),
+        "max_bytes": int(os.getenv("QUERY_MAX_BYTES", str(256 * 1024 * 1024))),
+    }
+
+
+class ResultStream:
+    """Iterates an executed cursor as DataFrame chunks, stopping early at a row/byte budget."""
+
+    def __init__(self, cursor, driver, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 max_rows: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.cursor = cursor
+        self.chunk_rows = chunk_rows
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        description = cursor.description or []
+        self.columns: List[str] = [col[0] for col in description]
+        self.kinds = column_kinds(description, driver)  # Typed materialization plan per column
+        self.arrow_strings = arrow_strings_enabled()
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.truncated = False
+        self.exhausted = not self.columns
+        self.fetch_seconds = 0.0  # Time in fetchmany (database round trips) vs building DataFrames
+        self.build_seconds = 0.0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        while not self.exhausted:
+            want = self.chunk_rows
+            if self.max_rows is not None:
+                # Ask for one row past the cap so we know whether anything was cut off
+                want = min(want, self.max_rows - self.rows_fetched + 1)
+            start = time.perf_counter()
+            rows = self.cursor.fetchmany(want)
+            self.fetch_seconds += time.perf_counter() - start
+            if not rows:
+                self.exhausted = True
+                break
+            if self.max_rows is not None and self.rows_fetched + len(rows) > self.max_rows:
+                rows = rows[:self.max_rows - self.rows_fetched]
+                self._truncate()
+            if len(rows) < want and not self.truncated:
+                self.exhausted = True
+
+            start = time.perf_counter()
+            chunk = self.build_frame(rows)
+            self.build_seconds += time.perf_counter() - start
+            self.rows_fetched += len(chunk)
+            self.bytes_fetched += int(chunk.memory_usage(deep=True).sum())
+            if (self.max_bytes is not None and self.bytes_fetched >= self.max_bytes
+                    and not self.exhausted and self.cursor.fetchone() is not None):
+                self._truncate()
+            if len(chunk):
+                yield chunk
+
+    def build_frame(self, rows: list) -> pd.DataFrame:
+        # Categoricals are decided on the whole result in read_all, not per chunk
+        return build_frame(self.columns, self.kinds, rows, categorize=False, arrow_strings=self.arrow_strings)
+
+    def read_all(self, on_chunk: Optional[Callable[[pd.DataFrame], None]] = None) -> pd.DataFrame:
+        """Drain the remaining chunks into a single DataFrame flagged with `attrs["truncated"]`."""
+        if not self.columns:
+            return pd.DataFrame()
+        chunks = []
+        for chunk in self:
+            chunks.append(chunk)
+            if on_chunk:
+                on_chunk(chunk)
+        start = time.perf_counter()
+        if chunks:
+            df = categorize_strings(pd.concat(chunks, ignore_index=True))
+        else:
+            df = self.build_frame([])
+        self.build_seconds += time.perf_counter() - start
+        df.attrs["truncated"] = self.truncated
+        return df
+
+    def _truncate(self):
+        self.truncated = True
+        self.exhausted = True
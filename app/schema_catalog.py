@@ -0,0 +1,327 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+import pandas as pd
+from llm_cache import CACHE_DIR
+from prompt_context import count_tokens
+from schema_retriever import SchemaRetriever
+from sql_parser import qualify
+
+REFRESH_INTERVAL = float(os.getenv("SCHEMA_CATALOG_REFRESH", "300"))
+SCHEMA_TOP_K = int(os.getenv("SCHEMA_TOP_K", "5"))
+SCHEMA_CONTEXT_TOKENS = int(os.getenv("SCHEMA_CONTEXT_TOKENS", "1500"))
+SNAPSHOT_VERSION = 2  # Bump when the snapshot layout changes
+
+# Schemas owned by Oracle itself are never interesting for NL2SQL
+_USER_OWNERS = "owner NOT IN (SELECT username FROM all_users WHERE oracle_maintained = 'Y')"
+# Restricts a bulk query to objects whose DDL changed at or after :since
+_CHANGED = (
+    " AND ({owner}, {table}) IN (SELECT owner, object_name FROM all_objects "
+    "WHERE object_type IN ('TABLE', 'VIEW') AND last_ddl_time >= :since)"
+)
+
+OBJECTS_SQL = f"""
+    SELECT o.owner, o.object_name, o.object_type, o.last_ddl_time, t.num_rows, c.comments
+    FROM all_objects o
+    LEFT JOIN all_tables t ON t.owner = o.owner AND t.table_name = o.object_name
+    LEFT JOIN all_tab_comments c ON c.owner = o.owner AND c.table_name = o.object_name
+    WHERE o.object_type IN ('TABLE', 'VIEW') AND o.{_USER_OWNERS}
+"""
+COLUMNS_SQL = f"""
+    SELECT tc.owner, tc.table_name, tc.column_name, tc.data_type, tc.data_length, tc.data_precision,
+           tc.data_scale, tc.nullable, cc.comments
+    FROM all_tab_columns tc
+    LEFT JOIN all_col_comments cc
+        ON cc.owner = tc.owner AND cc.table_name = tc.table_name AND cc.column_name = tc.column_name
+    WHERE tc.{_USER_OWNERS}{{changed}}
+    ORDER BY tc.owner, tc.table_name, tc.column_id
+"""
+CONSTRAINTS_SQL = f"""
+    SELECT c.owner, c.table_name, c.constraint_name, c.constraint_type, cc.column_name,
+           r.owner AS r_owner, r.table_name AS r_table_name
+    FROM all_constraints c
+    JOIN all_cons_columns cc ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name
+    LEFT JOIN all_constraints r ON r.owner = c.r_owner AND r.constraint_name = c.r_constraint_name
+    WHERE c.constraint_type IN ('P', 'U', 'R') AND c.{_USER_OWNERS}{{changed}}
+    ORDER BY c.owner, c.table_name, c.constraint_name, cc.position
+"""
+INDEXES_SQL = """
+    SELECT i.table_owner, i.table_name, i.index_name, i.uniqueness, ic.column_name
+    FROM all_indexes i
+    JOIN all_ind_columns ic ON ic.index_owner = i.owner AND ic.index_name = i.index_name
+    WHERE i.table_owner NOT IN (SELECT username FROM all_users WHERE oracle_maintained = 'Y'){changed}
+    ORDER BY i.table_owner, i.table_name, i.index_name, ic.column_position
+"""
+
+
+class SchemaCatalog:
+    """In-memory index of the tables, columns, keys and indexes visible to one login.
+
+    Loaded in bulk on a background thread, persisted as a JSON snapshot for warm starts,
+    and refreshed incrementally from ALL_OBJECTS.LAST_DDL_TIME. Lookups never touch the database.
+    """
+
+    def __init__(self, identity: Tuple, snapshot_dir: str = CACHE_DIR):
+        self.identity = identity
+        key = hashlib.sha1(json.dumps(list(identity)).encode("utf-8")).hexdigest()[:16]
+        self.snapshot_path = os.path.join(snapshot_dir, f"schema_{key}.json")
+        self.tables: Dict[str, Dict] = {}
+        self.by_name: Dict[str, List[str]] = {}
+        self.by_column: Dict[str, Set[str]] = {}
+        self.references: Dict[str, Set[str]] = {}  # FK graph, both directions
+        self.retriever = SchemaRetriever({})
+        self.ready = threading.Event()
+        self.refreshed_at = 0.0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._loading = False
+
+    # ---- loading -------------------------------------------------------------------------
+
+    def refresh_async(self, oracle_manager) -> bool:
+        """Start a background refresh unless one is already running; returns True if started."""
+        with self._lock:
+            if self._loading:
+                return False
+            self._loading = True
+        threading.Thread(target=self._refresh, args=(oracle_manager,), daemon=True,
+                         name="schema-catalog").start()
+        return True
+
+    def is_stale(self) -> bool:
+        return time.time() - self.refreshed_at > REFRESH_INTERVAL
+
+    def _refresh(self, oracle_manager):
+        try:
+            if not self.tables:
+                self.load_snapshot()
+            self.refresh(oracle_manager)
+            self.save_snapshot()
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+            self.refreshed_at = time.time()  # Back off until the next interval instead of retrying every call
+            logging.error(f"Schema catalog refresh failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def refresh(self, oracle_manager):
+        """Reload objects whose DDL changed since the last refresh and drop vanished ones."""
+        started = time.perf_counter()
+        objects = oracle_manager.fetch_rows(OBJECTS_SQL)
+        known = {name: table["last_ddl"] for name, table in self.tables.items()}
+        current = {}
+        for owner, name, object_type, last_ddl, num_rows, comment in objects:
+            current[f"{owner}.{name}"] = (object_type, _iso(last_ddl), num_rows, comment)
+
+        tables = {name: table for name, table in self.tables.items() if name in current}
+        changed = {name for name, (_, ddl, _, _) in current.items() if name not in known or ddl != known[name]}
+        if changed:
+            # Small changes reload only objects touched since the oldest changed DDL time
+            times = [current[name][1] for name in changed]
+            binds = {}
+            if known and all(times) and len(changed) <= len(current) // 2:
+                binds = {"since": datetime.datetime.fromisoformat(min(times))}
+            for name in changed:
+                object_type, ddl, _, _ = current[name]
+                owner, table_name = name.split(".", 1)
+                tables[name] = {"owner": owner, "name": table_name, "type": object_type, "last_ddl": ddl,
+                                "columns": [], "primary_key": [], "unique": [], "foreign_keys": [], "indexes": []}
+            self._load_columns(oracle_manager, tables, changed, binds)
+            self._load_constraints(oracle_manager, tables, changed, binds)
+            self._load_indexes(oracle_manager, tables, changed, binds)
+        # Row counts and comments change without DDL, so they are refreshed for every object
+        for name, (_, _, num_rows, comment) in current.items():
+            tables[name]["num_rows"] = num_rows
+            tables[name]["comment"] = comment
+        self._index(tables)
+        self.refreshed_at = time.time()
+        self.ready.set()
+        logging.info(
+            f"Schema catalog refreshed: {len(tables)} objects, {len(changed)} reloaded, "
+            f"{len(known) - len(set(known) & set(current))} dropped in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _load_columns(self, oracle_manager, tables, changed, binds):
+        sql = COLUMNS_SQL.format(changed=_CHANGED.format(owner="tc.owner", table="tc.table_name") if binds else "")
+        for owner, table, column, data_type, length, precision, scale, nullable, comment in oracle_manager.fetch_rows(sql, binds):
+            name = f"{owner}.{table}"
+            if name in changed:
+                tables[name]["columns"].append([column, data_type, length, precision, scale, nullable == "Y", comment])
+
+    def _load_constraints(self, oracle_manager, tables, changed, binds):
+        sql = CONSTRAINTS_SQL.format(changed=_CHANGED.format(owner="c.owner", table="c.table_name") if binds else "")
+        foreign_keys: Dict[Tuple[str, str], Dict] = {}
+        uniques: Dict[Tuple[str, str], List[str]] = {}
+        for owner, table, constraint, kind, column, r_owner, r_table in oracle_manager.fetch_rows(sql, binds):
+            name = f"{owner}.{table}"
+            if name not in changed:
+                continue
+            if kind == "P":
+                tables[name]["primary_key"].append(column)
+            elif kind == "U":
+                uniques.setdefault((name, constraint), []).append(column)
+            else:
+                fk = foreign_keys.setdefault((name, constraint), {"columns": [], "references": f"{r_owner}.{r_table}"})
+                fk["columns"].append(column)
+        for (name, _), columns in uniques.items():
+            tables[name]["unique"].append(columns)
+        for (name, _), fk in foreign_keys.items():
+            tables[name]["foreign_keys"].append(fk)
+
+    def _load_indexes(self, oracle_manager, tables, changed, binds):
+        sql = INDEXES_SQL.format(changed=_CHANGED.format(owner="i.table_owner", table="i.table_name") if binds else "")
+        indexes: Dict[Tuple[str, str], Dict] = {}
+        for owner, table, index, uniqueness, column in oracle_manager.fetch_rows(sql, binds):
+            name = f"{owner}.{table}"
+            if name in changed:
+                entry = indexes.setdefault((name, index), {"name": index, "unique": uniqueness == "UNIQUE", "columns": []})
+                entry["columns"].append(column)
+        for (name, _), entry in indexes.items():
+            tables[name]["indexes"].append(entry)
+
+    def _index(self, tables: Dict[str, Dict]):
+        by_name: Dict[str, List[str]] = {}
+        by_column: Dict[str, Set[str]] = {}
+        references: Dict[str, Set[str]] = {}
+        for name, table in tables.items():
+            by_name.setdefault(table["name"], []).append(name)
+            for column in table["columns"]:
+                by_column.setdefault(column[0], set()).add(name)
+            for fk in table["foreign_keys"]:
+                references.setdefault(name, set()).add(fk["references"])
+                references.setdefault(fk["references"], set()).add(name)
+        retriever = SchemaRetriever(tables)
+        # Swap in the new structures at once so readers never see a half-built index
+        self.tables, self.by_name, self.by_column, self.references = tables, by_name, by_column, references
+        self.retriever = retriever
+
+    # ---- snapshots -----------------------------------------------------------------------
+
+    def save_snapshot(self):
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "identity": list(self.identity), "tables": self.tables}, f)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return False
+        self._index(snapshot["tables"])
+        self.ready.set()
+        return True
+
+    # ---- lookups -------------------------------------------------------------------------
+
+    def resolve(self, table_name: str, default_schema: Optional[str] = None) -> Optional[str]:
+        """Qualified name for a (possibly unqualified) table reference, or None if unknown.
+
+        A schema-qualified name matches only itself. An unqualified one not in the default schema
+        falls back to a table of that name elsewhere, but only when there is exactly one.
+        """
+        name = qualify(table_name, default_schema)
+        if name in self.tables:
+            return name
+        if "." in table_name:
+            return None
+        candidates = self.by_name.get(name.split(".")[-1], [])
+        return candidates[0] if len(candidates) == 1 else None
+
+    def table(self, table_name: str, default_schema: Optional[str] = None) -> Optional[Dict]:
+        name = self.resolve(table_name, default_schema)
+        return self.tables.get(name) if name else None
+
+    def table_metadata(self, table_name: str, default_schema: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """Column listing in the same shape as the old ALL_TAB_COLUMNS lookup."""
+        table = self.table(table_name, default_schema)
+        if table is None:
+            return None
+        return pd.DataFrame(
+            [(column[0], column[1], column[2]) for column in table["columns"]],
+            columns=["COLUMN_NAME", "DATA_TYPE", "DATA_LENGTH"]
+        )
+
+    def tables_with_column(self, column_name: str) -> Set[str]:
+        return self.by_column.get(column_name.upper(), set())
+
+    def neighbours(self, table_name: str) -> Set[str]:
+        """Tables joined to this one by a foreign key, in either direction."""
+        return self.references.get(table_name, set())
+
+    def describe(self, table_name: str) -> str:
+        """One-line DDL-like summary of a table for an LLM prompt."""
+        table = self.tables[table_name]
+        foreign_keys = {column: fk["references"] for fk in table["foreign_keys"] for column in fk["columns"]}
+        columns = []
+        for column in table["columns"]:
+            text = f"{column[0]} {_type_name(column)}"
+            if column[0] in table["primary_key"]:
+                text += " PK"
+            if column[0] in foreign_keys:
+                text += f" -> {foreign_keys[column[0]]}"
+            columns.append(text)
+        comment = f"  -- {table['comment']}" if table.get("comment") else ""
+        return f"{table_name}({', '.join(columns)}){comment}"
+
+    def relevant_schema(self, request: str, top_k: int = SCHEMA_TOP_K,
+                        budget: int = SCHEMA_CONTEXT_TOKENS) -> str:
+        """The top-k tables for a request plus their FK neighbours, described within `budget` tokens."""
+        hits = [name for name, _ in self.retriever.search(request, top_k)]
+        # Ranked hits first so FK neighbours never crowd them out of the budget
+        selected = list(hits)
+        for name in hits:
+            for neighbour in sorted(self.neighbours(name)):
+                if neighbour not in selected:
+                    selected.append(neighbour)
+        lines, used = [], 0
+        for name in selected:
+            if name not in self.tables:
+                continue
+            line = self.describe(name)
+            tokens = count_tokens(line)
+            if used + tokens > budget:
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
+
+
+def _type_name(column: List) -> str:
+    data_type, length, precision, scale = column[1], column[2], column[3], column[4]
+    if data_type == "NUMBER" and precision is not None:
+        return f"NUMBER({precision},{scale or 0})"
+    if data_type in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR", "RAW"):
+        return f"{data_type}({length})"
+    return data_type
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if isinstance(value, (datetime.date, datetime.datetime)) else value
+
+
+_catalogs: Dict[Tuple, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_catalog(oracle_manager) -> SchemaCatalog:
+    """Process-wide catalog for the manager's login, refreshed in the background when stale."""
+    identity = oracle_manager.identity
+    with _catalogs_lock:
+        catalog = _catalogs.get(identity)
+        if catalog is None:
+            catalog = _catalogs[identity] = SchemaCatalog(identity)
+    if catalog.is_stale():
+        catalog.refresh_async(oracle_manager)
+    return catalog
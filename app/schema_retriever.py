@@ -0,0 +1,76 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+import numpy as np
+
+# BM25 parameters; table names are repeated so a name match outranks a column match
+K1 = 1.2
+B = 0.75
+TABLE_NAME_WEIGHT = 3
+
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with identifiers split on _ and camelCase and plurals folded."""
+    tokens = []
+    for token in _TOKEN.findall(_CAMEL.sub(" ", text or "").lower()):
+        if len(token) > 3 and token.endswith("ies"):
+            token = token[:-3] + "y"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+class SchemaRetriever:
+    """BM25 index with one document per table: its name, comment, column names and column comments.
+
+    Postings are NumPy arrays per term, so a query touches only the terms it contains; no
+    network or model download is involved.
+    """
+
+    def __init__(self, tables: Dict[str, Dict]):
+        self.names = list(tables)
+        postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        lengths = np.zeros(len(self.names), dtype=np.float64)
+        for doc, name in enumerate(self.names):
+            table = tables[name]
+            tokens = tokenize(table["name"]) * TABLE_NAME_WEIGHT + tokenize(table.get("comment"))
+            for column in table["columns"]:
+                tokens += tokenize(column[0])
+                if len(column) > 6:
+                    tokens += tokenize(column[6])
+            lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                docs, tfs = postings.setdefault(term, ([], []))
+                docs.append(doc)
+                tfs.append(tf)
+
+        avg_length = lengths.mean() if len(lengths) else 1.0
+        norm = K1 * (1 - B + B * lengths / max(avg_length, 1.0))
+        n = len(self.names)
+        # Each posting stores its full BM25 contribution (idf included), so scoring is one gather-add per term
+        self.postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, (docs, tfs) in postings.items():
+            docs = np.array(docs, dtype=np.int32)
+            tfs = np.array(tfs, dtype=np.float64)
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            self.postings[term] = (docs, (idf * tfs * (K1 + 1) / (tfs + norm[docs])).astype(np.float32))
+
+    def search(self, request: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """Best-matching tables for a natural-language request, highest score first."""
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        for term in set(tokenize(request)):
+            posting = self.postings.get(term)
+            if posting is not None:
+                scores[posting[0]] += posting[1]
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > top_k:
+            matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+        return [(self.names[doc], float(scores[doc])) for doc in matched]
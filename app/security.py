@@ -1,30 +1,39 @@
 import re
-from cx_Oracle import DatabaseError
 import streamlit as st
+from sql_parser import classify
+
+# Compiled once per process and shared by every session's checks
+FORBIDDEN_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r";\s*--",        # Inline comment after a semicolon
+    r"EXEC\s",        # EXEC calls
+    r"XP_",           # Extended stored procedures (irrelevant to Oracle)
+)]
 
 class SecurityManager:
     def sanitize_input(self, sql: str) -> bool:
         """
         Sanitizes input SQL based on DDL/DML enablement.
-        If disabled, allows only SELECT; if enabled, allows all with basic safety checks.
+        If disabled, allows only a single query; if enabled, allows all with basic safety checks.
+        Comments, literals and q-quotes are tokenized, so they can't hide or fake a keyword.
         """
-        sql_upper = sql.upper().strip()
+        verdict = classify(sql)
         ddl_dml_enabled = st.session_state.get("ddl_dml_enabled", False)
 
+        if verdict.statement_count == 0:
+            st.error("No SQL statement found.")
+            return False
         if not ddl_dml_enabled:
-            # Only allow SELECT statements when DDL/DML is disabled
-            if not sql_upper.startswith("SELECT"):
-                st.error("Only SELECT statements are allowed when DDL/DML is disabled.")
+            # Only allow a single SELECT (or WITH ... SELECT) when DDL/DML is disabled
+            if not verdict.is_query:
+                if verdict.kind == "query":
+                    st.error("Only one statement can be run at a time.")
+                else:
+                    st.error("Only SELECT statements are allowed when DDL/DML is disabled.")
                 return False
         else:
             # When DDL/DML is enabled, apply basic safety checks
-            forbidden_patterns = [
-                r";\s*--",        # Inline comment after a semicolon
-                r"EXEC\s",        # EXEC calls
-                r"XP_",           # Extended stored procedures (irrelevant to Oracle)
-            ]
-            if any(re.search(pattern, sql, re.IGNORECASE) for pattern in forbidden_patterns):
+            if any(pattern.search(sql) for pattern in FORBIDDEN_PATTERNS):
                 st.error("Query contains forbidden patterns.")
                 return False
 
-        return True
\ No newline at end of file
+        return True
@@ -0,0 +1,395 @@
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+# q-quoted literals (q'[...]', q'{...}', q'!...!'), with the bracket pairs Oracle allows
+_Q_QUOTE = r"(?<![\w$#])[nN]?[qQ]'(?:\[.*?\]|\{.*?\}|\(.*?\)|<.*?>|(?P<delimiter>[^\s\[{(<]).*?(?P=delimiter))'"
+# Strings, quoted identifiers and comments, matched in one pass so "--" inside a literal is not a comment
+_SPECIAL = re.compile(_Q_QUOTE + r"|'(?:[^']|'')*'|\"[^\"]*\"|--[^\n]*|/\*.*?\*/", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+_ROW_LIMIT = re.compile(r"\bFETCH\s+(?:FIRST|NEXT)\b|\bOFFSET\s+\S+\s+ROWS?\b", re.IGNORECASE)
+# One token per match; whitespace and comments are matched so they can be skipped without a second scan.
+# Words come first as the commonest token, but not when a quote follows (q'...' and N'...' literals,
+# and typed literals written without a space, DATE'2024-01-01', which are one token)
+_TOKEN = re.compile(
+    r"(?P<word>[A-Za-z][\w$#]*(?![\w$#']))"
+    r"|(?P<skip>\s+|--[^\n]*|/\*.*?(?:\*/|$))"
+    r"|(?P<typed>(?<![\w$#])(?i:DATE|TIMESTAMP|INTERVAL)'(?:[^']|'')*')"
+    r"|(?P<literal>" + _Q_QUOTE + r"|(?<![\w$#])[nN]?'(?:[^']|'')*')"
+    r"|(?P<quoted>\"[^\"]*\")"
+    r"|(?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)"
+    r"|(?P<symbol>.)",
+    re.DOTALL
+)
+
+VERDICT_CACHE_SIZE = 4096
+
+# Leading keyword -> statement kind
+_KINDS = {
+    "SELECT": "query", "WITH": "query",
+    "INSERT": "dml", "UPDATE": "dml", "DELETE": "dml", "MERGE": "dml", "LOCK": "dml",
+    "BEGIN": "plsql", "DECLARE": "plsql", "CALL": "plsql", "EXEC": "plsql", "EXECUTE": "plsql",
+    "COMMIT": "transaction", "ROLLBACK": "transaction", "SAVEPOINT": "transaction", "SET": "transaction",
+}
+_KINDS.update(dict.fromkeys((
+    "CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME", "GRANT", "REVOKE", "COMMENT", "ANALYZE",
+    "PURGE", "FLASHBACK", "AUDIT", "NOAUDIT", "ASSOCIATE", "DISASSOCIATE",
+), "ddl"))
+# CREATE ... of these objects carries a PL/SQL body, whose semicolons don't end the statement
+_PLSQL_OBJECTS = frozenset(("PROCEDURE", "FUNCTION", "PACKAGE", "TRIGGER", "TYPE", "LIBRARY"))
+_CREATE_PREFIXES = frozenset(("CREATE", "OR", "REPLACE", "EDITIONABLE", "NONEDITIONABLE", "EDITIONING"))
+_MAIN_VERBS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "MERGE"))
+# Keywords that end a FROM list at their nesting level
+_CLAUSE_END = frozenset((
+    "WHERE", "GROUP", "ORDER", "HAVING", "CONNECT", "START", "UNION", "INTERSECT", "MINUS", "EXCEPT",
+    "FETCH", "OFFSET", "FOR", "SELECT", "SET", "VALUES", "RETURNING", "RETURN", "LOG", "PIVOT",
+    "UNPIVOT", "MODEL", "WINDOW", "MATCH_RECOGNIZE", "ON", "USING", "WHEN",
+))
+# Functions whose argument syntax uses FROM, e.g. EXTRACT(YEAR FROM hire_date)
+_FROM_FUNCTIONS = frozenset(("EXTRACT", "TRIM", "SUBSTRING", "OVERLAY"))
+# Clauses whose literals are values a user varies; SELECT lists, GROUP BY, HAVING and ORDER BY
+# keep theirs, since a bind there changes column names or no longer matches the grouping
+_BIND_CLAUSES = frozenset(("WHERE", "ON", "START", "CONNECT"))
+_BIND_CLAUSE_RESET = frozenset(("SELECT", "FROM", "GROUP", "ORDER", "HAVING", "FETCH", "OFFSET", "UNION",
+                                "INTERSECT", "MINUS", "EXCEPT", "MODEL", "PIVOT", "UNPIVOT"))
+_TYPED_LITERALS = frozenset(("DATE", "TIMESTAMP", "INTERVAL"))  # DATE '2024-01-01' can't take a bind
+# Argument lists that must stay literal: type sizes and SQL/JSON and XML paths
+_LITERAL_ARGUMENTS = frozenset((
+    "VARCHAR2", "VARCHAR", "CHAR", "NCHAR", "NVARCHAR2", "NUMBER", "FLOAT", "RAW", "DECIMAL", "TIMESTAMP",
+    "JSON_VALUE", "JSON_QUERY", "JSON_EXISTS", "JSON_TABLE", "XMLTABLE", "XMLQUERY", "XMLEXISTS", "EXTRACTVALUE",
+))
+_TABLE_PREFIXES = frozenset(("LATERAL", "ONLY", "TABLE"))  # TABLE(collection) is not a name
+
+
+@dataclass(frozen=True)
+class SqlVerdict:
+    """What a piece of SQL is and which tables it touches, from one tokenizer pass.
+
+    Table names are upper-cased unless quoted (quoted parts keep their quotes) and may carry a
+    schema; pass them through `qualify`. `write_targets` is None when a write's targets are unknown.
+    """
+    statement_type: str
+    kind: str
+    statement_count: int
+    tables: FrozenSet[str]
+    write_targets: Optional[FrozenSet[str]]
+    words: FrozenSet[str]
+
+    @property
+    def is_query(self) -> bool:
+        """A single read-only statement (SELECT, WITH ... SELECT or a parenthesised set query)."""
+        return self.kind == "query" and self.statement_count == 1
+
+
+def tokenize(sql: str):
+    """(kind, text) tokens with whitespace and comments dropped; words are upper-cased."""
+    tokens = []
+    for match in _TOKEN.finditer(sql):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        text = match.group(0)
+        tokens.append((kind, text.upper() if kind == "word" else text))
+    return tokens
+
+
+class _Statement:
+    def __init__(self):
+        self.verb = ""
+        self.kind = "empty"
+        self.plsql = False
+        self.tables = set()
+        self.targets = set()
+        self.ctes = set()
+        self.tokens = 0
+
+
+def _name_at(tokens, i):
+    """The (possibly schema-qualified) name starting at token i and the index after it."""
+    parts = [tokens[i][1]]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i][1] == "." and tokens[i + 1][0] in ("word", "quoted"):
+        parts.append(tokens[i + 1][1])
+        i += 2
+    return ".".join(parts), i
+
+
+@lru_cache(maxsize=VERDICT_CACHE_SIZE)
+def classify(sql: str) -> SqlVerdict:
+    """Classify SQL from a single pass over its tokens, so comments, literals (including
+    q-quotes) and quoted identifiers never look like keywords.
+
+    Statements are split on top-level semicolons, except inside PL/SQL blocks and CREATE
+    PROCEDURE/FUNCTION/PACKAGE/TRIGGER/TYPE, which run to the end of the text. Verdicts are
+    kept in an LRU cache keyed by the SQL text, so repeated checks of a statement are a lookup.
+    """
+    tokens = tokenize(sql)
+    statements = []
+    current = None
+    words = set()
+    depth = 0
+    openers = []         # Word before each open parenthesis, to spot EXTRACT(... FROM ...)
+    from_lists = set()   # Nesting levels whose FROM list is still open
+    with_lists = set()   # Nesting levels inside a WITH clause, before its main verb
+    expect = None        # "table", "target" or "cte" when the next name is one
+    previous = ""
+    i = 0
+    while i < len(tokens):
+        kind, text = tokens[i]
+        if current is None:
+            current = _Statement()
+            statements.append(current)
+            depth, openers, from_lists, with_lists, expect, previous = 0, [], set(), set(), None, ""
+        current.tokens += 1
+        position = current.tokens
+        if position == 1 and kind != "word" and text not in ("(", ";"):
+            current.verb, current.kind = text, "other"  # Nothing Oracle would run as a query
+        if kind == "symbol":
+            if text == ";" and depth == 0 and not current.plsql:
+                current = None
+            elif text == "(":
+                if position == 1:
+                    current.verb, current.kind = "SELECT", "query"  # (SELECT ...) UNION (SELECT ...)
+                openers.append(previous)
+                depth += 1
+                expect = None
+            elif text == ")":
+                from_lists.discard(depth)
+                with_lists.discard(depth)
+                depth = max(depth - 1, 0)
+                if openers:
+                    openers.pop()
+            elif text == ",":
+                if depth in from_lists:
+                    expect = "table"
+                elif depth in with_lists:
+                    expect = "cte"
+            previous = text
+            i += 1
+            continue
+        if kind in ("word", "quoted"):
+            words.add(text[1:-1] if kind == "quoted" else text)
+        if kind not in ("word", "quoted") or (expect and kind == "word" and text in _TABLE_PREFIXES):
+            previous = text
+            i += 1
+            continue
+        if expect == "target" and text == "FROM":  # DELETE FROM t
+            i += 1
+            continue
+        if expect is not None:
+            name, end = _name_at(tokens, i)
+            if expect == "table":
+                current.tables.add(name)
+            elif expect == "target":
+                current.targets.add(name)
+            else:
+                current.ctes.add(name)
+            for part in name.split("."):
+                words.add(part[1:-1] if part.startswith('"') else part)
+            expect = None
+            previous = tokens[end - 1][1]
+            i = end
+            continue
+        if kind == "word":
+            verb = current.verb
+            if position == 1:
+                current.verb = text
+                current.kind = _KINDS.get(text, "other")
+                if text == "WITH":
+                    with_lists.add(depth)
+                    expect = "cte"
+                elif text in ("UPDATE", "DELETE"):
+                    expect = "target"
+                current.plsql = text in ("BEGIN", "DECLARE")
+            elif text in _MAIN_VERBS and depth in with_lists:
+                with_lists.discard(depth)
+                if depth == 0 and verb == "WITH":
+                    current.verb, current.kind = text, _KINDS[text]
+                    if text in ("UPDATE", "DELETE"):
+                        expect = "target"
+            elif text == "WITH" and previous == "(":
+                with_lists.add(depth)
+                expect = "cte"
+            elif text == "FROM":
+                if not (openers and openers[-1] in _FROM_FUNCTIONS and depth > 0):
+                    from_lists.add(depth)
+                    expect = "table"
+            elif text == "JOIN":
+                expect = "table"
+            elif text == "INTO" and verb in ("INSERT", "MERGE"):
+                expect = "target"
+            elif text == "USING" and verb == "MERGE" and depth == 0:
+                expect = "table"
+            elif text == "TABLE" and verb in ("CREATE", "ALTER", "DROP", "TRUNCATE", "LOCK") and not current.targets:
+                expect = "target"
+            elif text in _PLSQL_OBJECTS and verb == "CREATE" and previous in _CREATE_PREFIXES:
+                current.plsql = True
+            elif text == "BODY" and verb == "CREATE" and previous in _PLSQL_OBJECTS:
+                current.plsql = True
+            if text in _CLAUSE_END:
+                from_lists.discard(depth)
+        previous = text
+        i += 1
+
+    # A lone "/" is the SQL*Plus terminator after a PL/SQL block, not a statement
+    statements = [s for s in statements if s.kind != "empty" and not (s.verb == "/" and s.tokens == 1)]
+    statements = statements or [_Statement()]
+    main = next((s for s in statements if s.kind != "query"), statements[0])
+    tables, targets = set(), set()
+    for statement in statements:
+        tables |= {t for t in statement.tables if t not in statement.ctes and t != "DUAL"}
+        if statement.kind in ("dml", "ddl", "plsql") and not statement.targets:
+            targets = None
+        elif targets is not None:
+            targets |= statement.targets
+    return SqlVerdict(
+        statement_type=main.verb,
+        kind=main.kind,
+        statement_count=len(statements) if main.kind != "empty" else 0,
+        tables=frozenset(tables),
+        write_targets=None if targets is None else frozenset(targets),
+        words=frozenset(words),
+    )
+
+
+def _literal_value(kind: str, text: str):
+    if kind == "number":
+        return int(text) if text.isdigit() else Decimal(text)  # Decimal binds as an exact NUMBER
+    if text[0] in "nN":
+        text = text[1:]
+    if text[0] in "qQ":
+        return text[3:-2]
+    return text[1:-1].replace("''", "'")
+
+
+def parameterize(sql: str) -> Tuple[str, Dict]:
+    """Replace the literals in a query's WHERE/ON/START WITH/CONNECT BY conditions with binds.
+
+    Returns the rewritten statement and its binds (:p1, :p2, ...), so the same question asked
+    with different values shares one cursor. Anything other than a single query, and SQL
+    that already uses binds, is returned unchanged with no binds.
+    """
+    if not classify(sql).is_query:
+        return sql, {}
+    parts = []
+    binds = {}
+    clauses = [None]   # Current clause per nesting level
+    openers = []       # Word before each open parenthesis
+    previous = ""
+    last = 0
+    for match in _TOKEN.finditer(sql):
+        kind = match.lastgroup
+        if kind == "skip":
+            continue
+        text = match.group(0)
+        if kind == "symbol":
+            if text == ":":
+                return sql, {}  # Already parameterized
+            if text == "'":
+                return sql, {}  # A quote the tokenizer couldn't pair; rewriting around it is unsafe
+            if text == "(":
+                openers.append(previous)
+                clauses.append(clauses[-1])
+            elif text == ")" and openers:
+                openers.pop()
+                clauses.pop()
+        elif kind == "word":
+            text = text.upper()
+            if text in _BIND_CLAUSES or text in _BIND_CLAUSE_RESET:
+                clauses[-1] = text
+        elif (kind in ("literal", "number") and clauses[-1] in _BIND_CLAUSES and previous not in _TYPED_LITERALS
+              and not (openers and openers[-1] in _LITERAL_ARGUMENTS)):
+            name = f"p{len(binds) + 1}"
+            binds[name] = _literal_value(kind, text)
+            parts.append(sql[last:match.start()])
+            parts.append(":" + name)
+            last = match.end()
+        previous = text
+    if not binds:
+        return sql, {}
+    parts.append(sql[last:])
+    return "".join(parts), binds
+
+
+def _mask_literals(sql: str) -> str:
+    """Blank out comments and string literals so keyword searches can't match inside them."""
+    def mask(match):
+        text = match.group(0)
+        if text.startswith(("--", "/*")):
+            return " "
+        return text if text.startswith('"') else "''"
+    return _SPECIAL.sub(mask, sql)
+
+
+def normalize_sql(sql: str) -> str:
+    """Canonical text for cache keys: comments dropped, whitespace collapsed, keywords upper-cased.
+
+    Quoted literals and identifiers are kept verbatim since they are case-sensitive.
+    """
+    parts = []
+    code = []
+    last = 0
+    for match in _SPECIAL.finditer(sql):
+        code.append(sql[last:match.start()])
+        text = match.group(0)
+        if text.startswith(("--", "/*")):
+            code.append(" ")
+        else:
+            parts.append(_WHITESPACE.sub(" ", "".join(code)).upper())
+            parts.append(text)
+            code = []
+        last = match.end()
+    code.append(sql[last:])
+    parts.append(_WHITESPACE.sub(" ", "".join(code)).upper())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def qualify(name: str, default_schema: Optional[str] = None) -> str:
+    """Upper-case an unquoted table name and prefix the session schema when it has none."""
+    parts = [p.strip() for p in name.split(".")]
+    parts = [p[1:-1] if p.startswith('"') else p.upper() for p in parts]
+    if len(parts) == 1 and default_schema:
+        parts.insert(0, default_schema.upper())
+    return ".".join(parts)
+
+
+def referenced_tables(sql: str, default_schema: Optional[str] = None) -> Optional[Set[str]]:
+    """Best-effort set of tables the statement reads; None when nothing recognisable was found."""
+    tables = {qualify(name, default_schema) for name in classify(sql).tables}
+    return tables or None
+
+
+def quote_identifier(name: str) -> str:
+    """Double-quote a column or alias so it is used verbatim, whatever its case or characters."""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def has_row_limit(sql: str) -> bool:
+    """Whether the statement already uses OFFSET or FETCH FIRST/NEXT somewhere."""
+    return bool(_ROW_LIMIT.search(_mask_literals(sql)))
+
+
+def duplicate_columns(columns: Sequence[str]) -> List[str]:
+    """Result column names that occur more than once (e.g. SELECT * over a join). Such a query
+    can't be wrapped as SELECT ... FROM (query): Oracle rejects it with ORA-00918."""
+    seen, duplicates = set(), []
+    for name in columns:
+        if name in seen and name not in duplicates:
+            duplicates.append(name)
+        seen.add(name)
+    return duplicates
+
+
+def identifiers(sql: str) -> Set[str]:
+    """Every identifier-like word in the statement, for conservative table matching."""
+    return set(classify(sql).words)
+
+
+def write_targets(sql: str, default_schema: Optional[str] = None) -> Optional[Set[str]]:
+    """Tables a DDL/DML statement modifies; None when the target can't be determined."""
+    targets = classify(sql).write_targets
+    if targets is None:
+        return None
+    return {qualify(name, default_schema) for name in targets}
@@ -1,9 +1,6 @@
 import streamlit as st
-from oracle_manager import OracleManager
-from data_visualizer import DataVisualizer
-from groq_handler import GroqHandler
-from security import SecurityManager
-from health_monitor import HealthMonitor
+import resources
+from connection_pool import pool_options_from_env
 from dotenv import load_dotenv
 import os
 
@@ -11,17 +8,18 @@ load_dotenv()
 
 class StateManager:
     def init_state(self):
-        # Initialize OracleManager with placeholder values (to be updated by UI)
+        # Connection options shared by every OracleManager this session creates
+        if "oracle_options" not in st.session_state:
+            st.session_state.oracle_options = {
+                "pooled": os.getenv("ORACLE_POOLED", "true").lower() == "true",
+                "pool_options": pool_options_from_env(),
+                "arraysize": int(os.getenv("QUERY_FETCH_ARRAYSIZE", "1000")),
+            }
+
+        # The OracleManager is created by the connection form; until then there is none, so the
+        # database, pandas and charting modules are not imported before the form is shown
         if "oracle" not in st.session_state:
-            # Use defaults or env vars as fallback if available, otherwise placeholders
-            default_host = os.getenv("ORACLE_HOST", "localhost")
-            default_port = int(os.getenv("ORACLE_PORT", "1521"))
-            default_service = os.getenv("ORACLE_SERVICE", "orcl")
-            st.session_state.oracle = OracleManager(default_host, default_port, default_service)
-        
-        # Store OracleManager class for later instantiation with user-provided details
-        if "oracle_class" not in st.session_state:
-            st.session_state.oracle_class = OracleManager
+            st.session_state.oracle = None
 
         # SQL and query-related state
         if "generated_sql" not in st.session_state:
@@ -30,6 +28,10 @@ class StateManager:
             st.session_state.executed_sql = None
         if "query_df" not in st.session_state:
             st.session_state.query_df = None
+        if "result_base" not in st.session_state:
+            st.session_state.result_base = None  # (connection identity, sql, rows, fetched at) of the last Oracle result
+        if "result_source" not in st.session_state:
+            st.session_state.result_source = None
 
         # Chat-related state variables
         if "chat_user_question" not in st.session_state:
@@ -51,26 +53,18 @@ class StateManager:
         if "viz_sql" not in st.session_state:
             st.session_state.viz_sql = None
 
-        # Component classes and instances
-        if "groq_class" not in st.session_state:
-            st.session_state.groq_class = GroqHandler
+        # Shared components: sessions hold references to process-wide instances
         if "selected_llm" not in st.session_state:
             st.session_state.selected_llm = "qwen-2.5-coder-32b"  # Default LLM
         if "groq" not in st.session_state:
-            st.session_state.groq = GroqHandler(st.session_state.selected_llm)
+            st.session_state.groq = resources.groq_handler(st.session_state.selected_llm)
         if "security" not in st.session_state:
-            st.session_state.security = SecurityManager()
-        if "monitor" not in st.session_state:
-            st.session_state.monitor = HealthMonitor()
-
-        # Store DataVisualizer class for instantiation after connection
-        if "visualizer_class" not in st.session_state:
-            st.session_state.visualizer_class = DataVisualizer
+            st.session_state.security = resources.security_manager()
 
         # Initialize visualizer if oracle is connected
-        if "visualizer" not in st.session_state and "oracle" in st.session_state:
-            if st.session_state.oracle.conn:  # Only initialize if connected
-                st.session_state.visualizer = DataVisualizer(st.session_state.oracle)
+        if "visualizer" not in st.session_state and self.is_connected():
+            from data_visualizer import DataVisualizer
+            st.session_state.visualizer = DataVisualizer(st.session_state.oracle)
 
         # DDL/DML control state
         if "ddl_dml_enabled" not in st.session_state:
@@ -78,8 +72,17 @@ class StateManager:
         if "ddl_dml_output" not in st.session_state:
             st.session_state.ddl_dml_output = None
 
+    def is_connected(self) -> bool:
+        oracle = st.session_state.get("oracle")
+        return oracle is not None and oracle.is_connected
+
     def get_state(self, key):
         return st.session_state.get(key)
 
     def update_state(self, key, value):
-        st.session_state[key] = value
\ No newline at end of file
+        st.session_state[key] = value
+
+    def clear_result_base(self):
+        """Forget the result follow-ups are answered from; called whenever the connection changes."""
+        st.session_state.result_base = None
+        st.session_state.result_source = None
@@ -0,0 +1,266 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+RECENT_SPANS = int(os.getenv("TRACE_RECENT_SPANS", "2000"))  # Finished spans kept for the Performance panel
+EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")  # No file export when empty
+EXPORT_FORMAT = os.getenv("TRACE_EXPORT_FORMAT", "prometheus")  # "prometheus" or "otlp"
+EXPORT_INTERVAL = float(os.getenv("TRACE_EXPORT_INTERVAL", "60"))
+PROMPT_LOG_SAMPLE = float(os.getenv("PROMPT_LOG_SAMPLE", "0.1"))  # Share of prompts logged at DEBUG
+PROMPT_LOG_CHARS = 2000
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILE_SAMPLES = 1024  # Most recent durations per span name the percentiles are computed from
+
+
+class Span:
+    """One timed operation; numeric attributes (rows, bytes, tokens) are summed per span name."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "seconds", "attributes", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict):
+        self.name = name
+        self.span_id = random.getrandbits(64)
+        self.trace_id = parent.trace_id if parent is not None else random.getrandbits(128)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.seconds = 0.0
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+
+class _NullSpan:
+    """Handed out while tracing is off, so call sites never check."""
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Histogram:
+    """Cumulative bucket counts for export plus a window of recent durations for percentiles."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=QUANTILE_SAMPLES)
+        self.sums: Dict[str, float] = {}
+
+    def observe(self, seconds: float, attributes: Dict):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        for key, value in attributes.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                self.sums[key] = self.sums.get(key, 0) + value
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.recent)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)] if ordered else 0.0
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """In-process spans and latency histograms per operation, exportable as Prometheus text or
+    OpenTelemetry (OTLP/JSON) lines. Spans nest through a context variable, so a database call
+    made during a Streamlit rerun is recorded as its child; work on other threads starts a trace.
+    """
+
+    def __init__(self, enabled: bool = True, recent: int = RECENT_SPANS):
+        self.enabled = enabled
+        self.recent: deque = deque(maxlen=recent)
+        self.histograms: Dict[str, Histogram] = {}
+        self._unexported: deque = deque(maxlen=recent)  # Finished spans not yet written as OTLP
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+        span = Span(name, _current.get(), attributes)
+        token = _current.set(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:  # Streamlit's rerun/stop signals are BaseExceptions, not failures
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.seconds = time.perf_counter() - start
+            _current.reset(token)
+            self._finish(span)
+
+    def record(self, name: str, seconds: float, **attributes):
+        """A span timed by the caller (e.g. time spent across many fetch calls), ending now."""
+        if not self.enabled:
+            return
+        span = Span(name, _current.get(), attributes)
+        span.seconds = seconds
+        span.start_ns -= int(seconds * 1e9)
+        self._finish(span)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            histogram = self.histograms.get(span.name)
+            if histogram is None:
+                histogram = self.histograms[span.name] = Histogram()
+            histogram.observe(span.seconds, span.attributes)
+            self.recent.append(span)
+            self._unexported.append(span)
+
+    def summary(self) -> List[Dict]:
+        """Count, percentiles and attribute totals per span name, slowest p95 first."""
+        with self._lock:
+            rows = [{
+                "span": name,
+                "count": h.count,
+                "p50_ms": h.quantile(0.50) * 1000,
+                "p95_ms": h.quantile(0.95) * 1000,
+                "p99_ms": h.quantile(0.99) * 1000,
+                "total_s": h.total,
+                **{key: value for key, value in h.sums.items()},
+            } for name, h in self.histograms.items()]
+        return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+    def spans(self) -> List[Span]:
+        """The most recently finished spans, oldest first."""
+        with self._lock:
+            return list(self.recent)
+
+    def slowest(self, limit: int = 20) -> List[Span]:
+        return sorted(self.spans(), key=lambda span: span.seconds, reverse=True)[:limit]
+
+    def prometheus(self) -> str:
+        """Histograms in the Prometheus text exposition format."""
+        lines = ["# HELP dataquest_span_duration_seconds Time spent per traced operation.",
+                 "# TYPE dataquest_span_duration_seconds histogram"]
+        totals = []
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'dataquest_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'dataquest_span_duration_seconds_sum{{span="{name}"}} {h.total:.6f}')
+                lines.append(f'dataquest_span_duration_seconds_count{{span="{name}"}} {h.count}')
+                totals.extend((name, key, value) for key, value in sorted(h.sums.items()))
+        lines += ["# HELP dataquest_span_attribute_total Rows, bytes and tokens summed per traced operation.",
+                  "# TYPE dataquest_span_attribute_total counter"]
+        lines += [f'dataquest_span_attribute_total{{span="{name}",attribute="{key}"}} {value:g}'
+                  for name, key, value in totals]
+        return "\n".join(lines) + "\n"
+
+    def otlp(self, spans: List[Span]) -> str:
+        """Spans as one OTLP/JSON ExportTraceServiceRequest, the OpenTelemetry file exporter format."""
+        def attribute(key, value):
+            if isinstance(value, bool):
+                return {"key": key, "value": {"boolValue": value}}
+            if isinstance(value, int):
+                return {"key": key, "value": {"intValue": str(value)}}
+            if isinstance(value, float):
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        encoded = []
+        for span in spans:
+            item = {
+                "traceId": f"{span.trace_id:032x}",
+                "spanId": f"{span.span_id:016x}",
+                "name": span.name,
+                "kind": 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.start_ns + int(span.seconds * 1e9)),
+                "attributes": [attribute(k, v) for k, v in span.attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {},
+            }
+            if span.parent_id is not None:
+                item["parentSpanId"] = f"{span.parent_id:016x}"
+            encoded.append(item)
+        return json.dumps({"resourceSpans": [{
+            "resource": {"attributes": [attribute("service.name", "dataquest")]},
+            "scopeSpans": [{"scope": {"name": "dataquest.tracing"}, "spans": encoded}],
+        }]})
+
+    def export(self, path: str, fmt: str = "prometheus"):
+        """Prometheus replaces the file with current totals; OTLP appends the spans finished since
+        the last export as one JSON line."""
+        if fmt == "otlp":
+            with self._lock:
+                spans = list(self._unexported)
+                self._unexported.clear()
+            if spans:
+                with open(path, "a", encoding="utf-8") as out:
+                    out.write(self.otlp(spans) + "\n")
+        elif fmt == "prometheus":
+            partial = f"{path}.tmp"
+            with open(partial, "w", encoding="utf-8") as out:
+                out.write(self.prometheus())
+            os.replace(partial, path)  # Scrapers never see a half-written file
+        else:
+            raise ValueError(f"Unsupported trace export format: {fmt}")
+
+    def clear(self):
+        with self._lock:
+            self.recent.clear()
+            self._unexported.clear()
+            self.histograms = {}
+
+
+def log_prompt(label: str, text: str):
+    """Log a sample of prompts and responses at DEBUG, truncated; formatting large prompts on
+    every call was a measurable cost, so nothing is built unless the record will be emitted."""
+    if random.random() < PROMPT_LOG_SAMPLE and logging.getLogger().isEnabledFor(logging.DEBUG):
+        suffix = f"... ({len(text):,} chars)" if len(text) > PROMPT_LOG_CHARS else ""
+        logging.debug(f"{label}: {text[:PROMPT_LOG_CHARS]}{suffix}")
+
+
+_exporter_lock = threading.Lock()
+_exporter: Optional[threading.Thread] = None
+
+
+def start_exporter():
+    """Write TRACE_EXPORT_PATH every TRACE_EXPORT_INTERVAL seconds from one daemon thread per process."""
+    global _exporter
+    if not EXPORT_PATH or not tracer.enabled:
+        return
+    with _exporter_lock:
+        if _exporter is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(EXPORT_INTERVAL)
+                try:
+                    tracer.export(EXPORT_PATH, EXPORT_FORMAT)
+                except Exception as e:
+                    logging.warning(f"Trace export failed: {str(e)}")
+
+        _exporter = threading.Thread(target=loop, name="trace-exporter", daemon=True)
+        _exporter.start()
+
+
+# Process-wide: the histograms cover every session, like the result cache
+tracer = Tracer(enabled=ENABLED)
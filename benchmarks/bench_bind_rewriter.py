@@ -0,0 +1,89 @@
+"""Parse counts when the same questions are asked with different values, with and without binds.
+
+Each execution picks one of a few generated-SQL templates and fills in random literal values,
+as the LLM does. "literals" executes the text as generated; "binds" runs it through the
+BindRewriter first. The fake driver counts parse calls (statement cache misses on the
+connection) and hard parses (statement texts the server has never seen). A few rewrites with known results, such
+as typed literals written without a space (DATE'2024-01-01'), are checked before timing starts.
+
+Usage: python benchmarks/bench_bind_rewriter.py [executions] [distinct_values] [stmt_cache_size]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from bind_rewriter import BindRewriter
+from oracle_manager import OracleManager
+from query_cache import QueryResultCache
+from sql_parser import parameterize
+
+TEMPLATES = [
+    "SELECT first_name, last_name, salary FROM employees WHERE department_id = {n} ORDER BY salary DESC",
+    "SELECT * FROM orders o JOIN customers c ON c.id = o.customer_id WHERE c.region = '{s}' AND o.total > {n}.50",
+    "SELECT region, COUNT(*) FROM sales WHERE sale_date > SYSDATE - {n} GROUP BY region",
+    "SELECT * FROM products WHERE category = '{s}' AND price BETWEEN {n} AND {n}0 FETCH FIRST 10 ROWS ONLY",
+]
+
+# Rewrites checked before anything is timed: (generated SQL, expected statement, expected binds)
+EXPECTED = [
+    ("SELECT * FROM employees WHERE hire_date > DATE'2024-01-01' AND department_id = 10",
+     "SELECT * FROM employees WHERE hire_date > DATE'2024-01-01' AND department_id = :p1", {"p1": 10}),
+    ("SELECT * FROM employees WHERE hire_date > DATE '2024-01-01' AND last_name = 'O''Brien'",
+     "SELECT * FROM employees WHERE hire_date > DATE '2024-01-01' AND last_name = :p1", {"p1": "O'Brien"}),
+    ("SELECT * FROM events WHERE created < TIMESTAMP'2024-01-01 10:00:00' - INTERVAL'5' DAY AND kind = 'X'",
+     "SELECT * FROM events WHERE created < TIMESTAMP'2024-01-01 10:00:00' - INTERVAL'5' DAY AND kind = :p1",
+     {"p1": "X"}),
+]
+
+
+def check():
+    for sql, statement, params in EXPECTED:
+        assert parameterize(sql) == (statement, params), f"unexpected rewrite of {sql!r}: {parameterize(sql)}"
+
+
+def statements(count, distinct):
+    rng = random.Random(0)
+    for _ in range(count):
+        value = rng.randrange(distinct)
+        yield rng.choice(TEMPLATES).format(n=value, s=f"REGION_{value}")
+
+
+def run(label, rewriter, oracle, count, distinct):
+    fake_oracle.flush_shared_pool()
+    fake_oracle.reset_stats()
+    rewrite_time = 0.0
+    for sql in statements(count, distinct):
+        start = time.perf_counter()
+        statement, params = rewriter.rewrite(sql)
+        rewrite_time += time.perf_counter() - start
+        oracle.execute_query(statement, max_rows=10, use_cache=False, params=params)
+    stats = rewriter.stats()
+    print(f"{label:>9s} {stats['executions']:>11,d} {stats['shapes']:>8,d} {fake_oracle.stats['parses']:>8,d} "
+          f"{fake_oracle.stats['hard_parses']:>12,d} {rewrite_time * 1e6 / count:>12.1f}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    check()
+    fake_oracle.configure(rows=10)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    if len(sys.argv) > 3:
+        oracle.conn.stmtcachesize = int(sys.argv[3])
+    print(f"executions: {count:,}  distinct values: {distinct:,}  statement cache: {oracle.conn.stmtcachesize}")
+    print(f"{'mode':>9s} {'executions':>11s} {'shapes':>8s} {'parses':>8s} {'hard parses':>12s} {'rewrite µs':>12s}")
+    run("literals", BindRewriter(enabled=False), oracle, count, distinct)
+    run("binds", BindRewriter(enabled=True), oracle, count, distinct)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Loads rows through the fake driver one statement at a time vs with array-bound executemany.
+
+"row-by-row" is what execute_ddl_dml allows: one INSERT and one commit per row. The bulk modes
+use OracleManager.execute_many with a commit per batch or once per job. Every 1000th row has a
+NULL key and is rejected, to show batch errors being collected without stopping the load.
+
+Usage: python benchmarks/bench_bulk_write.py [rows] [batch_rows] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import numpy as np
+import pandas as pd
+import fake_oracle
+from bulk_writer import insert_sql
+from oracle_manager import OracleManager
+from query_cache import QueryResultCache
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    ids = pd.array(np.arange(rows), dtype="Int64")
+    ids[::1000] = pd.NA
+    return pd.DataFrame({
+        "id": ids,
+        "region": rng.choice(["NORTH", "SOUTH", "EAST", "WEST"], rows),
+        "amount": rng.gamma(2.0, 50.0, rows).round(2),
+        "created": pd.Timestamp("2024-01-01") + pd.to_timedelta(np.arange(rows), unit="min"),
+    })
+
+
+def row_by_row(oracle, df):
+    for row in df.itertuples(index=False):
+        values = ", ".join("NULL" if pd.isna(v) else repr(str(v)) for v in row)
+        try:
+            oracle.execute_ddl_dml(f"INSERT INTO sales (id, region, amount, created) VALUES ({values})")
+        except Exception:
+            pass  # The NULL-key rows fail one by one
+
+
+def report(label, rows, run):
+    fake_oracle.reset_stats()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    failed = result["failed"] if result else "-"
+    print(f"{label:>16s} {fake_oracle.stats['round_trips']:>12,d} {fake_oracle.stats['commits']:>8,d} "
+          f"{elapsed:>9.2f} {rows / elapsed:>11,.0f} {failed:>7}")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    batch_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0002
+    fake_oracle.configure(execute_latency=latency)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    df = make_frame(rows)
+    sql = insert_sql("sales", df.columns)
+    print(f"rows: {rows:,}  batch: {batch_rows:,}  latency: {latency * 1000:g} ms per round trip")
+    print(f"{'mode':>16s} {'round trips':>12s} {'commits':>8s} {'seconds':>9s} {'rows/s':>11s} {'failed':>7s}")
+    report("row-by-row", rows, lambda: row_by_row(oracle, df))
+    report("bulk, per batch", rows, lambda: oracle.execute_many(sql, df, batch_rows))
+    report("bulk, per job", rows, lambda: oracle.execute_many(sql, df, batch_rows, commit_each_batch=False))
+    chunks = (df.iloc[i:i + batch_rows * 4] for i in range(0, rows, batch_rows * 4))
+    report("bulk, chunked", rows, lambda: oracle.execute_many(sql, chunks, batch_rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compares plotting every row with the chart engine's point budget as the result grows.
+
+Time covers building the figure and serializing it to JSON, which is what reaches the browser;
+the last column is an unchanged rerun served from the figure cache.
+
+Usage: python benchmarks/bench_charts.py [point_budget]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import plotly.express as px
+import fake_oracle
+from chart_engine import ChartEngine, ChartSpec
+from figure_cache import FigureCache
+from materializer import build_frame, column_kinds
+
+CHARTS = [
+    ("Bar Chart", "REGION", ["AMOUNT"], lambda df: px.bar(df, x="REGION", y=["AMOUNT"])),
+    ("Line Chart", "CREATED", ["AMOUNT"], lambda df: px.line(df, x="CREATED", y=["AMOUNT"])),
+    ("Scatter Plot", "AMOUNT", ["QUANTITY"], lambda df: px.scatter(df, x="AMOUNT", y="QUANTITY")),
+    ("Histogram", "AMOUNT", [], lambda df: px.histogram(df, x="AMOUNT")),
+]
+
+
+def load_frame(rows):
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.execute("SELECT * FROM SALES")
+    columns = [col[0] for col in cursor.description]
+    return build_frame(columns, column_kinds(cursor.description, fake_oracle), cursor.fetchall())
+
+
+def timed(build):
+    start = time.perf_counter()
+    payload = len(build().to_json())
+    return (time.perf_counter() - start) * 1000, payload
+
+
+def main():
+    budget = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    engine = ChartEngine(None, budget=budget)
+    cache = FigureCache()
+    print(f"point budget: {budget:,}")
+    print(f"{'chart':>13s} {'rows':>10s} {'all ms':>9s} {'all KiB':>9s} {'budget ms':>10s} {'budget KiB':>11s} {'rerun us':>9s}")
+    for rows in (10000, 100000, 1000000):
+        df = load_frame(rows)
+        for chart_type, x, y, naive in CHARTS:
+            full_ms, full_bytes = timed(lambda: naive(df))
+            spec = ChartSpec(chart_type, x, tuple(y))
+            ms, size = timed(lambda: cache.put(df, spec, *engine.build(spec, df, None))["figure"])
+            start = time.perf_counter()
+            cache.get(df, spec)
+            rerun_us = (time.perf_counter() - start) * 1e6
+            print(f"{chart_type:>13s} {rows:>10,d} {full_ms:9.0f} {full_bytes / 1024:9,.0f} {ms:10.0f} "
+                  f"{size / 1024:11,.0f} {rerun_us:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
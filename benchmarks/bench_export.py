@@ -0,0 +1,64 @@
+"""Compares the old export path (whole result in a DataFrame, then `to_excel`) with streaming exports.
+
+Each mode runs in its own process so peak RSS is measured in isolation.
+
+Usage: python benchmarks/bench_export.py [rows]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from export_engine import available_formats, write_export
+from result_stream import ResultStream
+
+MODES = ["legacy Excel", "CSV", "Excel", "Parquet"]
+
+
+def open_stream(rows):
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.arraysize = 1000
+    cursor.execute("SELECT * FROM SALES")
+    return ResultStream(cursor, fake_oracle)
+
+
+def run(mode, rows):
+    start = time.perf_counter()
+    with tempfile.TemporaryFile() as out:
+        stream = open_stream(rows)
+        if mode == "legacy Excel":
+            stream.read_all().to_excel(out, index=False, engine="openpyxl")
+        else:
+            write_export(stream, stream.columns, mode, out, stream.kinds)
+        size = out.tell()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(f"{elapsed:.2f} {peak:.0f} {size}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        run(sys.argv[2], int(sys.argv[3]))
+        return
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    formats = available_formats()
+    print(f"rows: {rows:,}")
+    print(f"{'mode':>14s} {'seconds':>9s} {'peak MiB':>9s} {'file MiB':>9s}")
+    for mode in MODES:
+        if mode == "Parquet" and mode not in formats:
+            print(f"{mode:>14s}   skipped (pyarrow unavailable)")
+            continue
+        output = subprocess.run([sys.executable, __file__, "--run", mode, str(rows)],
+                                capture_output=True, text=True, check=True).stdout.split()
+        seconds, peak, size = float(output[0]), float(output[1]), int(output[2])
+        print(f"{mode:>14s} {seconds:9.2f} {peak:9.0f} {size / 2 ** 20:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Replays recorded V$ metrics through the sampler and compares per-sample cost with refitting on every check.
+
+Writes a synthetic recording (with injected load spikes) unless a recording is given.
+
+Usage: python benchmarks/bench_health_monitor.py [samples] [recording.jsonl]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from health_monitor import HealthMonitor
+from metrics_sampler import MetricsSampler, ReplaySource, SYSMETRICS, SYSSTATS, TABLESPACE_METRIC
+
+SPIKE_EVERY = 150
+
+
+def write_recording(path, samples, seed=3):
+    rng = np.random.default_rng(seed)
+    counters = {name: 1e6 for name in SYSSTATS}
+    spikes = set(range(SPIKE_EVERY, samples, SPIKE_EVERY))
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(samples):
+            load = 8.0 if i in spikes else 1.0
+            rows = [("sysmetric", name, float(abs(rng.normal(20 * load, 3)))) for name in SYSMETRICS]
+            for name in SYSSTATS:
+                counters[name] += abs(rng.normal(500 * load, 50)) * 15
+                rows.append(("sysstat", name, counters[name]))
+            rows.append(("wait_class", "CPU", int(rng.poisson(2 * load))))
+            rows.append(("wait_class", "User I/O", int(rng.poisson(1 * load))))
+            rows.append(("tablespace", TABLESPACE_METRIC, 60.0 + i * 0.001))
+            f.write(json.dumps({"ts": 1.7e9 + i * 15, "rows": rows}) + "\n")
+    return spikes
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), "dataquest_metrics.jsonl")
+    spikes = write_recording(path, samples) if len(sys.argv) <= 2 else set()
+
+    sampler = MetricsSampler(ReplaySource(path), interval=0, capacity=samples)
+    start = time.perf_counter()
+    while sampler.tick():
+        pass
+    elapsed = time.perf_counter() - start
+    df = sampler.ring.frame()
+    print(f"samples: {len(df):,}  refits: {sampler.monitor.fits}")
+    print(f"streaming   {elapsed / len(df) * 1000:7.2f} ms per sample (sample, score, amortized refit)")
+
+    start = time.perf_counter()
+    sampler.ring.frame(240)  # What the Health Monitor tab reads on each render
+    print(f"render      {(time.perf_counter() - start) * 1000:7.2f} ms to read the buffer")
+
+    # The old tab refit a fresh model on every click
+    legacy = HealthMonitor()
+    data = np.nan_to_num(df.drop(columns="anomaly_score").to_numpy()[-legacy.window:])
+    start = time.perf_counter()
+    legacy.train_model(data)
+    legacy.detect_anomalies(data)
+    print(f"refit+score {(time.perf_counter() - start) * 1000:7.2f} ms per click (previous behaviour)")
+
+    if spikes:
+        flagged = set(np.flatnonzero(df["anomaly_score"].to_numpy() < 0))
+        caught = len(spikes & flagged)
+        print(f"spikes      {caught}/{len(spikes)} injected spikes flagged, {len(flagged - spikes)} other points flagged")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Latency of drill-down follow-ups answered from the previous result vs sent to the database.
+
+The base query fetches the fake table once. Each follow-up narrows, reorders or summarizes it;
+"oracle" runs it through OracleManager against the fake driver (a round trip per fetch batch at
+the given latency, the result cache off), "local" through answer_locally over the base DataFrame.
+Follow-ups that cannot be answered locally (here, a join) show "-" and would go to Oracle.
+
+Usage: python benchmarks/bench_local_query.py [rows] [follow_ups] [latency_ms]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from local_query import answer_locally
+from oracle_manager import OracleManager
+from query_cache import QueryResultCache
+
+BASE = "SELECT * FROM sales WHERE amount > 10"
+FOLLOW_UPS = [
+    ("filter", "SELECT * FROM sales WHERE amount > 10 AND region = 'NORTH'"),
+    ("project + sort", "SELECT id, amount FROM sales WHERE amount > 10 ORDER BY amount DESC FETCH FIRST 20 ROWS ONLY"),
+    ("group by", "SELECT region, COUNT(*) AS n, AVG(amount) FROM sales WHERE amount > 10 GROUP BY region"),
+    ("subquery", f"SELECT region, MAX(quantity) FROM ({BASE}) WHERE quantity IS NOT NULL GROUP BY region ORDER BY 2"),
+    ("join", "SELECT * FROM sales s JOIN regions r ON r.name = s.region WHERE s.amount > 10"),
+]
+
+
+def timed(run, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latency = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 0.0002
+    fake_oracle.configure(rows=rows, execute_latency=latency, fetch_latency=latency)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    base_df = oracle.execute_query(BASE, max_rows=rows)
+    print(f"base rows: {len(base_df):,}  latency: {latency * 1000:g} ms per round trip  local runs: {repeat}")
+    print(f"{'follow-up':>15s} {'oracle ms':>10s} {'local ms':>9s} {'speedup':>8s} {'rows':>7s}")
+    for label, sql in FOLLOW_UPS:
+        oracle_seconds, _ = timed(lambda: oracle.execute_query(sql, max_rows=rows), 1)
+        local_seconds, result = timed(lambda: answer_locally(sql, BASE, base_df), repeat)
+        if result is None:
+            print(f"{label:>15s} {oracle_seconds * 1000:>10.1f} {'-':>9s} {'-':>8s} {'-':>7s}")
+            continue
+        print(f"{label:>15s} {oracle_seconds * 1000:>10.1f} {local_seconds * 1000:>9.2f} "
+              f"{oracle_seconds / local_seconds:>7.0f}x {len(result):>7,d}")
+
+
+if __name__ == "__main__":
+    main()
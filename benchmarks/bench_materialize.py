@@ -0,0 +1,52 @@
+"""Compares the old fetchall -> object DataFrame build with typed, columnar materialization.
+
+Usage: python benchmarks/bench_materialize.py [rows]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import pandas as pd
+import fake_oracle
+from materializer import build_frame, column_kinds
+
+
+def legacy_frame(cursor):
+    columns = [col[0] for col in cursor.description]
+    return pd.DataFrame(cursor.fetchall(), columns=columns)
+
+
+def typed_frame(cursor):
+    columns = [col[0] for col in cursor.description]
+    return build_frame(columns, column_kinds(cursor.description, fake_oracle), cursor.fetchall())
+
+
+def measure(build, repeats=3):
+    best = float("inf")
+    for _ in range(repeats):
+        cursor = fake_oracle.connect().cursor()
+        cursor.arraysize = 10000
+        cursor.execute("SELECT * FROM SALES")
+        start = time.perf_counter()
+        df = build(cursor)
+        best = min(best, time.perf_counter() - start)
+    return best, int(df.memory_usage(deep=True).sum()), df
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    fake_oracle.configure(rows=rows)
+    fake_oracle.synthetic_rows()  # Generate outside the timed region
+    legacy_time, legacy_bytes, _ = measure(legacy_frame)
+    typed_time, typed_bytes, typed = measure(typed_frame)
+    print(f"rows: {rows:,}")
+    print(f"legacy: {legacy_time * 1000:8.1f} ms  {legacy_bytes / 1024 ** 2:8.2f} MiB")
+    print(f"typed:  {typed_time * 1000:8.1f} ms  {typed_bytes / 1024 ** 2:8.2f} MiB")
+    print(f"memory saved: {1 - typed_bytes / legacy_bytes:.0%}")
+    print(typed.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Times the slow-query optimizer: one blocking LLM call per statement vs the concurrent, cached engine.
+
+Usage: python benchmarks/bench_optimizer.py [statements] [llm_latency_seconds] [concurrency]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_groq
+from groq_handler import GroqHandler
+from optimizer_engine import OptimizerEngine
+
+
+class FakePerformanceSource:
+    """What OracleManager returns from V$SQL / V$SQL_PLAN, one simulated round trip per call."""
+
+    def __init__(self, statements, round_trip=0.02):
+        self.statements = statements
+        self.round_trip = round_trip
+
+    def get_performance_data(self, limit):
+        time.sleep(self.round_trip)
+        return [
+            {"sql_id": f"sql{i:05d}", "plan_hash_value": 1000 + i,
+             "sql_text": f"SELECT * FROM SALES WHERE REGION = :r AND ID > {i}",
+             "elapsed_time": 5e6, "executions": 10, "elapsed_per_exec": 5e5, "buffer_gets": 1000,
+             "disk_reads": 10, "rows_processed": 100, "child_cursors": 1}
+            for i in range(min(limit, self.statements))
+        ]
+
+    def get_execution_plans(self, statements):
+        time.sleep(self.round_trip)
+        return {(s["sql_id"], s["plan_hash_value"]): "  0 SELECT STATEMENT\n  1   TABLE ACCESS FULL APP.SALES"
+                for s in statements}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    fake_groq.configure(latency=latency)
+    groq = GroqHandler("bench-model", client=fake_groq.Groq(), async_client=fake_groq.AsyncGroq())
+    source = FakePerformanceSource(count)
+    print(f"statements: {count}  llm latency: {latency:g}s  concurrency: {concurrency}")
+
+    # Previous behaviour: one blocking call per statement, nothing cached
+    start = time.perf_counter()
+    for statement in source.get_performance_data(count):
+        groq.client.chat.completions.create(model=groq.model, messages=[])
+    print(f"sequential  {time.perf_counter() - start:7.2f} s")
+
+    engine = OptimizerEngine(source, groq, max_concurrency=concurrency)
+    for label in ("engine", "cached"):
+        fake_groq.reset_stats()
+        start = time.perf_counter()
+        statements = engine.analyze(engine.harvest(count))
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for s in statements if s["error"])
+        print(f"{label:10s}  {elapsed:7.2f} s  ({fake_groq.stats['calls']} LLM calls, {failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compares `pivot_table` with the factorize/bincount heatmap kernel on object columns.
+
+Usage: python benchmarks/bench_pivot_grid.py [rows] [x_categories] [y_categories]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import numpy as np
+import pandas as pd
+from pivot_grid import AGGREGATES, cached_pivot_grid, pivot_grid
+
+
+def make_frame(rows, x_categories, y_categories):
+    rng = np.random.default_rng(0)
+    # Skewed object columns, like customer or product names in a real result
+    x = rng.zipf(1.3, rows) % x_categories
+    y = rng.integers(0, y_categories, rows)
+    return pd.DataFrame({
+        "CUSTOMER": np.array([f"customer-{i}" for i in range(x_categories)], dtype=object)[x],
+        "PRODUCT": np.array([f"product-{i}" for i in range(y_categories)], dtype=object)[y],
+        "AMOUNT": rng.gamma(2.0, 50.0, rows),
+    })
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    x_categories = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    y_categories = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    df = make_frame(rows, x_categories, y_categories)
+    print(f"rows: {rows:,}  customers: {df['CUSTOMER'].nunique():,}  products: {y_categories:,}")
+    # Object columns, and categoricals as the materializer builds them for repetitive text
+    for label, frame in (("object", df), ("category", df.astype({"CUSTOMER": "category", "PRODUCT": "category"}))):
+        print(f"{label} columns")
+        print(f"{'agg':>6s} {'pivot_table ms':>15s} {'kernel ms':>10s} {'top-69 ms':>10s} "
+              f"{'axes reused ms':>15s} {'cached ms':>10s} {'equal':>6s}")
+        for agg in AGGREGATES:
+            table_ms, table = timed(lambda: frame.pivot_table(values="AMOUNT", index="PRODUCT", columns="CUSTOMER",
+                                                              aggfunc=agg, observed=True))
+            kernel_ms, grid = timed(lambda: pivot_grid(frame, "CUSTOMER", "PRODUCT", "AMOUNT", agg))
+            top_ms, _ = timed(lambda: pivot_grid(frame, "CUSTOMER", "PRODUCT", "AMOUNT", agg, 69))
+            # The first aggregate factorizes the axes; later ones reuse them
+            reused_ms, _ = timed(lambda: cached_pivot_grid(frame, "bench", "CUSTOMER", "PRODUCT", "AMOUNT", agg, 69))
+            cached_ms, _ = timed(lambda: cached_pivot_grid(frame, "bench", "CUSTOMER", "PRODUCT", "AMOUNT", agg, 69))
+            # pivot_table leaves empty cells NaN for mean/min/max but 0 for sum/count, so compare filled cells
+            table = table.reindex(index=grid.index, columns=grid.columns)
+            equal = np.allclose(np.nan_to_num(table.to_numpy()), np.nan_to_num(grid.to_numpy()))
+            print(f"{agg:>6s} {table_ms:15.0f} {kernel_ms:10.0f} {top_ms:10.0f} {reused_ms:15.0f} "
+                  f"{cached_ms:10.3f} {str(equal):>6s}")
+
+
+if __name__ == "__main__":
+    main()
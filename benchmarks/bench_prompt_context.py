@@ -0,0 +1,47 @@
+"""Compares the old `df.head(200).to_string()` prompt data with the token-budgeted profile.
+
+Usage: python benchmarks/bench_prompt_context.py [rows] [token_budget]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from materializer import build_frame, column_kinds
+from prompt_context import build_data_context, count_tokens
+
+# Rough prompt-processing rate used to turn prompt size into added model latency
+PREFILL_TOKENS_PER_SECOND = 2000
+
+
+def load_frame(rows):
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.execute("SELECT * FROM SALES")
+    columns = [col[0] for col in cursor.description]
+    return build_frame(columns, column_kinds(cursor.description, fake_oracle), cursor.fetchall())
+
+
+def measure(name, build):
+    start = time.perf_counter()
+    text = build()
+    elapsed = time.perf_counter() - start
+    tokens = count_tokens(text)
+    print(f"{name:8s} build {elapsed * 1000:8.1f} ms  {len(text):8,d} chars  {tokens:7,d} tokens  "
+          f"~{tokens / PREFILL_TOKENS_PER_SECOND * 1000:6.0f} ms prefill")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    df = load_frame(rows)
+    print(f"rows: {rows:,}  budget: {budget:,} tokens")
+    measure("legacy", lambda: df.head(200).to_string())
+    measure("profile", lambda: build_data_context(df, budget))
+    measure("memo", lambda: build_data_context(df, budget))
+
+
+if __name__ == "__main__":
+    main()
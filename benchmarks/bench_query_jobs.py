@@ -0,0 +1,71 @@
+"""Exercises the query job executor against the fake driver with slow fetches.
+
+Shows in-flight dedupe, how quickly a cancel or timeout takes effect, and concurrent jobs vs inline execution.
+
+Usage: python benchmarks/bench_query_jobs.py [rows] [fetch_latency_seconds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from oracle_manager import OracleManager
+from query_cache import QueryResultCache
+from query_jobs import JobExecutor
+
+
+def wait(job):
+    while not job.done:
+        time.sleep(0.005)
+    return job
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    fake_oracle.configure(rows=rows, fetch_latency=latency)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle, pooled=True,
+                           pool_options={"max_size": 8}, arraysize=1000,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    executor = JobExecutor(max_workers=4, timeout=600)
+    start = time.perf_counter()
+    oracle.execute_query("SELECT * FROM SALES WHERE 0 = 0")
+    baseline = time.perf_counter() - start
+    print(f"rows: {rows:,}  fetch latency: {latency * 1000:g} ms  {baseline:.2f}s per query")
+
+    fake_oracle.reset_stats()
+    first = executor.submit(oracle, "SELECT * FROM SALES")
+    second = executor.submit(oracle, "SELECT * FROM SALES")  # A rerun while the first is in flight
+    wait(first)
+    print(f"dedupe      same job: {first is second}, executes: {fake_oracle.stats['executes']}")
+
+    job = executor.submit(oracle, "SELECT * FROM SALES WHERE 1 = 1")
+    time.sleep(baseline / 3)
+    start = time.perf_counter()
+    job.cancel()
+    wait(job)
+    print(f"cancel      {job.status} after {job.rows_fetched:,} rows, "
+          f"{(time.perf_counter() - start) * 1000:.0f} ms to stop")
+
+    job = wait(executor.submit(oracle, "SELECT * FROM SALES WHERE 2 = 2", timeout=baseline / 2))
+    print(f"timeout     {job.status} after {job.elapsed:.2f}s ({job.rows_fetched:,} rows)")
+
+    queries = [f"SELECT * FROM SALES WHERE {i} = {i}" for i in range(10, 14)]
+    start = time.perf_counter()
+    for sql in queries:
+        oracle.execute_query(sql)
+    inline = time.perf_counter() - start
+    start = time.perf_counter()
+    for job in [executor.submit(oracle, sql) for sql in queries]:
+        wait(job)
+    print(f"4 queries   inline {inline:.2f}s  vs jobs {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compares rendering the whole result with rendering one page of it.
+
+Payload is measured as the JSON-serialized size of what would be handed to `st.dataframe`.
+
+Usage: python benchmarks/bench_result_pager.py [page_size]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+from materializer import build_frame, column_kinds
+from result_pager import ResultPager
+
+
+def load_frame(rows):
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.execute("SELECT * FROM SALES")
+    columns = [col[0] for col in cursor.description]
+    return build_frame(columns, column_kinds(cursor.description, fake_oracle), cursor.fetchall())
+
+
+def render(df):
+    start = time.perf_counter()
+    payload = len(df.to_json(orient="split", date_format="iso"))
+    return (time.perf_counter() - start) * 1000, payload
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'rows':>10s} {'full ms':>9s} {'full KiB':>10s} {'page ms':>9s} {'page KiB':>9s} "
+          f"{'sorted 1st':>11s} {'sorted next':>12s}")
+    for rows in (10000, 100000, 1000000):
+        df = load_frame(rows)
+        full_ms, full_bytes = render(df)
+        pager = ResultPager(None, "SELECT * FROM SALES", df)
+        start = time.perf_counter()
+        page, _ = pager.page(1, size)
+        _, page_bytes = render(page)
+        page_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        pager.page(1, size, ("AMOUNT", False), [("REGION", "=", "EAST")])
+        sorted_first = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        pager.page(2, size, ("AMOUNT", False), [("REGION", "=", "EAST")])  # Memoized order: a slice
+        sorted_next = (time.perf_counter() - start) * 1000
+        print(f"{rows:>10,d} {full_ms:9.1f} {full_bytes / 1024:10,.0f} {page_ms:9.2f} {page_bytes / 1024:9.1f} "
+              f"{sorted_first:11.1f} {sorted_next:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
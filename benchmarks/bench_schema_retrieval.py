@@ -0,0 +1,87 @@
+"""Measures schema retrieval for NL2SQL prompts: index build time, query latency and prompt size.
+
+Compares pasting the whole schema into the prompt with the top-k tables plus FK neighbours.
+
+Usage: python benchmarks/bench_schema_retrieval.py [tables] [columns_per_table]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from prompt_context import count_tokens
+from schema_catalog import SchemaCatalog
+from schema_retriever import SchemaRetriever
+
+WORDS = [
+    "customer", "order", "invoice", "payment", "product", "supplier", "shipment", "warehouse", "employee",
+    "department", "region", "country", "account", "ledger", "budget", "campaign", "contract", "asset",
+    "ticket", "incident", "vendor", "price", "discount", "inventory", "return", "refund", "channel",
+    "session", "device", "subscription", "plan", "usage", "event", "audit", "role", "permission",
+]
+REQUESTS = [
+    "total payment amount per customer region last month",
+    "top 10 products by inventory in each warehouse",
+    "employees per department with their budget",
+    "open incidents and tickets by device",
+    "refunds for returned orders by channel",
+]
+
+
+def synthetic_tables(tables, columns, seed=7):
+    rng = random.Random(seed)
+    catalog = {}
+    names = []
+    for t in range(tables):
+        name = f"APP.{rng.choice(WORDS).upper()}_{rng.choice(WORDS).upper()}_{t}"
+        names.append(name)
+        cols = [[f"{name.split('.')[1]}_ID", "NUMBER", 22, 10, 0, False, None]]
+        for c in range(columns - 1):
+            cols.append([f"{rng.choice(WORDS).upper()}_{rng.choice(['ID', 'NAME', 'DATE', 'AMOUNT', 'CODE'])}_{c}",
+                         rng.choice(["NUMBER", "VARCHAR2", "DATE"]), 22, None, None, True,
+                         f"{rng.choice(WORDS)} {rng.choice(WORDS)}" if rng.random() < 0.3 else None])
+        foreign_keys = []
+        if t and rng.random() < 0.6:
+            foreign_keys.append({"columns": [cols[1][0]], "references": names[rng.randrange(t)]})
+        catalog[name] = {"owner": "APP", "name": name.split(".")[1], "type": "TABLE", "last_ddl": None,
+                         "num_rows": 1000, "comment": f"{rng.choice(WORDS)} records", "columns": cols,
+                         "primary_key": [cols[0][0]], "unique": [], "foreign_keys": foreign_keys, "indexes": []}
+    return catalog
+
+
+def main():
+    tables = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    data = synthetic_tables(tables, columns)
+
+    start = time.perf_counter()
+    SchemaRetriever(data)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    catalog = SchemaCatalog(("bench", 0, "bench", "APP"), snapshot_dir="/tmp")
+    catalog._index(data)
+
+    latencies = []
+    for _ in range(40):
+        for request in REQUESTS:
+            start = time.perf_counter()
+            catalog.retriever.search(request)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    full_tokens = count_tokens("\n".join(catalog.describe(name) for name in catalog.tables))
+    retrieved = [count_tokens(catalog.relevant_schema(request)) for request in REQUESTS]
+
+    print(f"tables: {tables:,}  columns: {tables * columns:,}")
+    print(f"index build   {build_ms:8.1f} ms")
+    print(f"query p50     {statistics.median(latencies):8.3f} ms  "
+          f"p95 {sorted(latencies)[int(len(latencies) * 0.95)]:.3f} ms")
+    print(f"full schema   {full_tokens:8,d} tokens")
+    print(f"retrieved     {statistics.mean(retrieved):8,.0f} tokens (mean, top-k + FK neighbours)")
+    print(f"example:\n{catalog.relevant_schema(REQUESTS[0])}")
+
+
+if __name__ == "__main__":
+    main()
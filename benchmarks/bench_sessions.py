@@ -0,0 +1,96 @@
+"""Simulates many browser sessions starting up, with per-session objects vs the shared registry.
+
+"per-session" rebuilds what every session used to create for itself (a GroqHandler with its
+own Groq HTTP client, a SecurityManager, the placeholder OracleManager); "shared" runs the
+current StateManager.init_state. Memory is what the live sessions keep: Python allocations
+(tracemalloc) and resident set growth, which also covers native memory such as TLS contexts.
+Each mode runs in its own process. No network traffic happens: clients are only constructed.
+
+Usage: python benchmarks/bench_sessions.py [sessions]
+"""
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("GROQ_API_KEY", "bench")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import streamlit
+import resources
+from groq_handler import GroqHandler
+from oracle_manager import OracleManager
+from security import SecurityManager
+from state_manager import StateManager
+
+MODELS = ["qwen-2.5-coder-32b", "llama-3.3-70b-specdec"]
+
+
+class Session(dict):
+    """Stands in for st.session_state: item and attribute access to the same values."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def per_session():
+    session = Session()
+    session.oracle = OracleManager("localhost", 1521, "orcl")
+    session.groq = GroqHandler(MODELS[0])
+    session.security = SecurityManager()
+    session.groq = GroqHandler(MODELS[1])  # The user switches model once
+    return session
+
+
+def shared():
+    session = Session()
+    streamlit.session_state = session
+    StateManager().init_state()
+    session.groq = resources.groq_handler(MODELS[1])
+    return session
+
+
+def measure(start_session, count):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    sessions, times = [], []
+    for _ in range(count):
+        start = time.perf_counter()
+        sessions.append(start_session())
+        times.append(time.perf_counter() - start)
+    kept = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    rss = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before) * 1024  # KiB on Linux
+    times.sort()
+    return kept / count, rss / count, times[len(times) // 2], times[int(len(times) * 0.95)]
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--run":
+        shared()  # Import-time and first-use work is paid once per process, not per session
+        start_session = per_session if sys.argv[2] == "per-session" else shared
+        print(*measure(start_session, int(sys.argv[3])))
+        return
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f"sessions: {count}")
+    print(f"{'mode':>12s} {'py KiB/session':>15s} {'RSS KiB/session':>16s} {'p50 ms':>8s} {'p95 ms':>8s}")
+    for mode in ("per-session", "shared"):
+        output = subprocess.run([sys.executable, __file__, "--run", mode, str(count)],
+                                capture_output=True, text=True, check=True).stdout.split()
+        py, rss, p50, p95 = (float(value) for value in output[-4:])
+        print(f"{mode:>12s} {py / 1024:15.1f} {rss / 1024:16.1f} {p50 * 1000:8.2f} {p95 * 1000:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Throughput of the tokenizer-based SQL classifier against the old prefix and regex checks.
+
+The corpus mixes plain SELECTs, comment-prefixed queries, CTEs, q-quoted literals, DML, DDL,
+PL/SQL blocks and stacked statements. "legacy" is the previous SecurityManager prefix check plus
+the regex table extraction; "cold" classifies every statement with the LRU cache bypassed;
+"cached" runs the corpus through `classify` as the app does, where repeated statements are hits.
+Mistakes count statements whose read-only verdict is wrong (a write accepted or a query refused).
+
+Usage: python benchmarks/bench_sql_classifier.py [statements] [distinct]
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+from sql_parser import classify, _mask_literals
+
+# (template, read-only); {t} is a table name and {n} a number
+TEMPLATES = [
+    ("SELECT * FROM {t} WHERE id = {n}", True),
+    ("select e.name, d.name from {t} e join departments d on e.dept_id = d.id where e.sal > {n}", True),
+    ("-- top customers\nSELECT customer, SUM(amount) FROM {t} GROUP BY customer FETCH FIRST {n} ROWS ONLY", True),
+    ("/* report */ SELECT COUNT(*) FROM {t}, regions r WHERE r.id = {n}", True),
+    ("WITH recent AS (SELECT * FROM {t} WHERE day > SYSDATE - {n}) SELECT * FROM recent JOIN stores s ON 1 = 1", True),
+    ("SELECT q'[it's; DELETE FROM {t}]' AS note, EXTRACT(YEAR FROM hired) FROM {t}", True),
+    ("(SELECT id FROM {t}) UNION ALL (SELECT id FROM archive_{n})", True),
+    ("SELECT * FROM (SELECT id, ROWNUM rn FROM {t}) x, lookups l WHERE x.rn < {n}", True),
+    ("INSERT INTO {t} (id, name) VALUES ({n}, 'SELECT')", False),
+    ("UPDATE {t} SET amount = amount * 1.{n} WHERE id IN (SELECT id FROM flagged)", False),
+    ("DELETE FROM {t} WHERE created < SYSDATE - {n}", False),
+    ("MERGE INTO {t} t USING staging s ON (t.id = s.id) WHEN MATCHED THEN UPDATE SET t.v = {n}", False),
+    ("CREATE TABLE {t}_copy AS SELECT * FROM {t} WHERE ROWNUM <= {n}", False),
+    ("BEGIN DELETE FROM {t} WHERE id = {n}; COMMIT; END;", False),
+    ("SELECT * FROM {t} WHERE id = {n}; DROP TABLE {t}", False),
+    ("  select 1 from dual; delete from {t} where id = {n}", False),
+]
+TABLES = ["employees", "hr.orders", "sales", '"MixedCase"', "inventory", "audit_log"]
+
+# The checks classify() replaces
+_FROM_LIST = re.compile(
+    r"\bFROM\s+(.+?)(?=\bWHERE\b|\bGROUP\b|\bORDER\b|\bHAVING\b|\bCONNECT\b|\bSTART\b|\bUNION\b"
+    r"|\bINTERSECT\b|\bMINUS\b|\bFETCH\b|\bOFFSET\b|\bJOIN\b|\bINNER\b|\bLEFT\b|\bRIGHT\b"
+    r"|\bFULL\b|\bCROSS\b|\bNATURAL\b|\)|$)", re.IGNORECASE | re.DOTALL
+)
+_IDENTIFIER = r'(?:"[^"]+"|[A-Za-z][\w$#]*)(?:\s*\.\s*(?:"[^"]+"|[A-Za-z][\w$#]*))?'
+_JOIN = re.compile(r"\bJOIN\s+(" + _IDENTIFIER + ")", re.IGNORECASE)
+_LEADING_IDENTIFIER = re.compile("^(" + _IDENTIFIER + ")")
+
+
+def legacy(sql):
+    read_only = sql.upper().strip().startswith("SELECT")
+    masked = _mask_literals(sql)
+    tables = [m.group(1) for m in _JOIN.finditer(masked)]
+    for match in _FROM_LIST.finditer(masked):
+        for item in match.group(1).split(","):
+            identifier = _LEADING_IDENTIFIER.match(item.strip())
+            if identifier:
+                tables.append(identifier.group(1))
+    return read_only
+
+
+def corpus(count, distinct):
+    rng = random.Random(0)
+    pool = []
+    for _ in range(distinct):
+        template, read_only = rng.choice(TEMPLATES)
+        pool.append((template.format(t=rng.choice(TABLES), n=rng.randrange(10000)), read_only))
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run(label, check, statements):
+    start = time.perf_counter()
+    mistakes = sum(check(sql) != read_only for sql, read_only in statements)
+    elapsed = time.perf_counter() - start
+    print(f"{label:>8s} {len(statements) / elapsed:14,.0f} {elapsed * 1e6 / len(statements):10.2f} {mistakes:10,d}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    distinct = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    statements = corpus(count, distinct)
+    print(f"statements: {count:,}  distinct: {distinct:,}  templates: {len(TEMPLATES)}")
+    print(f"{'mode':>8s} {'statements/s':>14s} {'µs/stmt':>10s} {'mistakes':>10s}")
+    run("legacy", legacy, statements)
+    run("cold", lambda sql: classify.__wrapped__(sql).is_query, statements)
+    classify.cache_clear()
+    run("cached", lambda sql: classify(sql).is_query, statements)
+    info = classify.cache_info()
+    print(f"verdict cache: {info.hits:,} hits, {info.misses:,} misses, {info.currsize:,}/{info.maxsize:,} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measures cold start: module import time of the entry point and time to first paint of the connection form.
+
+Each measurement runs in a fresh interpreter. Import time comes from `python -X importtime`;
+first paint runs app/main.py with Streamlit's AppTest until the connection form is rendered.
+Exits with status 1 when first paint is slower than the threshold or a module that should
+load lazily (database driver, scikit-learn, plotly, groq) is imported before connecting.
+
+Usage: python benchmarks/bench_startup.py [max_first_paint_seconds] [runs]
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+# Streamlit itself touches plotly.graph_objects (a thin lazy stub), so plotly.express is the one to watch
+DEFERRED = ["cx_Oracle", "sklearn", "plotly.express", "groq", "pandas"]
+MUST_DEFER = ["cx_Oracle", "sklearn", "plotly.express", "groq"]
+
+FIRST_PAINT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({main!r}, default_timeout=120)
+app.run()
+elapsed = time.perf_counter() - start
+assert not app.exception, app.exception
+assert any(field.label == "Username" for field in app.text_input), "connection form not rendered"
+print(elapsed)
+"""
+
+
+def environment():
+    env = dict(os.environ)
+    env.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [APP_DIR, env.get("PYTHONPATH")]))
+    return env
+
+
+def import_times():
+    """Cumulative import time in seconds of every module imported by `import main`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=APP_DIR,
+                            env=environment(), capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| *(\S+)", line)
+        if match:
+            times[match.group(2)] = int(match.group(1)) / 1e6
+    return times
+
+
+def first_paint():
+    script = FIRST_PAINT.format(main=os.path.join(APP_DIR, "main.py"))
+    result = subprocess.run([sys.executable, "-c", script], cwd=APP_DIR, env=environment(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return float(result.stdout.split()[-1])
+
+
+def main():
+    threshold = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    times = import_times()
+    print(f"import main: {times.get('main', 0):.2f}s (streamlit {times.get('streamlit', 0):.2f}s)")
+    for name in DEFERRED:
+        print(f"  {name:15s} {'imported' if name in times else 'deferred'}")
+    paints = sorted(first_paint() for _ in range(runs))
+    median = paints[len(paints) // 2]
+    print(f"first paint of the connection form: median {median:.2f}s over {runs} runs (threshold {threshold:.2f}s)")
+    eager = [name for name in MUST_DEFER if name in times]
+    if eager or median > threshold:
+        print(f"REGRESSION: {'imported at start: ' + ', '.join(eager) if eager else 'first paint too slow'}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
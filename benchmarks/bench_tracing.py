@@ -0,0 +1,78 @@
+"""Overhead of the tracing layer, and of prompt logging before and after it moved to sampled DEBUG.
+
+"span" is one empty nested span pair; "execute_query" runs a small SELECT through the fake driver
+with tracing off and on (the on run also records execute, fetch and build child spans). The
+logging rows format and emit a large prompt the way GroqHandler used to (always, at INFO, to a
+file) against log_prompt at the default INFO level and at DEBUG with the default sample rate.
+
+Usage: python benchmarks/bench_tracing.py [iterations] [prompt_kib]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import fake_oracle
+import tracing
+from oracle_manager import OracleManager
+from query_cache import QueryResultCache
+
+
+def per_call(run, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        run()
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+
+def nested_span():
+    with tracing.tracer.span("outer", rows=1):
+        with tracing.tracer.span("inner"):
+            pass
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    prompt = "x" * int(sys.argv[2] if len(sys.argv) > 2 else 64) * 1024
+    fake_oracle.configure(rows=100)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    query = lambda: oracle.execute_query("SELECT * FROM sales", max_rows=100)
+    print(f"iterations: {iterations:,}  prompt: {len(prompt) // 1024} KiB")
+    print(f"{'case':>28s} {'µs/call':>10s}")
+
+    tracing.tracer.enabled = False
+    off = per_call(nested_span, iterations)
+    query_off = per_call(query, iterations // 10)
+    tracing.tracer.enabled = True
+    on = per_call(nested_span, iterations)
+    query_on = per_call(query, iterations // 10)
+    print(f"{'span pair, tracing off':>28s} {off:10.2f}")
+    print(f"{'span pair, tracing on':>28s} {on:10.2f}")
+    print(f"{'execute_query, tracing off':>28s} {query_off:10.1f}")
+    print(f"{'execute_query, tracing on':>28s} {query_on:10.1f}")
+
+    handler = logging.FileHandler(os.path.join(os.environ["DATAQUEST_CACHE_DIR"], "bench.log"))
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(logging.INFO)
+    logged = per_call(lambda: (logging.info("Sending request to Groq API with prompt:"), logging.info(prompt)),
+                      iterations // 10)
+    skipped = per_call(lambda: tracing.log_prompt("Analysis prompt", prompt), iterations // 10)
+    root.setLevel(logging.DEBUG)
+    sampled = per_call(lambda: tracing.log_prompt("Analysis prompt", prompt), iterations // 10)
+    print(f"{'prompt at INFO (before)':>28s} {logged:10.1f}")
+    print(f"{'log_prompt, INFO level':>28s} {skipped:10.2f}")
+    print(f"{'log_prompt, DEBUG, sampled':>28s} {sampled:10.1f}")
+    stats = tracing.tracer.summary()
+    print(f"spans recorded: {sum(row['count'] for row in stats):,} in {len(stats)} histograms")
+
+
+if __name__ == "__main__":
+    main()
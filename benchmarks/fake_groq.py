@@ -0,0 +1,90 @@
+"""In-process stand-ins for the Groq and AsyncGroq clients.
+
+Each completion waits a simulated latency and answers with a canned text, streamed in a
+few chunks when `stream=True`, so LLM-bound code paths can be timed without the API. With
+`tokens_per_second` set, `latency` is the time to the first token and the response (split on
+whitespace, one token per word) is generated at that rate, streamed one token per chunk.
+Responses carry `usage` token counts like the real API.
+"""
+import asyncio
+import time
+from types import SimpleNamespace
+
+settings = {
+    "latency": 1.5,  # Seconds per completion
+    "response": "Consider an index on the filtered columns and gathering fresh statistics.",
+    "chunks": 8,
+    "tokens_per_second": None,
+}
+stats = {"calls": 0}
+
+
+def configure(**kwargs):
+    settings.update(kwargs)
+
+
+def reset_stats():
+    stats["calls"] = 0
+
+
+def _tokens(text):
+    return [word + " " for word in text.split()] or [text]
+
+
+def _message(text, messages):
+    prompt_tokens = sum(len(m["content"].split()) for m in messages or [])
+    usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=len(_tokens(text)))
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))], usage=usage)
+
+
+def _generation_seconds(text):
+    rate = settings["tokens_per_second"]
+    return settings["latency"] + (len(_tokens(text)) / rate if rate else 0.0)
+
+
+def _delta(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class _Completions:
+    def create(self, model=None, messages=None, **kwargs):
+        stats["calls"] += 1
+        time.sleep(_generation_seconds(settings["response"]))
+        return _message(settings["response"], messages)
+
+
+class _AsyncCompletions:
+    async def create(self, model=None, messages=None, stream=False, **kwargs):
+        stats["calls"] += 1
+        if not stream:
+            await asyncio.sleep(_generation_seconds(settings["response"]))
+            return _message(settings["response"], messages)
+        return self._stream()
+
+    async def _stream(self):
+        text = settings["response"]
+        rate = settings["tokens_per_second"]
+        if rate:
+            await asyncio.sleep(settings["latency"])
+            for token in _tokens(text):
+                await asyncio.sleep(1 / rate)
+                yield _delta(token)
+            return
+        chunks = max(1, settings["chunks"])
+        size = -(-len(text) // chunks)
+        for start in range(0, len(text), size):
+            await asyncio.sleep(settings["latency"] / chunks)
+            yield _delta(text[start:start + size])
+
+
+class Groq:
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=_Completions())
+
+
+class AsyncGroq:
+    def __init__(self, api_key=None, **kwargs):
+        self.chat = SimpleNamespace(completions=_AsyncCompletions())
+
+    async def close(self):
+        pass
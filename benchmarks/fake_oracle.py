@@ -0,0 +1,296 @@
+"""In-process stand-in for the cx_Oracle module.
+
+Lets OracleManager and friends run without a database: SELECTs return rows from a
+synthetic table, and every round trip can be given a simulated latency.
+"""
+import datetime
+import time
+from collections import OrderedDict
+
+SPOOL_ATTRVAL_TIMEDWAIT = 3
+
+
+class DatabaseError(Exception):
+    pass
+
+
+class _Error:
+    def __init__(self, code, message):
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"ORA-{self.code:05d}: {self.message}"
+
+
+class _BatchError(_Error):
+    def __init__(self, offset, code, message):
+        super().__init__(code, f"ORA-{code:05d}: {message}")
+        self.offset = offset
+
+
+class DbType:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"<DbType {self.name}>"
+
+
+DB_TYPE_NUMBER = DbType("DB_TYPE_NUMBER")
+DB_TYPE_BINARY_DOUBLE = DbType("DB_TYPE_BINARY_DOUBLE")
+DB_TYPE_BINARY_FLOAT = DbType("DB_TYPE_BINARY_FLOAT")
+DB_TYPE_VARCHAR = DbType("DB_TYPE_VARCHAR")
+DB_TYPE_CHAR = DbType("DB_TYPE_CHAR")
+DB_TYPE_NVARCHAR = DbType("DB_TYPE_NVARCHAR")
+DB_TYPE_NCHAR = DbType("DB_TYPE_NCHAR")
+DB_TYPE_LONG = DbType("DB_TYPE_LONG")
+DB_TYPE_CLOB = DbType("DB_TYPE_CLOB")
+DB_TYPE_NCLOB = DbType("DB_TYPE_NCLOB")
+DB_TYPE_DATE = DbType("DB_TYPE_DATE")
+DB_TYPE_TIMESTAMP = DbType("DB_TYPE_TIMESTAMP")
+DB_TYPE_TIMESTAMP_TZ = DbType("DB_TYPE_TIMESTAMP_TZ")
+DB_TYPE_TIMESTAMP_LTZ = DbType("DB_TYPE_TIMESTAMP_LTZ")
+
+_BASE_DATE = datetime.datetime(2024, 1, 1)
+_REGIONS = ["NORTH", "SOUTH", "EAST", "WEST", "CENTRAL"]
+
+# (name, type, precision, scale, value generator for row i)
+DEFAULT_COLUMNS = [
+    ("ID", DB_TYPE_NUMBER, 9, 0, lambda i: i),
+    ("REGION", DB_TYPE_VARCHAR, None, None, lambda i: _REGIONS[i % len(_REGIONS)]),
+    ("AMOUNT", DB_TYPE_NUMBER, 10, 2, lambda i: round((i * 7919 % 100000) / 100, 2)),
+    ("QUANTITY", DB_TYPE_NUMBER, 0, -127, lambda i: None if i % 97 == 0 else i % 50),
+    ("CREATED", DB_TYPE_DATE, None, None, lambda i: _BASE_DATE + datetime.timedelta(minutes=i)),
+    ("NOTE", DB_TYPE_VARCHAR, None, None, lambda i: f"note-{i}"),
+]
+
+# Knobs shared by every fake connection; see configure()
+settings = {
+    "rows": 1000,
+    "columns": DEFAULT_COLUMNS,
+    "execute_latency": 0.0,
+    "fetch_latency": 0.0,
+}
+stats = {"round_trips": 0, "executes": 0, "fetches": 0, "commits": 0, "connects": 0,
+         "parses": 0, "hard_parses": 0}
+_row_cache = {}
+_shared_pool = set()  # Statement texts the "server" has already hard-parsed
+
+
+def configure(**overrides):
+    """Change the synthetic result (rows, columns) or simulated latencies (seconds per round trip)."""
+    settings.update(overrides)
+    _row_cache.clear()
+
+
+def reset_stats():
+    for key in stats:
+        stats[key] = 0
+
+
+def flush_shared_pool():
+    _shared_pool.clear()
+
+
+def _parse(connection, sql):
+    """A statement found in the connection's statement cache skips the parse call; a text the
+    server has never seen is hard-parsed."""
+    cache = connection._statements
+    if sql in cache:
+        cache.move_to_end(sql)
+        return
+    stats["parses"] += 1
+    if sql not in _shared_pool:
+        stats["hard_parses"] += 1
+        _shared_pool.add(sql)
+    cache[sql] = True
+    while len(cache) > connection.stmtcachesize:
+        cache.popitem(last=False)
+
+
+def synthetic_rows():
+    key = (settings["rows"], id(settings["columns"]))
+    if key not in _row_cache:
+        generators = [col[4] for col in settings["columns"]]
+        _row_cache[key] = [tuple(gen(i) for gen in generators) for i in range(settings["rows"])]
+    return _row_cache[key]
+
+
+def makedsn(host, port, service_name=None, sid=None):
+    return f"{host}:{port}/{service_name or sid}"
+
+
+def _round_trip(latency, connection=None):
+    """Simulate one round trip; honours connection.cancel() and callTimeout like the real driver."""
+    stats["round_trips"] += 1
+    if connection is not None and connection.callTimeout and latency * 1000 > connection.callTimeout:
+        time.sleep(connection.callTimeout / 1000)
+        raise DatabaseError(_Error(0, f"DPI-1067: call timeout of {connection.callTimeout} ms exceeded"))
+    deadline = time.perf_counter() + latency
+    while True:
+        if connection is not None and connection._cancelled:
+            connection._cancelled = False
+            raise DatabaseError(_Error(1013, "user requested cancel of current operation"))
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, 0.01))
+
+
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.arraysize = 100
+        self.prefetchrows = 2
+        self.description = None
+        self.rowcount = 0
+        self._rows = []
+        self._pos = 0
+        self._batch_errors = []
+        self.input_sizes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self._rows = []
+
+    def execute(self, sql, parameters=None, **kwargs):
+        stats["executes"] += 1
+        self.connection._cancelled = False  # A break sent while idle does not carry over
+        _round_trip(settings["execute_latency"], self.connection)
+        if "MISSING_TABLE" in sql.upper():
+            raise DatabaseError(_Error(942, "table or view does not exist"))
+        _parse(self.connection, sql)
+        keyword = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+        if keyword in ("SELECT", "WITH"):
+            self.description = [
+                (name, type_code, None, None, precision, scale, True)
+                for name, type_code, precision, scale, _ in settings["columns"]
+            ]
+            self._rows = synthetic_rows()
+            self._pos = 0
+            self.rowcount = 0
+        else:
+            self.description = None
+            self._rows = []
+            self.rowcount = 1
+
+    def setinputsizes(self, *sizes, **named):
+        self.input_sizes = sizes or named
+
+    def executemany(self, sql, rows, batcherrors=False, arraydmlrowcounts=False):
+        """One round trip for the whole array; rows whose first value is None fail with ORA-01400."""
+        stats["executes"] += 1
+        _round_trip(settings["execute_latency"], self.connection)
+        if "MISSING_TABLE" in sql.upper():
+            raise DatabaseError(_Error(942, "table or view does not exist"))
+        _parse(self.connection, sql)
+        failed = [_BatchError(i, 1400, "cannot insert NULL") for i, row in enumerate(rows) if row[0] is None]
+        if failed and not batcherrors:
+            raise DatabaseError(failed[0])
+        self._batch_errors = failed
+        self.description = None
+        self.rowcount = len(rows) - len(failed)
+
+    def getbatcherrors(self):
+        return self._batch_errors
+
+    def _take(self, count):
+        rows = self._rows[self._pos:self._pos + count]
+        self._pos += len(rows)
+        self.rowcount = self._pos
+        return rows
+
+    def fetchmany(self, num_rows=None):
+        stats["fetches"] += 1
+        _round_trip(settings["fetch_latency"], self.connection)
+        return self._take(num_rows or self.arraysize)
+
+    def fetchone(self):
+        rows = self.fetchmany(1)
+        return rows[0] if rows else None
+
+    def fetchall(self):
+        # The real driver still fetches arraysize rows per round trip under the hood
+        rows = []
+        while True:
+            batch = self.fetchmany(self.arraysize)
+            if not batch:
+                return rows
+            rows.extend(batch)
+
+
+class Connection:
+    def __init__(self, user=None, dsn=None):
+        self.user = user
+        self.dsn = dsn
+        self.stmtcachesize = 20
+        self.callTimeout = 0
+        self._cancelled = False
+        self._statements = OrderedDict()
+        stats["connects"] += 1
+
+    def cursor(self):
+        return Cursor(self)
+
+    def commit(self):
+        stats["commits"] += 1
+        _round_trip(0)
+
+    def rollback(self):
+        _round_trip(0)
+
+    def ping(self):
+        _round_trip(0)
+
+    def cancel(self):
+        """Interrupts the round trip in progress (from any thread), as OCIBreak does."""
+        self._cancelled = True
+
+    def close(self):
+        pass
+
+
+def connect(user=None, password=None, dsn=None, **kwargs):
+    if password == "invalid":
+        raise DatabaseError(_Error(1017, "invalid username/password; logon denied"))
+    return Connection(user, dsn)
+
+
+class SessionPool:
+    def __init__(self, user=None, password=None, dsn=None, min=1, max=2, increment=1, **kwargs):
+        if password == "invalid":
+            raise DatabaseError(_Error(1017, "invalid username/password; logon denied"))
+        self.user = user
+        self.dsn = dsn
+        self.min = min
+        self.max = max
+        self.increment = increment
+        self.ping_interval = 60
+        self.stmtcachesize = 20
+        self.busy = 0
+        self.opened = min
+        self._idle = [Connection(user, dsn) for _ in range(min)]
+
+    def acquire(self):
+        conn = self._idle.pop() if self._idle else Connection(self.user, self.dsn)
+        conn.stmtcachesize = self.stmtcachesize
+        self.busy += 1
+        self.opened = max(self.opened, self.busy + len(self._idle))
+        return conn
+
+    def release(self, conn):
+        self.busy -= 1
+        self._idle.append(conn)
+
+    def drop(self, conn):
+        self.busy -= 1
+        self.opened -= 1
+
+    def close(self, force=False):
+        self._idle = []
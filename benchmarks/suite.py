@@ -0,0 +1,265 @@
+"""Regression suite over the app's hot paths, run offline against the fake driver and LLM client.
+
+Each case is timed over several repeats after a warm-up; the median is what gets compared. Runs
+are saved as JSON, and `compare` flags every case whose median grew by more than the threshold
+against a baseline (exit status 1 when any did, so it can gate a change).
+
+Usage:
+    python benchmarks/suite.py run [--quick] [--only NAME ...] [--repeats N] [--scale N] [--output FILE]
+    python benchmarks/suite.py compare [--baseline FILE] [--current FILE] [--threshold 0.15]
+
+`run` writes benchmarks/results/latest.json unless --output is given; pass --output
+benchmarks/baseline.json to record a new baseline. Timings depend on the machine, so compare runs
+from the same one: the committed baseline is a reference, not a target.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict
+
+os.environ.setdefault("DATAQUEST_CACHE_DIR", tempfile.mkdtemp(prefix="dataquest_bench_"))
+os.environ.setdefault("HEALTH_SAMPLER_ENABLED", "false")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")  # Every LLM call must reach the fake client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+
+import pandas as pd
+import fake_groq
+import fake_oracle
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+LATEST = os.path.join(HERE, "results", "latest.json")
+
+# Case name -> (setup(scale) returning the function to time, and its work units per call)
+CASES: Dict[str, Callable] = {}
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+def fake_manager(rows, latency=0.0):
+    from oracle_manager import OracleManager
+    from query_cache import QueryResultCache
+    fake_oracle.configure(rows=rows, execute_latency=latency, fetch_latency=latency)
+    oracle = OracleManager("bench", 1521, "bench", driver=fake_oracle,
+                           result_cache=QueryResultCache(enabled=False))
+    oracle.connect("bench", "bench")
+    return oracle
+
+
+def fake_frame(rows):
+    from materializer import build_frame, column_kinds
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.execute("SELECT * FROM sales")
+    columns = [col[0] for col in cursor.description]
+    return build_frame(columns, column_kinds(cursor.description, fake_oracle), cursor.fetchall())
+
+
+@case("execute_query")
+def execute_query(scale):
+    rows = 20000 * scale
+    oracle = fake_manager(rows, latency=0.0002)
+    return lambda: oracle.execute_query("SELECT * FROM sales", max_rows=rows), {"rows": rows}
+
+
+@case("build_frame")
+def build_frame_case(scale):
+    from materializer import build_frame, column_kinds
+    rows = 100000 * scale
+    fake_oracle.configure(rows=rows)
+    cursor = fake_oracle.connect().cursor()
+    cursor.execute("SELECT * FROM sales")
+    columns = [col[0] for col in cursor.description]
+    kinds = column_kinds(cursor.description, fake_oracle)
+    data = cursor.fetchall()
+    return lambda: build_frame(columns, kinds, data), {"rows": rows}
+
+
+@case("analysis_prompt")
+def analysis_prompt(scale):
+    import prompt_context
+    from query_handler import ANALYSES, QueryHandler
+    df = fake_frame(50000 * scale)
+    handler = QueryHandler.__new__(QueryHandler)  # Prompt building needs no session state
+    model = "qwen-2.5-coder-32b"
+
+    def run():
+        prompt_context._context_cache.clear()  # Time the build, not the per-DataFrame memo
+        context = prompt_context.build_data_context(df, prompt_context.token_budget(model))
+        return [handler._analysis_prompt("SELECT * FROM sales", context, instructions)
+                for instructions, _ in ANALYSES.values()]
+    return run, {"rows": len(df)}
+
+
+CHARTS = {
+    "Bar Chart": dict(x="REGION", y=("AMOUNT",)),
+    "Line Chart": dict(x="CREATED", y=("AMOUNT",)),
+    "Scatter Plot": dict(x="AMOUNT", y=("QUANTITY",)),
+    "Pie Chart": dict(x="REGION", value="AMOUNT"),
+    "Histogram": dict(x="AMOUNT"),
+    "Box Plot": dict(x="REGION", y=("AMOUNT",)),
+    "Heatmap": dict(x="REGION", y=("QUANTITY",), value="AMOUNT"),
+}
+
+
+def chart_case(chart_type, options):
+    def setup(scale):
+        from chart_engine import ChartSpec
+        from data_visualizer import DataVisualizer
+        from figure_cache import FigureCache
+        df = fake_frame(50000 * scale)
+        visualizer = DataVisualizer(None)
+        spec = ChartSpec(chart_type, **options)
+
+        def run():
+            visualizer.figure_cache = FigureCache()  # A cold build every time, as on a new result
+            return visualizer.create_chart(spec, df)
+        return run, {"rows": len(df)}
+    return setup
+
+
+for _chart_type, _options in CHARTS.items():
+    case("create_chart: " + _chart_type)(chart_case(_chart_type, _options))
+
+
+@case("excel_export")
+def excel_export(scale):
+    from export_engine import frame_chunks, write_export
+    df = fake_frame(10000 * scale)
+    return lambda: write_export(frame_chunks(df), list(df.columns), "Excel", io.BytesIO()), {"rows": len(df)}
+
+
+@case("sanitize_input")
+def sanitize_input(scale):
+    from bench_sql_classifier import corpus
+    from security import SecurityManager
+    from sql_parser import classify
+    statements = [sql for sql, _ in corpus(2000 * scale, 1000 * scale)]
+    security = SecurityManager()  # Outside a Streamlit session DDL/DML is disabled, the default
+
+    def run():
+        classify.cache_clear()  # Half the corpus repeats, so half of the checks are verdict cache hits
+        return [security.sanitize_input(sql) for sql in statements]
+    return run, {"statements": len(statements)}
+
+
+@case("generate_sql")
+def generate_sql(scale):
+    from groq_handler import GroqHandler
+    fake_groq.configure(latency=0.005, tokens_per_second=5000,
+                        response="SELECT region, SUM(amount) FROM sales GROUP BY region;")
+    handler = GroqHandler("qwen-2.5-coder-32b", client=fake_groq.Groq())
+    return lambda: handler.generate_sql("total sales per region", "SALES(REGION, AMOUNT)"), {"requests": 1}
+
+
+@case("stream_analyses")
+def stream_analyses(scale):
+    from analysis_engine import AnalysisEngine
+    from groq_handler import GroqHandler
+    fake_groq.configure(latency=0.005, tokens_per_second=1000, response=" ".join(["insight"] * 200))
+    engine = AnalysisEngine(GroqHandler("qwen-2.5-coder-32b", async_client=fake_groq.AsyncGroq()))
+    prompts = {f"analysis {i}": "Describe the data." for i in range(3)}
+    tokens = []
+    return lambda: engine.run(prompts, on_token=lambda name, text: tokens.append(len(text))), {"requests": 3}
+
+
+def measure(name, scale, repeats):
+    run, units = CASES[name](scale)
+    run()  # Warm-up: imports, caches and first-call allocations are not what we compare
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    result = {"median_ms": median * 1000, "min_ms": min(samples) * 1000, "repeats": repeats, **units}
+    for unit, count in units.items():
+        result[f"{unit}_per_sec"] = count / median
+    return result
+
+
+def run_suite(args):
+    names = [name for name in CASES if not args.only or any(part in name for part in args.only)]
+    scale = args.scale
+    repeats = args.repeats or (3 if args.quick else 7)
+    report = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "scale": scale,
+        },
+        "cases": {},
+    }
+    print(f"{'case':>28s} {'median ms':>10s} {'min ms':>9s}")
+    for name in names:
+        result = measure(name, scale, repeats)
+        report["cases"][name] = result
+        print(f"{name:>28s} {result['median_ms']:10.2f} {result['min_ms']:9.2f}")
+    output = args.output or LATEST
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as out:
+        json.dump(report, out, indent=2, sort_keys=True)
+    print(f"saved {output}")
+
+
+def compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    regressions = 0
+    print(f"{'case':>28s} {'baseline ms':>12s} {'current ms':>11s} {'change':>8s}")
+    for name, result in current["cases"].items():
+        before = baseline["cases"].get(name)
+        if before is None:
+            print(f"{name:>28s} {'-':>12s} {result['median_ms']:11.2f} {'new':>8s}")
+            continue
+        change = result["median_ms"] / before["median_ms"] - 1
+        flag = ""
+        if change > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{name:>28s} {before['median_ms']:12.2f} {result['median_ms']:11.2f} {change:+8.1%}{flag}")
+    for name in sorted(baseline["cases"].keys() - current["cases"].keys()):
+        print(f"{name:>28s} not run")
+    print(f"{regressions} regression(s) above {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="time every case and save the results as JSON")
+    run.add_argument("--quick", action="store_true", help="fewer repeats")
+    run.add_argument("--only", nargs="*", help="cases whose name contains any of these")
+    run.add_argument("--repeats", type=int)
+    run.add_argument("--scale", type=int, default=1, help="multiply every case's data size")
+    run.add_argument("--output", help=f"defaults to {os.path.relpath(LATEST)}")
+    check = commands.add_parser("compare", help="flag cases slower than the baseline")
+    check.add_argument("--baseline", default=BASELINE)
+    check.add_argument("--current", default=LATEST)
+    check.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 = 15%%")
+    args = parser.parse_args()
+    if args.command == "run":
+        run_suite(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())